@@ -0,0 +1,69 @@
+"""Benchmarks high-rate, logging-style appends through `FileSystemTool`.
+
+Compares unbuffered `modify_file` calls (one open and write per append)
+with buffered appends that are coalesced behind a kept-open handle, and
+reports the throughput of each.
+
+Usage:
+    python benchmarks/bench_appends.py [--appends N] [--line-bytes N]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+
+from free_ai.tools import FileSystemTool
+
+
+def run(tool: FileSystemTool, path: str, line: str, appends: int, buffered: bool):
+    """Appends `line` `appends` times and returns the elapsed seconds."""
+    start = time.perf_counter()
+    for _ in range(appends):
+        tool.use(
+            operation="modify_file",
+            filepath=path,
+            content_to_append=line,
+            buffered=buffered,
+        )
+    tool.use(operation="flush", filepath=path)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--appends", type=int, default=50_000)
+    parser.add_argument("--line-bytes", type=int, default=80)
+    args = parser.parse_args()
+
+    line = "x" * (args.line_bytes - 1) + "\n"
+    directory = tempfile.mkdtemp(prefix="bench_appends_")
+    try:
+        tool = FileSystemTool()
+        results = {}
+        for buffered in (False, True):
+            path = os.path.join(directory, f"buffered_{buffered}.log")
+            elapsed = run(tool, path, line, args.appends, buffered)
+            assert os.path.getsize(path) == args.appends * len(line)
+            results[buffered] = elapsed
+        tool.close()
+        print(
+            json.dumps(
+                {
+                    "benchmark": "appends",
+                    "appends": args.appends,
+                    "line_bytes": len(line),
+                    "unbuffered_per_s": round(args.appends / results[False]),
+                    "buffered_per_s": round(args.appends / results[True]),
+                    "speedup": round(results[False] / results[True], 2),
+                }
+            )
+        )
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""Compares the throughput and recall of the available embedders.
+
+Throughput is the number of texts embedded per second, one text at a time
+as `VectorMemory.add` does, plus the mean latency of `VectorMemory.add`
+itself. Recall is measured on a small built-in corpus of facts with one
+query per fact, partly keyword-like and partly paraphrased, ranked by
+cosine similarity against the facts and a set of distractors: recall@k is
+the fraction of queries whose fact is among the k nearest texts.
+
+The sentence-transformer is skipped (and reported as such) if its model
+cannot be loaded, e.g. on an air-gapped host.
+
+Usage:
+    python benchmarks/bench_embedders.py [--embedders hashing,sentence-transformers]
+        [--texts N] [--adds N]
+"""
+
+import argparse
+import json
+import logging
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from free_ai.embedders import get_embedder
+from free_ai.memory import VectorMemory
+
+# (fact, query) pairs; the second half are paraphrases sharing few words.
+PAIRS = [
+    (
+        "The Liskov Substitution Principle says subclasses must be usable wherever their base class is expected.",
+        "What does the Liskov substitution principle require of subclasses?",
+    ),
+    (
+        "A Dockerfile describes the steps used to build a container image.",
+        "Which file describes how a Docker container image is built?",
+    ),
+    (
+        "Python's GIL allows only one thread to execute bytecode at a time.",
+        "How many threads can execute Python bytecode at once under the GIL?",
+    ),
+    (
+        "SQLite stores an entire database in a single file on disk.",
+        "Where does SQLite keep its database?",
+    ),
+    (
+        "Binary search finds an item in a sorted array in logarithmic time.",
+        "What is the time complexity of binary search on a sorted array?",
+    ),
+    (
+        "A mutex ensures that only one thread enters a critical section.",
+        "Which primitive lets just one thread into a critical section?",
+    ),
+    (
+        "HTTP status 404 means the requested resource was not found.",
+        "What does an HTTP 404 status code mean?",
+    ),
+    (
+        "Git rebase rewrites commits on top of another base commit.",
+        "How does git rebase change commit history?",
+    ),
+    (
+        "The agent archives completed Agora messages to a JSONL file.",
+        "Where do finished messages on the message board end up?",
+    ),
+    (
+        "Vector embeddings map texts to points so that similar meanings lie close together.",
+        "How can sentences with related meaning be found numerically?",
+    ),
+    (
+        "Caching stores the results of expensive computations for reuse.",
+        "Why keep answers of slow calculations around?",
+    ),
+    (
+        "A deadlock occurs when two threads each wait for a lock the other holds.",
+        "What happens if two workers block on each other's resources forever?",
+    ),
+]
+
+DISTRACTORS = [
+    "The weather forecast predicts rain for the weekend.",
+    "Bread dough must rest before it is baked.",
+    "The museum opens at nine in the morning.",
+    "Cats sleep for most of the day.",
+    "The orchestra tuned its instruments before the concert.",
+    "Mountains are colder at higher altitudes.",
+    "The library lends books for three weeks.",
+    "Tomatoes grow best in full sun.",
+]
+
+
+def recall(embedder, ks=(1, 3)) -> dict:
+    """Returns recall@k over `PAIRS`, overall and for the paraphrase half."""
+    documents = [fact for fact, _ in PAIRS] + DISTRACTORS
+    vectors = np.array([embedder.encode(text) for text in documents], dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True) + 1e-12
+    ranks = []
+    for index, (_, query) in enumerate(PAIRS):
+        q = np.asarray(embedder.encode(query), dtype=np.float32)
+        q /= np.linalg.norm(q) + 1e-12
+        order = np.argsort(-(vectors @ q))
+        ranks.append(int(np.where(order == index)[0][0]))
+    half = len(PAIRS) // 2
+    metrics = {}
+    for k in ks:
+        metrics[f"recall@{k}"] = round(sum(r < k for r in ranks) / len(ranks), 3)
+        paraphrased = ranks[half:]
+        metrics[f"recall@{k}.paraphrased"] = round(
+            sum(r < k for r in paraphrased) / len(paraphrased), 3
+        )
+    return metrics
+
+
+def throughput(embedder, texts: int) -> float:
+    """Returns the number of texts embedded per second, one at a time."""
+    corpus = [f"{PAIRS[i % len(PAIRS)][0]} (note {i})" for i in range(texts)]
+    start = time.perf_counter()
+    for text in corpus:
+        embedder.encode(text)
+    return texts / (time.perf_counter() - start)
+
+
+def add_latency(embedder, adds: int) -> float:
+    """Returns the mean latency in ms of `VectorMemory.add`."""
+    path = tempfile.mkdtemp(prefix="free_ai_bench_embedders_")
+    try:
+        memory = VectorMemory(path=path, embedding_model=embedder)
+        start = time.perf_counter()
+        for i in range(adds):
+            memory.add(f"{PAIRS[i % len(PAIRS)][0]} (note {i})", {"source": "bench"})
+        return (time.perf_counter() - start) * 1000 / adds
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--embedders", default="hashing,sentence-transformers")
+    parser.add_argument("--texts", type=int, default=2000)
+    parser.add_argument("--adds", type=int, default=200)
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    for name in args.embedders.split(","):
+        embedder = get_embedder(name)
+        try:
+            embedder.encode("warm up")
+        except Exception as e:
+            print(json.dumps({"embedder": name, "skipped": f"{type(e).__name__}: {e}"}))
+            continue
+        result = {"embedder": name, "identity": embedder.identity}
+        result["texts_per_sec"] = round(throughput(embedder, args.texts), 1)
+        result["add_mean_ms"] = round(add_latency(embedder, args.adds), 3)
+        result.update(recall(embedder))
+        print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""Benchmarks the shared embedding server against in-process encoding.
+
+For each number of concurrent clients, every client embeds single texts in
+a loop, either through a `RemoteEmbedder` connected to one
+`EmbeddingServer` process or with its own in-process call to the model
+(what every agent process does without the server). Reports throughput in
+texts per second, p50/p99 request latency and, for the server, the mean
+batch size it formed.
+
+The sentence-transformer is used if its model can be loaded; otherwise
+the benchmark falls back to the hashing embedder, which does not gain
+from batching, so the numbers then show the server's overhead only.
+
+Usage:
+    python benchmarks/bench_embedding_server.py [--clients 1,2,4,8,16,32,64]
+        [--requests N] [--embedder sentence-transformers] [--max-wait SECONDS]
+        [--max-batch-size N]
+"""
+
+import argparse
+import json
+import logging
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+from free_ai.embedders import get_embedder
+from free_ai.embedding_server import RemoteEmbedder, start_server_process
+
+
+def run_clients(make_encoder, clients: int, requests: int) -> dict:
+    """Runs `clients` threads that each embed `requests` texts one by one."""
+    latencies = []
+    lock = threading.Lock()
+    barrier = threading.Barrier(clients + 1)
+
+    def client(index):
+        encode = make_encoder()
+        own = []
+        barrier.wait()
+        for i in range(requests):
+            start = time.perf_counter()
+            encode(f"client {index} asks question number {i} about the memory")
+            own.append((time.perf_counter() - start) * 1000)
+        with lock:
+            latencies.extend(own)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    seconds = time.perf_counter() - start
+    ordered = sorted(latencies)
+    return {
+        "texts_per_sec": round(len(ordered) / seconds, 1),
+        "p50_ms": round(statistics.median(ordered), 3),
+        "p99_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))], 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clients", default="1,2,4,8,16,32,64")
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--embedder", default="sentence-transformers")
+    parser.add_argument("--max-wait", type=float, default=0.005)
+    parser.add_argument("--max-batch-size", type=int, default=64)
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    name = args.embedder
+    local = get_embedder(name)
+    try:
+        local.encode("warm up")
+    except Exception as e:
+        print(json.dumps({"embedder": name, "skipped": f"{type(e).__name__}: {e}"}))
+        name, local = "hashing", get_embedder("hashing")
+
+    socket_path = os.path.join(tempfile.mkdtemp(), "embed.sock")
+    process = start_server_process(
+        socket_path,
+        name,
+        max_wait=args.max_wait,
+        max_batch_size=args.max_batch_size,
+    )
+    try:
+        remote = RemoteEmbedder(socket_path)
+        remote.encode("warm up")
+        for clients in [int(n) for n in args.clients.split(",")]:
+            before = remote.stats()
+            remote.close()  # An idle connection would count as a waiting client.
+            served = run_clients(lambda: remote.encode, clients, args.requests)
+            after = remote.stats()
+            batches = after["batches"] - before["batches"]
+            served["mean_batch"] = round(
+                (after["texts"] - before["texts"]) / max(batches, 1), 2
+            )
+            in_process = run_clients(lambda: local.encode, clients, args.requests)
+            print(
+                json.dumps(
+                    {
+                        "embedder": name,
+                        "clients": clients,
+                        "server": served,
+                        "in_process": in_process,
+                    }
+                )
+            )
+    finally:
+        process.terminate()
+        process.join(timeout=5)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Measures the cold-start import time of the free_ai modules.
+
+Each module is imported in a fresh interpreter, several times, and the
+median wall time of the interpreter with the import minus the median of a
+bare interpreter is reported. Exits with status 1 if a lightweight module
+exceeds the budget, so the script can guard against regressions in CI.
+
+Usage:
+    python benchmarks/bench_import.py [--runs N] [--budget-ms MS]
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+# Modules that must stay cheap to import, e.g. for worker processes and
+# CLI invocations that never touch the vector memory or the LLM.
+LIGHTWEIGHT_MODULES = [
+    "free_ai.agora",
+    "free_ai.tools",
+    "free_ai.agent",
+    "free_ai.runtime",
+]
+
+
+def median_startup(code: str, runs: int) -> float:
+    """Returns the median wall time in seconds of `python -c code`."""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], check=True)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument("--budget-ms", type=float, default=100.0)
+    args = parser.parse_args()
+
+    baseline = median_startup("pass", args.runs)
+    over_budget = []
+    for module in LIGHTWEIGHT_MODULES:
+        import_ms = (median_startup(f"import {module}", args.runs) - baseline) * 1000
+        print(
+            json.dumps(
+                {
+                    "benchmark": "import",
+                    "module": module,
+                    "import_ms": round(import_ms, 1),
+                    "budget_ms": args.budget_ms,
+                }
+            )
+        )
+        if import_ms > args.budget_ms:
+            over_budget.append(module)
+    if over_budget:
+        print(f"Import budget exceeded by: {', '.join(over_budget)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""Measures the per-operation cost of logging on the framework's hot paths.
+
+Runs `Agora` post/claim/reply cycles and `VectorMemory.add`/`query` (with
+the hashing embedder, so no model is needed) under several logging setups:
+
+- off: INFO records are disabled, so no record is created.
+- sync: a plain handler writes every record on the calling thread.
+- queued: `logs.configure` writes text records on a background thread.
+- queued-json: the same, as JSON lines.
+- queued-sampled: the same, keeping one in ten INFO records per logger.
+
+Records go to a temporary file. The modes are measured in interleaved
+rounds; the report is the median over rounds of the mean time per
+operation in microseconds, and its overhead relative to "off".
+
+Usage:
+    python benchmarks/bench_logging.py [--cycles N] [--adds N] [--queries N]
+        [--rounds N]
+"""
+
+import argparse
+import json
+import logging
+import os
+import shutil
+import statistics
+import tempfile
+import time
+
+from free_ai import logs
+from free_ai.agora import Agora
+from free_ai.memory import VectorMemory
+
+MODES = ["off", "sync", "queued", "queued-json", "queued-sampled"]
+
+
+def set_mode(mode: str, path: str):
+    """Configures the root logger for one benchmark mode."""
+    logs.shutdown()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+        handler.close()
+    if mode == "off":
+        root.setLevel(logging.WARNING)
+    elif mode == "sync":
+        handler = logging.FileHandler(path, encoding="utf-8")
+        handler.setFormatter(logs.StructuredFormatter(logs.TEXT_FORMAT))
+        root.addHandler(handler)
+        root.setLevel(logging.INFO)
+    else:
+        logs.configure(
+            path=path,
+            json_lines=mode == "queued-json",
+            sample_rates={"free_ai": 0.1} if mode == "queued-sampled" else None,
+        )
+
+
+def time_agora(cycles: int) -> float:
+    """Returns the mean microseconds of a post, claim and reply cycle."""
+    agora = Agora()
+    start = time.perf_counter()
+    for i in range(cycles):
+        message_id = agora.post_message("Boss", "Worker", {"task": i})
+        agora.claim_message(message_id, "Worker-1")
+        agora.post_reply(message_id, "Worker-1", {"done": i})
+    return (time.perf_counter() - start) * 1e6 / cycles
+
+
+def time_memory(memory: VectorMemory, adds: int, queries: int, offset: int):
+    """Returns the mean microseconds of `add` and of `query`."""
+    start = time.perf_counter()
+    for i in range(adds):
+        memory.add(f"note {offset + i} about logging overhead", {"source": "bench"})
+    add_us = (time.perf_counter() - start) * 1e6 / adds
+    start = time.perf_counter()
+    for i in range(queries):
+        memory.query(f"note {i} about logging", n_results=3)
+    return add_us, (time.perf_counter() - start) * 1e6 / queries
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--cycles", type=int, default=20000)
+    parser.add_argument("--adds", type=int, default=300)
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="free_ai_bench_logging_")
+    try:
+        set_mode("off", "")
+        memory = VectorMemory(
+            path=os.path.join(workdir, "db"), embedding_model="hashing"
+        )
+        # Warm up the collection and the embedder before measuring.
+        time_memory(memory, args.adds, 10, 0)
+        samples = {mode: {} for mode in MODES}
+        offset = args.adds
+        for _ in range(args.rounds):
+            for mode in MODES:
+                set_mode(mode, os.path.join(workdir, f"{mode}.log"))
+                agora_us = time_agora(args.cycles)
+                add_us, query_us = time_memory(memory, args.adds, args.queries, offset)
+                offset += args.adds
+                for metric, value in (
+                    ("agora_cycle_us", agora_us),
+                    ("memory_add_us", add_us),
+                    ("memory_query_us", query_us),
+                ):
+                    samples[mode].setdefault(metric, []).append(value)
+        logs.shutdown()
+        results = {
+            mode: {metric: statistics.median(values) for metric, values in row.items()}
+            for mode, row in samples.items()
+        }
+        for mode in MODES:
+            row = {"mode": mode}
+            for metric, value in results[mode].items():
+                row[metric] = round(value, 1)
+                row[f"{metric}.overhead"] = round(value - results["off"][metric], 1)
+            print(json.dumps(row))
+    finally:
+        logs.shutdown()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
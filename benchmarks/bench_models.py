@@ -0,0 +1,125 @@
+"""Compares the slotted models with the plain dicts they replace.
+
+Measures, for Agora messages and plan steps:
+
+- message_bytes: the memory held per message, measured with `tracemalloc` while
+  building a large batch, including the ID strings both forms hold.
+- build_us: the time to build one message.
+- parse_us: the time to decode a plan from the Oracle's JSON and validate
+  every step, with `json.loads` plus per-step checks against a dict
+  versus `models.parse_plan`.
+- dumps_us / size: the time and size of serializing a message batch with
+  `json.dumps(indent=2)` (as the Oracle prompt did) versus the minified
+  `models.dumps`.
+
+Usage:
+    python benchmarks/bench_models.py [--count N] [--repeat N]
+"""
+
+import argparse
+import json
+import time
+import tracemalloc
+
+from free_ai.models import VALID_ACTIONS, Message, dumps, parse_plan
+
+TOOLS = {"FileSystemTool": None, "SearchTool": None}
+
+
+def dict_message(i: int, content: dict) -> dict:
+    return {
+        "id": f"message-{i}",
+        "from_agent": "Boss",
+        "to_agent_role": "Worker",
+        "content": content,
+        "timestamp": float(i),
+        "claimed_by": None,
+        "reply": None,
+    }
+
+
+def model_message(i: int, content: dict) -> Message:
+    return Message(f"message-{i}", "Boss", "Worker", content, float(i))
+
+
+def validate_dict_plan(text: str) -> list:
+    """The dict-based parse and validation the engine used to do."""
+    plan = json.loads(text)["plan"]
+    for step in plan:
+        if not isinstance(step, dict) or step.get("action") not in VALID_ACTIONS:
+            raise ValueError("invalid step")
+        if step["action"] == "use_tool" and step.get("tool_name") not in TOOLS:
+            raise ValueError("unknown tool")
+    return plan
+
+
+def held_bytes(build, count: int) -> float:
+    """Returns the bytes allocated per object while building `count` of them."""
+    content = {"task": "summarize"}
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects = [build(i, content) for i in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del objects
+    return (after - before) / count
+
+
+def per_call_us(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) * 1e6 / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    content = {"task": "summarize"}
+    plan = {
+        "plan": [
+            {
+                "action": "use_tool",
+                "tool_name": "FileSystemTool",
+                "arguments": {"operation": "read", "path": f"notes/{i}.md"},
+            }
+            for i in range(8)
+        ]
+        + [{"action": "final_answer", "arguments": {"answer": "done"}}]
+    }
+    plan_text = json.dumps(plan)
+    batch = [dict_message(i, content) for i in range(50)]
+    model_batch = [model_message(i, content) for i in range(50)]
+
+    rows = [
+        {
+            "form": "dict",
+            "message_bytes": round(held_bytes(dict_message, args.count)),
+            "build_us": per_call_us(lambda: dict_message(1, content), args.repeat),
+            "parse_us": per_call_us(lambda: validate_dict_plan(plan_text), args.repeat),
+            "dumps_us": per_call_us(
+                lambda: json.dumps(batch, indent=2, default=str), args.repeat // 10
+            ),
+            "dumps_size": len(json.dumps(batch, indent=2, default=str)),
+        },
+        {
+            "form": "model",
+            "message_bytes": round(held_bytes(model_message, args.count)),
+            "build_us": per_call_us(lambda: model_message(1, content), args.repeat),
+            "parse_us": per_call_us(lambda: parse_plan(plan_text, TOOLS), args.repeat),
+            "dumps_us": per_call_us(lambda: dumps(model_batch), args.repeat // 10),
+            "dumps_size": len(dumps(model_batch)),
+        },
+    ]
+    for row in rows:
+        for key, value in row.items():
+            if key.endswith("_us"):
+                row[key] = round(value, 2)
+        print(json.dumps(row))
+
+
+if __name__ == "__main__":
+    main()
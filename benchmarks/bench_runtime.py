@@ -0,0 +1,93 @@
+"""Benchmarks `AgentRuntime` throughput as the number of agents grows.
+
+Every agent works through a fixed number of goals against a mock Oracle
+that answers after a simulated network latency with a short plan of cheap
+tool calls. Reports goals completed per minute for each agent count, so
+the effect of the worker pool and the global Oracle limit is visible.
+
+Usage:
+    python benchmarks/bench_runtime.py [--agents 1,2,4,8,16,32]
+        [--goals-per-agent N] [--latency SECONDS] [--max-oracle-calls N]
+"""
+
+import argparse
+import json
+import logging
+import time
+
+from free_ai.personality import PhilosophicalPersonality
+from free_ai.runtime import AgentRuntime
+
+
+class MockOracle:
+    """Answers every plan request after `latency` seconds."""
+
+    def __init__(self, latency: float, steps: int):
+        self.latency = latency
+        self.steps = steps
+
+    def generate_plan(self, goal, history, context=""):
+        time.sleep(self.latency)
+        return [
+            {"action": "use_tool", "tool_name": "Echo", "arguments": {"text": goal}}
+        ] * self.steps
+
+    def generate_code(self, prompt, context):
+        time.sleep(self.latency)
+        return ""
+
+
+class MockMemory:
+    def query(self, query_text, n_results=3):
+        return []
+
+
+def echo(text):
+    return {"status": "success", "content": text}
+
+
+def run(agents: int, args) -> dict:
+    runtime = AgentRuntime(
+        memory=MockMemory(),
+        oracle=MockOracle(args.latency, args.steps),
+        max_workers=args.max_workers,
+        max_oracle_calls=args.max_oracle_calls,
+    )
+    for i in range(agents):
+        runtime.create_agent(
+            f"Agent-{i}",
+            "Worker",
+            PhilosophicalPersonality(),
+            goals=[f"goal {i}.{n}" for n in range(args.goals_per_agent)],
+            external_tools={"Echo": echo},
+        )
+    start = time.perf_counter()
+    results = runtime.run_sync()
+    elapsed = time.perf_counter() - start
+    finished = sum(1 for r in results if r["status"] == "finished")
+    return {
+        "benchmark": "runtime",
+        "agents": agents,
+        "goals": finished,
+        "seconds": round(elapsed, 3),
+        "goals_per_min": round(finished / elapsed * 60),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--agents", default="1,2,4,8,16,32")
+    parser.add_argument("--goals-per-agent", type=int, default=5)
+    parser.add_argument("--steps", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.1)
+    parser.add_argument("--max-workers", type=int, default=16)
+    parser.add_argument("--max-oracle-calls", type=int, default=8)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    for agents in (int(n) for n in args.agents.split(",")):
+        print(json.dumps(run(agents, args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,345 @@
+"""Runs the offline benchmark suite and compares it against a baseline.
+
+Covers the hot paths of the framework without network access or model
+downloads: `VectorMemory.add`/`query` (with a deterministic stub embedder)
+at several collection sizes, filtered queries (by source and by time
+range), `Agora` post/claim/reply at scale, `FileSystemTool` reads on a
+large file, and full `Director` planning loops against a mock Oracle.
+
+Every metric is a time in milliseconds, so lower is better. Results are
+printed as JSON lines and can be written to a file. With `--baseline`,
+each metric is compared against the stored value and the script exits
+with status 1 if any metric is slower by more than `--tolerance`.
+
+Usage:
+    python benchmarks/run.py [--quick] [--only memory,agora,tools,director]
+        [--output results.json] [--baseline benchmarks/baseline.json]
+        [--tolerance 0.25] [--min-delta-ms 0.1] [--update-baseline]
+"""
+
+import argparse
+import json
+import logging
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import zlib
+
+import numpy as np
+
+from free_ai.action_executor import ActionExecutor
+from free_ai.agent import Director
+from free_ai.agora import Agora
+from free_ai.memory import VectorMemory
+from free_ai.personality import PhilosophicalPersonality
+from free_ai.tools import FileSystemTool
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+
+class StubEmbedder:
+    """Deterministic pseudo-embeddings: a seeded unit vector per text."""
+
+    def __init__(self, dimensions: int = 384):
+        self.dimensions = dimensions
+
+    def encode(self, text: str) -> np.ndarray:
+        rng = np.random.default_rng(zlib.crc32(text.encode("utf-8")))
+        vector = rng.standard_normal(self.dimensions).astype(np.float32)
+        return vector / np.linalg.norm(vector)
+
+
+class MockOracle:
+    """Returns a fixed plan of file reads without any network access."""
+
+    def __init__(self, plan):
+        self.plan = plan
+
+    def generate_plan(self, goal, history, context=""):
+        return [dict(step) for step in self.plan]
+
+    def generate_code(self, prompt, context):
+        return ""
+
+
+def timed(fn, repeat: int) -> list:
+    """Calls `fn(i)` `repeat` times and returns each duration in ms."""
+    durations = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        fn(i)
+        durations.append((time.perf_counter() - start) * 1000)
+    return durations
+
+
+def summarize(prefix: str, durations: list) -> dict:
+    """Reduces a list of durations to median and 95th percentile metrics."""
+    ordered = sorted(durations)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    return {
+        f"{prefix}.p50_ms": round(statistics.median(ordered), 4),
+        f"{prefix}.p95_ms": round(p95, 4),
+    }
+
+
+def bench_memory(workdir: str, sizes: list, ops: int) -> dict:
+    """Times single adds and (filtered) queries against collections of each size."""
+    metrics = {}
+    embedder = StubEmbedder()
+    for size in sizes:
+        path = os.path.join(workdir, f"memory_{size}")
+        memory = VectorMemory(path=path, embedding_model=embedder)
+        batch = 5000
+        for start in range(0, size, batch):
+            stop = min(start + batch, size)
+            texts = [f"document {i} about topic {i % 97}" for i in range(start, stop)]
+            memory.collection.add(
+                ids=[str(i) for i in range(start, stop)],
+                documents=texts,
+                embeddings=[embedder.encode(text).tolist() for text in texts],
+                metadatas=[
+                    {"source": f"source{i % 20}", "timestamp": float(i)}
+                    for i in range(start, stop)
+                ],
+            )
+        metrics.update(
+            summarize(
+                f"memory.add.{size}",
+                timed(lambda i: memory.add(f"new fact {i}", {"source": "bench"}), ops),
+            )
+        )
+        metrics.update(
+            summarize(
+                f"memory.query.{size}",
+                timed(lambda i: memory.query(f"topic {i % 97}"), ops),
+            )
+        )
+        # Each filter matches 5% of the collection. The first filtered query
+        # builds the metadata index, which is timed separately.
+        (build,) = timed(lambda i: memory.query("topic 0", source="source0"), 1)
+        metrics[f"memory.index_build.{size}.ms"] = round(build, 4)
+        metrics.update(
+            summarize(
+                f"memory.query.source.{size}",
+                timed(
+                    lambda i: memory.query(f"topic {i % 97}", source=f"source{i % 20}"),
+                    ops,
+                ),
+            )
+        )
+        metrics.update(
+            summarize(
+                f"memory.query.recent.{size}",
+                timed(
+                    lambda i: memory.query(f"topic {i % 97}", since=size * 0.95),
+                    ops,
+                ),
+            )
+        )
+        shutil.rmtree(path, ignore_errors=True)
+    return metrics
+
+
+def bench_agora(workdir: str, messages: int) -> dict:
+    """Times posting, claiming and replying to many messages."""
+    metrics = {}
+    for archived in (False, True):
+        archive = os.path.join(workdir, "agora.jsonl") if archived else None
+        agora = Agora(archive_path=archive)
+        label = "archived" if archived else "memory"
+        ids = []
+        post = timed(
+            lambda i: ids.append(agora.post_message("Boss", "Worker", {"task": i})),
+            messages,
+        )
+        claim = timed(lambda i: agora.claim_message(ids[i], "Worker-1"), messages)
+        reply = timed(
+            lambda i: agora.post_reply(ids[i], "Worker-1", {"done": i}), messages
+        )
+        for operation, durations in (
+            ("post", post),
+            ("claim", claim),
+            ("reply", reply),
+        ):
+            metrics[f"agora.{label}.{operation}.mean_ms"] = round(
+                statistics.fmean(durations), 4
+            )
+        agora.close()
+    return metrics
+
+
+def bench_tools(workdir: str, file_mb: int, ops: int) -> dict:
+    """Times reads of a large file through `FileSystemTool`."""
+    path = os.path.join(workdir, "large.txt")
+    line = "x" * 79 + "\n"
+    lines = file_mb * 1024 * 1024 // len(line)
+    with open(path, "w") as f:
+        for _ in range(lines // 1024):
+            f.write(line * 1024)
+    tool = FileSystemTool()
+    metrics = {}
+    metrics.update(
+        summarize(
+            f"tools.read_range.lines.{file_mb}mb",
+            timed(
+                lambda i: tool.use(
+                    operation="read_range",
+                    filepath=path,
+                    start_line=lines // 2 + i,
+                    end_line=lines // 2 + i + 100,
+                ),
+                ops,
+            ),
+        )
+    )
+    metrics.update(
+        summarize(
+            f"tools.tail.{file_mb}mb",
+            timed(lambda i: tool.use(operation="tail", filepath=path, lines=50), ops),
+        )
+    )
+    # Whole-file reads are only cached below the result cap, so the cached
+    # read uses its own file under `max_result_bytes`.
+    cached_path = os.path.join(workdir, "cached.txt")
+    cached_bytes = 512 * 1024
+    content = line * (cached_bytes // len(line) + 1)
+    with open(cached_path, "w") as f:
+        f.write(content[:cached_bytes])
+    first = tool.use(operation="read_file", filepath=cached_path)
+    assert not first["truncated"], "The cached-read file must fit in one result."
+    metrics.update(
+        summarize(
+            "tools.read_file.cached.512kb",
+            timed(lambda i: tool.use(operation="read_file", filepath=cached_path), ops),
+        )
+    )
+    tool.close()
+    return metrics
+
+
+def bench_director(workdir: str, goals: int) -> dict:
+    """Times full plan-and-execute loops of a Director."""
+    files = []
+    for i in range(4):
+        files.append(os.path.join(workdir, f"note_{i}.txt"))
+        with open(files[-1], "w") as f:
+            f.write(f"note {i}\n" * 100)
+    plan = [
+        {
+            "action": "use_tool",
+            "tool_name": "FileSystemTool",
+            "arguments": {"operation": "read_file", "filepath": path},
+        }
+        for path in files
+    ]
+    memory = VectorMemory(
+        path=os.path.join(workdir, "director_memory"), embedding_model=StubEmbedder()
+    )
+    for i in range(100):
+        memory.add(f"background fact {i}", {"source": "bench"})
+    director = Director(
+        name="Bench",
+        role="Worker",
+        personality=PhilosophicalPersonality(),
+        external_tools={},
+        shared_memory=memory,
+        oracle=MockOracle(plan),
+    )
+    executor = ActionExecutor(director)
+
+    def run_goal(i):
+        director.start_goal()
+        history = []
+        while executor.step(f"goal {i}", history)["action"] not in (
+            "finish",
+            "error",
+        ):
+            pass
+
+    metrics = summarize("director.goal", timed(run_goal, goals))
+    executor.close()
+    return metrics
+
+
+def compare(
+    results: dict, baseline: dict, tolerance: float, min_delta_ms: float
+) -> list:
+    """Returns the metrics that regressed beyond the tolerance.
+
+    Differences smaller than `min_delta_ms` are ignored, so sub-millisecond
+    metrics do not fail on timer noise.
+    """
+    regressions = []
+    for name, value in sorted(results.items()):
+        reference = baseline.get(name)
+        if reference is None or reference <= 0:
+            continue
+        ratio = value / reference
+        if ratio > 1 + tolerance and value - reference >= min_delta_ms:
+            regressions.append(
+                {"metric": name, "value": value, "baseline": reference, "ratio": ratio}
+            )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--quick", action="store_true", help="Use smaller sizes.")
+    parser.add_argument("--only", default="memory,agora,tools,director")
+    parser.add_argument("--output")
+    parser.add_argument("--baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--min-delta-ms", type=float, default=0.1)
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    suites = set(args.only.split(","))
+    sizes = [1000, 10000] if args.quick else [1000, 10000, 100000]
+    workdir = tempfile.mkdtemp(prefix="free_ai_bench_")
+    results = {}
+    try:
+        if "memory" in suites:
+            results.update(bench_memory(workdir, sizes, ops=50 if args.quick else 200))
+        if "agora" in suites:
+            results.update(bench_agora(workdir, 2000 if args.quick else 10000))
+        if "tools" in suites:
+            results.update(bench_tools(workdir, 16 if args.quick else 64, ops=50))
+        if "director" in suites:
+            results.update(bench_director(workdir, 20 if args.quick else 100))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    for name, value in sorted(results.items()):
+        print(json.dumps({"metric": name, "value": value}))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    baseline_path = args.baseline or DEFAULT_BASELINE
+    if args.update_baseline:
+        baseline = {}
+        if os.path.exists(baseline_path):
+            with open(baseline_path) as f:
+                baseline = json.load(f)
+        baseline.update(results)
+        with open(baseline_path, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Baseline written to {baseline_path}", file=sys.stderr)
+    elif args.baseline:
+        with open(baseline_path) as f:
+            regressions = compare(
+                results, json.load(f), args.tolerance, args.min_delta_ms
+            )
+        for regression in regressions:
+            print(json.dumps({"regression": regression}), file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -8,16 +8,19 @@ gracefully handle limitations, such as a missing API key.
 
 import logging
 import shutil
+from src.free_ai.action_executor import ActionExecutor
 from src.free_ai.agent import Director
+from src.free_ai.agora import Agora
 from src.free_ai.personality import PhilosophicalPersonality
+from src.free_ai.history import HistoryStore
 from src.free_ai.memory import VectorMemory
+from src.free_ai import logs, tracing
 
 # --- Logging Configuration ---
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - [%(name)s] - %(message)s",
-    datefmt="%Y-%m-%d %H:%M:%S",
-)
+# Records are written by a background thread. Set FREE_AI_LOG_JSON=1 for
+# JSON lines, FREE_AI_LOG_FILE=<path> to write to a file, and e.g.
+# FREE_AI_LOG_SAMPLE=src.free_ai.memory=0.1 to keep a tenth of memory logs.
+logs.configure_from_env()
 logger = logging.getLogger("ExecutorBody")
 
 
@@ -28,13 +31,17 @@ def main():
     This function orchestrates a complete agent lifecycle:
     1.  Sets up a clean environment by clearing any previous memory.
     2.  Instantiates the agent (`Director`) with a personality and memory.
-    3.  Defines a complex, high-level goal for the agent to solve.
-    4.  Enters a loop where the agent determines and attempts to execute
-        the next action in its plan.
+    3.  Resumes the goal of an interrupted run from the checkpoint, or
+        defines a complex, high-level goal for the agent to solve.
+    4.  Enters a loop where the agent determines the next action in its
+        plan and the `ActionExecutor` carries it out (running independent
+        tool calls concurrently).
     5.  The loop terminates if the agent finishes, encounters an error
         (like a missing API key), or exceeds a maximum number of steps.
     """
     logger.info("--- Project Sentience: The ExecutorBody is awakening... ---")
+    # Set FREE_AI_TRACE=trace.json to record a Chrome trace of the run.
+    tracing.enable_from_env()
 
     # Clean up memory from any previous runs to ensure a clean slate.
     db_path = "./collective_memory_db"
@@ -49,24 +56,44 @@ def main():
         personality=personality,
         external_tools={},
         shared_memory=shared_memory,
+        # Progress is checkpointed after every step and cleared when the goal
+        # ends, so a run that dies mid-goal picks up where it left off.
+        checkpoint_path="./director_checkpoint.ckpt",
     )
-    history = []
-
-    # 2. Define the high-level goal for the Sentience Challenge.
-    goal = "My `FileSystemTool` is primitive. I need to upgrade it with a `list_recursive` function that can list all files in a directory and its subdirectories. I must research how to do this, generate the new code, and perform a self-upgrade."
-    logger.info(f"BODY: Received goal: {goal}")
-    history.append({"role": "system", "content": f"The goal is: {goal}"})
+    executor = ActionExecutor(director, agora=Agora())
+    # Recent events stay in memory; older events and large results spill to disk.
+    history = HistoryStore()
+
+    # 2. Resume an interrupted goal, or define the high-level goal for the
+    # Sentience Challenge.
+    resumed = director.restore()
+    if resumed is not None:
+        goal, events = resumed
+        logger.info(f"BODY: Resuming goal: {goal}")
+        for event in events:
+            history.append(event)
+    else:
+        goal = "My `FileSystemTool` is primitive. I need to upgrade it with a `list_recursive` function that can list all files in a directory and its subdirectories. I must research how to do this, generate the new code, and perform a self-upgrade."
+        logger.info(f"BODY: Received goal: {goal}")
+        history.append({"role": "system", "content": f"The goal is: {goal}"})
 
     # 3. The Body enters the main loop, driven by the Director's decisions.
     for i in range(10):  # Safety break
-        # a. Get the next intended action from the Director.
-        action = director.determine_next_action(goal, history)
+        # a. The Director proposes the next action and the Body executes it.
+        # Non-terminal actions are recorded in the history by the executor.
+        action = executor.step(goal, history)
 
         action_type = action.get("action")
-        logger.info(f"Director proposes action: {action_type}")
+        logger.info(f"Director proposed action: {action_type}")
+
+        # b. The Body reacts to the outcome.
+        if action_type == "final_answer":
+            # The answer is a top-level key or the step's arguments.
+            answer = action.get("answer", action.get("arguments"))
+            logger.info(f"Director has given its final answer: {answer}")
+            break
 
-        # b. The Body executes the action.
-        if action_type == "finish":
+        elif action_type == "finish":
             logger.info(
                 f"Director has finished its plan. Reason: {action.get('reason')}"
             )
@@ -90,14 +117,14 @@ def main():
             print("=" * 50 + "\n")
             break
 
-        # In this test, we don't expect any other actions to be successfully proposed
-        # because the Oracle will fail first.
         else:
-            logger.error(
-                f"Director proposed an unexpected action type: '{action_type}'. This may indicate a flaw in the Oracle's error handling."
-            )
-            break
+            logger.info(f"Result: {history[-1]['result']}")
 
+    # However the loop ended, the goal is over; only a crash leaves the
+    # checkpoint behind to be resumed.
+    director.end_goal()
+    executor.close()
+    history.close()
     logger.info("--- Project Sentience: The simulation has ended. ---")
 
 
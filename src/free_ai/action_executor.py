@@ -0,0 +1,309 @@
+import logging
+import os
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, List, Optional, Tuple
+
+from .agora import Agora
+from .tool_executor import ToolExecutor, call_tool
+from .tracing import span
+
+logger = logging.getLogger(__name__)
+
+# Actions after which a goal is over.
+TERMINAL_ACTIONS = ("finish", "final_answer", "error")
+
+# Tool operations that only read the paths they are given.
+_READ_OPERATIONS = {
+    "read_file",
+    "read_many",
+    "read_range",
+    "read_chunks",
+    "tail",
+    "list_recursive",
+    "search",
+}
+# Tool operations that modify the paths they are given.
+_WRITE_OPERATIONS = {"write_file", "modify_file", "write_many", "flush"}
+# Tools without side effects on the agent's environment.
+DEFAULT_PURE_TOOLS = frozenset({"Oracle.generate_code"})
+
+
+class ActionExecutor:
+    """Carries out the actions a `Director` proposes.
+
+    Every action type accepted by the `CognitiveEngine` is dispatched:
+    tools are called (optionally in a `ToolExecutor`'s worker processes),
+    tasks are delegated through the `Agora`, replies are awaited without
+    blocking, and the personality can express itself.
+
+    `step` also looks ahead in the plan: a run of consecutive `use_tool`
+    steps that do not conflict is executed concurrently on a thread pool.
+    Two steps conflict if one writes a path the other reads or writes;
+    tools whose effects are unknown (e.g. learned skills) always run on
+    their own. Results are recorded in the history in plan order, so the
+    outcome is the same as running the steps one after another.
+
+    When a step returns an error, the Director is told so its plan can be
+    repaired before the next step; in a concurrent batch, the first failed
+    step in plan order is reported.
+
+    If the Director has a checkpoint path, it is checkpointed after every
+    step, so an interrupted goal can be resumed with `Director.restore`;
+    the checkpoint is deleted once a terminal action ends the goal.
+
+    Attributes:
+        director (Director): The agent whose actions are executed.
+        agora (Optional[Agora]): The message board for delegation.
+        tool_executor (Optional[ToolExecutor]): Runs tool calls in worker
+            processes if given; otherwise tools run in this process.
+        max_parallel (int): The most tool calls run at once.
+        reply_timeout (float): How long a wait that is the only step left
+            in the plan blocks for its reply before it is re-queued.
+        pure_tools (frozenset): Tools that never conflict with other steps.
+    """
+
+    def __init__(
+        self,
+        director,
+        agora: Optional[Agora] = None,
+        tool_executor: Optional[ToolExecutor] = None,
+        max_parallel: int = 4,
+        reply_timeout: float = 1.0,
+        pure_tools: Iterable[str] = DEFAULT_PURE_TOOLS,
+    ):
+        """Initializes the executor.
+
+        Args:
+            director (Director): The agent whose actions are executed.
+            agora (Optional[Agora]): The message board used by
+                `delegate_task` and `wait_for_reply`.
+            tool_executor (Optional[ToolExecutor]): A process pool to run
+                tool calls in. Tools it does not know run in this process.
+            max_parallel (int): The maximum number of concurrent tool calls.
+            reply_timeout (float): The longest a wait blocks for its reply,
+                in seconds, when nothing else can be done.
+            pure_tools (Iterable[str]): Names of tools without side effects,
+                which may run concurrently with any other tool step.
+        """
+        self.director = director
+        self.agora = agora
+        self.tool_executor = tool_executor
+        self.max_parallel = max_parallel
+        self.reply_timeout = reply_timeout
+        self.pure_tools = frozenset(pure_tools)
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._last_message_id: Optional[str] = None
+
+    def close(self):
+        """Shuts down the thread pool; it is recreated if needed again."""
+        pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True)
+
+    def step(self, goal, history: list) -> dict:
+        """Takes the next action (or batch of tool calls) and executes it.
+
+        Args:
+            goal: The goal the Director is working on.
+            history (list): The goal's history; results are appended to it.
+
+        Returns:
+            dict: The last action taken. Terminal actions ("finish",
+                "final_answer", "error") are returned without being recorded.
+        """
+        action = self.director.determine_next_action(goal, history)
+        if action.get("action") in TERMINAL_ACTIONS:
+            self.director.end_goal()
+            return action
+        batch = [action]
+        if action.get("action") == "use_tool":
+            batch += self._take_independent_tool_steps(action, goal, history)
+        if len(batch) == 1:
+            result = self.execute(action)
+            history.append({"role": "body", "action": action, "result": result})
+            self._report_failures(goal, history, [(action, result)])
+            self.director.checkpoint(goal, history)
+            return action
+
+        logger.info(f"Running {len(batch)} independent tool calls concurrently.")
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(
+                max_workers=self.max_parallel, thread_name_prefix="ActionExecutor"
+            )
+        futures = [self._pool.submit(self.execute, step) for step in batch]
+        outcomes = [(step, future.result()) for step, future in zip(batch, futures)]
+        for step, result in outcomes:
+            history.append({"role": "body", "action": step, "result": result})
+        self._report_failures(goal, history, outcomes)
+        self.director.checkpoint(goal, history)
+        return batch[-1]
+
+    def _report_failures(
+        self, goal, history: list, outcomes: List[Tuple[dict, object]]
+    ):
+        """Reports the first failed step of `outcomes` to the Director."""
+        for step, result in outcomes:
+            if isinstance(result, dict) and result.get("status") == "error":
+                error = result.get("message") or result.get("error") or "Unknown error."
+                self.director.report_failure(goal, history, step, str(error))
+                return
+
+    def execute(self, action: dict):
+        """Executes a single action and returns its result.
+
+        Args:
+            action (dict): An action from the plan.
+
+        Returns:
+            The action's result, usually a status dictionary.
+        """
+        action_type = action.get("action")
+        arguments = action.get("arguments") or {}
+        try:
+            if action_type == "use_tool":
+                return self._use_tool(action.get("tool_name"), arguments)
+            if action_type == "express_personality":
+                context = arguments.get("context")
+                return {
+                    "status": "success",
+                    "content": self.director.personality.express(context),
+                }
+            if action_type == "delegate_task":
+                return self._delegate_task(arguments)
+            if action_type == "wait_for_reply":
+                return self._wait_for_reply(action, arguments)
+        except Exception as e:
+            logger.error(f"Action '{action_type}' failed: {e}", exc_info=True)
+            return {"status": "error", "message": f"{type(e).__name__}: {e}"}
+        return {"status": "error", "message": f"Unknown action '{action_type}'."}
+
+    def _use_tool(self, tool_name: str, arguments: dict):
+        """Calls a tool, in a worker process if a `ToolExecutor` is set."""
+        tool = self.director.tools.get(tool_name)
+        if tool is None:
+            return {"status": "error", "message": f"Unknown tool '{tool_name}'."}
+        logger.info(f"Executing tool '{tool_name}'.")
+        with span("tool.call", tool=tool_name, operation=arguments.get("operation")):
+            if self.tool_executor is not None and tool_name in self.tool_executor:
+                return self.tool_executor.execute(tool_name, arguments)
+            return call_tool(tool, arguments)
+
+    def _delegate_task(self, arguments: dict) -> dict:
+        """Posts a task to the Agora for another role."""
+        if self.agora is None:
+            return {"status": "error", "message": "No Agora is available."}
+        message_id = self.agora.post_message(
+            self.director.name,
+            arguments.get("to_role") or arguments.get("to_agent_role", ""),
+            arguments.get("task", arguments.get("content", {})),
+        )
+        self._last_message_id = message_id
+        return {"status": "success", "message_id": message_id}
+
+    def _wait_for_reply(self, action: dict, arguments: dict) -> dict:
+        """Checks for a reply; if there is none, re-queues the wait.
+
+        The wait goes to the end of the plan, so the agent keeps working on
+        the rest of its plan instead of blocking. Only when the wait is the
+        last step left does it block, for up to `reply_timeout` seconds.
+        """
+        if self.agora is None:
+            return {"status": "error", "message": "No Agora is available."}
+        message_id = arguments.get("message_id") or self._last_message_id
+        if message_id is None:
+            return {"status": "error", "message": "No message to wait for."}
+        engine = self.director.cognitive_engine
+        if engine.peek_next_action() is None:
+            reply = self.agora.wait_for_reply(message_id, self.reply_timeout)
+        else:
+            reply = self.agora.get_reply_for_message(message_id)
+        if reply is not None:
+            return {"status": "success", "message_id": message_id, "reply": reply}
+        engine.requeue(dict(action, arguments=dict(arguments, message_id=message_id)))
+        return {"status": "pending", "message_id": message_id}
+
+    def _take_independent_tool_steps(self, first: dict, goal, history) -> List[dict]:
+        """Pops the following tool steps that can run alongside `first`."""
+        effects = _tool_effects(first, self.pure_tools)
+        if effects is None:
+            return []
+        reads, writes = set(effects[0]), set(effects[1])
+        engine = self.director.cognitive_engine
+        taken = []
+        while len(taken) + 1 < self.max_parallel:
+            candidate = engine.peek_next_action()
+            if candidate is None or candidate.get("action") != "use_tool":
+                break
+            if candidate.get("tool_name") not in self.director.tools:
+                break
+            candidate_effects = _tool_effects(candidate, self.pure_tools)
+            if candidate_effects is None:
+                break
+            candidate_reads, candidate_writes = candidate_effects
+            if _overlaps(candidate_writes, reads | writes) or _overlaps(
+                candidate_reads, writes
+            ):
+                break
+            reads.update(candidate_reads)
+            writes.update(candidate_writes)
+            taken.append(self.director.determine_next_action(goal, history))
+        return taken
+
+
+def _tool_effects(
+    action: dict, pure_tools: frozenset
+) -> Optional[Tuple[List[str], List[str]]]:
+    """Returns the absolute paths a tool step reads and writes.
+
+    Returns None if the step's effects are unknown, in which case it must
+    not run concurrently with anything.
+    """
+    tool_name = action.get("tool_name")
+    if tool_name in pure_tools:
+        return [], []
+    arguments = action.get("arguments") or {}
+    operation = arguments.get("operation")
+    if operation in _READ_OPERATIONS:
+        reads = True
+    elif operation in _WRITE_OPERATIONS:
+        reads = False
+    else:
+        return None
+    paths = []
+    for key in ("filepath", "path", "root"):
+        if isinstance(arguments.get(key), str):
+            paths.append(arguments[key])
+    files = arguments.get("filepaths") or arguments.get("files") or []
+    if isinstance(files, dict):
+        files = list(files)
+    for f in files:
+        if isinstance(f, Mapping):
+            # write_many also takes [{"filepath": ..., "content": ...}].
+            f = f.get("filepath")
+        elif isinstance(f, (list, tuple)) and f:
+            f = f[0]
+        if not isinstance(f, str):
+            return None
+        paths.append(f)
+    if not paths:
+        if operation == "search" or (operation == "flush" and not reads):
+            # Searches read the whole tree; a bare flush writes every file.
+            paths = ["."]
+        else:
+            return None
+    paths = [os.path.abspath(path) for path in paths]
+    return (paths, []) if reads else ([], paths)
+
+
+def _overlaps(paths, others) -> bool:
+    """Checks whether any path equals, contains or lies within another."""
+    for path in paths:
+        for other in others:
+            if (
+                path == other
+                or path.startswith(other.rstrip(os.sep) + os.sep)
+                or other.startswith(path.rstrip(os.sep) + os.sep)
+            ):
+                return True
+    return False
@@ -1,10 +1,14 @@
 import logging
+from typing import Iterable, Optional, Tuple
+from .checkpoint import CheckpointLog
 from .cognitive_engine import CognitiveEngine
 from .learning_annex import LearningAnnex
 from .personality import Personality
-from .tools import FileSystemTool
+from .tools import FileSystemTool, SearchTool
 from .oracle import SentientOracle
 from .memory import VectorMemory
+from .sandbox import SkillSandbox
+from .skill_registry import SkillRegistry
 
 logger = logging.getLogger(__name__)
 
@@ -25,6 +29,10 @@ class Director:
         cognitive_engine (CognitiveEngine): The engine for planning and thinking.
         learning_annex (LearningAnnex): The module for acquiring new skills.
         tools (dict): A dictionary of available tools for the agent to use.
+        checkpoint_log (Optional[CheckpointLog]): Where progress on the
+            current goal is recorded, if checkpointing is enabled.
+        message_id (Optional[str]): The Agora message the current goal
+            answers, if any; it is recorded in checkpoints.
     """
 
     def __init__(
@@ -34,6 +42,11 @@ class Director:
         personality: Personality,
         external_tools: dict,
         shared_memory: VectorMemory,
+        skill_registry: Optional[SkillRegistry] = None,
+        skill_sandbox: Optional[SkillSandbox] = None,
+        oracle: Optional[SentientOracle] = None,
+        checkpoint_path: Optional[str] = None,
+        memory_namespaces: Optional[Iterable[Optional[str]]] = None,
     ):
         """Initializes the Director and all its sub-components.
 
@@ -44,21 +57,51 @@ class Director:
             external_tools (dict): A dictionary of tools provided from outside
                 the agent's own built-in tools.
             shared_memory (VectorMemory): An instance of the shared vector memory.
+            skill_registry (Optional[SkillRegistry]): A registry of previously
+                learned skills. Its tools are exposed immediately as lazy
+                proxies, and newly learned skills are persisted to it.
+            skill_sandbox (Optional[SkillSandbox]): An isolated process pool
+                in which learned skills are run instead of in-process. Skills
+                in the sandbox may call this agent's tools.
+            oracle (Optional[SentientOracle]): The Oracle to reason with,
+                e.g. one client shared by a society of agents. If None, the
+                Director creates its own.
+            checkpoint_path (Optional[str]): A file to checkpoint progress
+                to, so that `restore` can resume an interrupted goal.
+            memory_namespaces (Optional[Iterable[Optional[str]]]): The
+                memory namespaces to retrieve context from, e.g.
+                `[None, role]` for the shared namespace and the role's own.
+                Defaults to the shared namespace only.
         """
         self.name = name
         self.role = role
         self.personality = personality
-        self.oracle = SentientOracle()
+        self.oracle = oracle if oracle is not None else SentientOracle()
         self.memory = shared_memory
-        self.cognitive_engine = CognitiveEngine(personality, self.oracle, self.memory)
-        self.learning_annex = LearningAnnex()
+        self.cognitive_engine = CognitiveEngine(
+            personality, self.oracle, self.memory, memory_namespaces
+        )
+        self.learning_annex = LearningAnnex(
+            registry=skill_registry, sandbox=skill_sandbox
+        )
 
         # The Director maintains a unified list of all available tools.
         self.tools = {
             "FileSystemTool": FileSystemTool(),
+            "SearchTool": SearchTool(),
             "Oracle.generate_code": self.oracle.generate_code,
         }
+        if skill_registry is not None:
+            self.tools.update(skill_registry.lazy_tools(sandbox=skill_sandbox))
         self.tools.update(external_tools)
+        if skill_sandbox is not None and skill_sandbox.tools is None:
+            skill_sandbox.tools = self.tools
+        # Tools added later are learned and are recorded in checkpoints.
+        self._initial_tools = frozenset(self.tools)
+        self.checkpoint_log = (
+            CheckpointLog(checkpoint_path) if checkpoint_path is not None else None
+        )
+        self.message_id: Optional[str] = None
 
         logger.info("Director is awake. Purpose: To grow and create.")
 
@@ -81,6 +124,109 @@ class Director:
         """
         return self.cognitive_engine.think(goal, history, self.tools)
 
+    def report_failure(self, goal, history: list, action: dict, error: str) -> bool:
+        """Lets the cognitive engine repair the plan after a failed action.
+
+        Args:
+            goal: The goal being worked on.
+            history (list): The goal's history, including the failed action.
+            action (dict): The action that failed.
+            error (str): The error it reported.
+
+        Returns:
+            bool: True if the remaining plan was repaired.
+        """
+        return self.cognitive_engine.replan(goal, history, action, error, self.tools)
+
+    def start_goal(
+        self, prepared: Optional[dict] = None, message_id: Optional[str] = None
+    ):
+        """Discards the current plan so the next action starts a new one.
+
+        Args:
+            prepared (Optional[dict]): The result of `prepare` for the new
+                goal, whose context (and plan) are then used.
+            message_id (Optional[str]): The Agora message the goal answers.
+        """
+        self.message_id = message_id
+        self.cognitive_engine.reset()
+        if prepared is not None:
+            self.cognitive_engine.use_prepared(prepared)
+
+    def end_goal(self):
+        """Marks the current goal as over, so `restore` will not resume it.
+
+        Deletes the checkpoint, if the Director has one.
+        """
+        self.message_id = None
+        if self.checkpoint_log is not None:
+            self.checkpoint_log.clear()
+
+    def prepare(self, goal, history: list, with_plan: bool = False) -> dict:
+        """Retrieves context, and optionally a plan, for a goal ahead of time.
+
+        Args:
+            goal: The goal to prepare for.
+            history (list): The history the goal will start with.
+            with_plan (bool): Whether to also generate the plan.
+
+        Returns:
+            dict: The prepared state, for `start_goal`.
+        """
+        return self.cognitive_engine.prepare(goal, history, with_plan)
+
+    def checkpoint(self, goal, history: list):
+        """Records the goal, remaining plan, history and learned tools.
+
+        Only the changes since the previous checkpoint are appended, so this
+        is cheap enough to call after every step. Does nothing if the
+        Director has no checkpoint path.
+
+        Args:
+            goal: The goal being worked on.
+            history (list): The goal's history so far.
+        """
+        if self.checkpoint_log is None:
+            return
+        plan, plan_generated = self.cognitive_engine.plan_state()
+        learned = sorted(name for name in self.tools if name not in self._initial_tools)
+        self.checkpoint_log.write(
+            goal, plan, plan_generated, history, learned, self.message_id
+        )
+
+    def restore(self) -> Optional[Tuple[object, list]]:
+        """Resumes the goal recorded in the checkpoint, if there is one.
+
+        The remaining plan is loaded into the cognitive engine, so the next
+        action is the one that followed the last checkpoint and no new plan
+        is requested from the Oracle. Learned tools are re-attached from the
+        skill registry where possible, and `message_id` is restored.
+
+        Returns:
+            Optional[Tuple[object, list]]: The goal and its history, or None
+                if there is nothing to resume.
+        """
+        if self.checkpoint_log is None:
+            return None
+        state = self.checkpoint_log.read()
+        if state is None:
+            return None
+        self.cognitive_engine.load_plan(state["plan"], state["plan_generated"])
+        self.message_id = state.get("message_id")
+        registry = self.learning_annex.registry
+        missing = [name for name in state["tools"] if name not in self.tools]
+        lazy = registry.lazy_tools(self.learning_annex.sandbox) if registry else {}
+        for name in missing:
+            if name in lazy:
+                self.tools[name] = lazy[name]
+            else:
+                logger.warning(f"Learned tool '{name}' could not be restored.")
+        logger.info(
+            f"Resumed goal with {len(state['history'])} events and "
+            f"{len(state['plan'])} planned steps from '{self.checkpoint_log.path}'."
+        )
+        return state["goal"], state["history"]
+
     def add_new_tool(self, tool_name: str, tool_instance):
         """Dynamically adds a new tool to the agent's capabilities.
 
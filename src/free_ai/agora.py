@@ -1,7 +1,14 @@
+import json
 import logging
+import os
+import threading
 import uuid
 import time
-from typing import List, Dict, Optional
+from typing import AsyncIterator, List, Dict, Optional, Tuple
+
+from .logs import log_event
+from .models import Message, dumps
+from .tracing import traced
 
 logger = logging.getLogger(__name__)
 
@@ -13,16 +20,85 @@ class Agora:
     claim them, and post results. It acts as a centralized hub for asynchronous
     inter-agent communication and task delegation.
 
+    When an `archive_path` is given, the Agora applies a retention policy:
+    replied messages, and messages left unclaimed for longer than
+    `message_ttl` seconds, are moved off the in-memory board into an
+    append-only JSONL archive. Claimed messages never expire, so a worker
+    can always reply to a task however long it takes. An on-disk SQLite
+    index maps message IDs to their byte offset in the archive, so replies
+    remain retrievable through `get_reply_for_message` while resident
+    memory only holds live messages.
+
+    For broadcast-style coordination (e.g. "memory updated"), the Agora also
+    offers pub/sub topics. Each topic is an append-only event log; every
+    subscriber reads it through its own cursor, so a single published event
+    is shared by all subscribers instead of being copied per recipient.
+
     Attributes:
-        message_board (List[Dict]): A list of message dictionaries that
-            represents the state of the message board.
+        message_board (List[Message]): A snapshot of the live messages, in
+            the order they were posted.
+        archive_path (Optional[str]): The path of the JSONL archive, or None
+            if retention is disabled.
+        message_ttl (Optional[float]): The number of seconds after which an
+            unclaimed message expires into the archive.
     """
 
-    def __init__(self):
-        """Initializes the Agora and its message board."""
-        self.message_board: List[Dict] = []
+    def __init__(
+        self, archive_path: Optional[str] = None, message_ttl: Optional[float] = None
+    ):
+        """Initializes the Agora and its message board.
+
+        Args:
+            archive_path (Optional[str]): The file to archive completed
+                messages into. If None, messages are kept in memory forever.
+            message_ttl (Optional[float]): The age in seconds after which an
+                unclaimed message is archived as expired. Only used when an
+                archive is configured.
+        """
+        # Live messages by ID, in posting (and so timestamp) order.
+        self._board: Dict[str, Message] = {}
+        self.archive_path = archive_path
+        self.message_ttl = message_ttl
+        self._lock = threading.RLock()
+        self._archive_index = None
+        self._archive_file = None
+        if archive_path:
+            archive_dir = os.path.dirname(os.path.abspath(archive_path))
+            os.makedirs(archive_dir, exist_ok=True)
+            # Imported here: only an Agora with an archive needs sqlite3.
+            import sqlite3
+
+            self._archive_index = sqlite3.connect(
+                archive_path + ".idx", check_same_thread=False
+            )
+            self._archive_index.execute(
+                "CREATE TABLE IF NOT EXISTS archive_index "
+                "(id TEXT PRIMARY KEY, offset INTEGER NOT NULL)"
+            )
+            # With a write-ahead log, committing an entry does not wait for
+            # the disk; an entry lost in a crash is only an unfound reply.
+            self._archive_index.execute("PRAGMA journal_mode=WAL")
+            self._archive_index.execute("PRAGMA synchronous=NORMAL")
+            self._archive_index.commit()
+            self._archive_file = open(archive_path, "ab")
+
+        # Pub/sub state: per-topic event logs, the absolute offset of the
+        # first retained event, and each subscriber's committed cursor.
+        self._topic_logs: Dict[str, List[Dict]] = {}
+        self._topic_bases: Dict[str, int] = {}
+        self._cursors: Dict[str, Dict[str, int]] = {}
+        self._topic_condition = threading.Condition(self._lock)
+        self._reply_condition = threading.Condition(self._lock)
+        self._async_waiters: Dict[str, List[Tuple]] = {}
         logger.info("The Agora is now open.")
 
+    @property
+    def message_board(self) -> List[Message]:
+        """The live messages, in the order they were posted."""
+        with self._lock:
+            return list(self._board.values())
+
+    @traced("agora.post_message")
     def post_message(self, from_agent: str, to_agent_role: str, content: Dict) -> str:
         """Posts a new message (e.g., a task) to the message board.
 
@@ -38,65 +114,85 @@ class Agora:
             str: The unique ID of the newly created message.
         """
         message_id = str(uuid.uuid4())
-        message = {
-            "id": message_id,
-            "from_agent": from_agent,
-            "to_agent_role": to_agent_role,
-            "content": content,
-            "timestamp": time.time(),
-            "claimed_by": None,
-            "reply": None,
-        }
-        self.message_board.append(message)
-        logger.info(
-            f"Agent '{from_agent}' posted message {message_id} for role '{to_agent_role}'."
+        message = Message(message_id, from_agent, to_agent_role, content, time.time())
+        with self._lock:
+            self._expire_stale_messages()
+            self._board[message_id] = message
+        log_event(
+            logger,
+            logging.INFO,
+            "Agent '%s' posted a message for role '%s'.",
+            from_agent,
+            to_agent_role,
+            message_id=message_id,
         )
         return message_id
 
-    def get_unclaimed_messages_for_role(self, role: str) -> List[Dict]:
+    def get_unclaimed_messages_for_role(self, role: str) -> List[Message]:
         """Retrieves all unclaimed messages targeted at a specific agent role.
 
         Args:
             role (str): The agent role to search for (e.g., "Programmer").
 
         Returns:
-            List[Dict]: A list of message dictionaries that are unclaimed and
-                match the specified role.
-        """
-        unclaimed = [
-            msg
-            for msg in self.message_board
-            if msg["to_agent_role"] == role and msg["claimed_by"] is None
-        ]
-        logger.info(f"Found {len(unclaimed)} unclaimed messages for role '{role}'.")
+            List[Message]: The messages that are unclaimed and match the
+                specified role; they can be read like dictionaries.
+        """
+        with self._lock:
+            unclaimed = [
+                msg
+                for msg in self._board.values()
+                if msg.to_agent_role == role and msg.claimed_by is None
+            ]
+        # Polled after every step by agents serving the Agora, so DEBUG only.
+        log_event(
+            logger,
+            logging.DEBUG,
+            "Found unclaimed messages for role '%s'.",
+            role,
+            unclaimed=len(unclaimed),
+        )
         return unclaimed
 
-    def claim_message(self, message_id: str, by_agent: str):
+    @traced("agora.claim_message")
+    def claim_message(self, message_id: str, by_agent: str) -> bool:
         """Marks a message as 'claimed' by a specific agent.
 
         This prevents other agents from attempting to work on the same message.
         The operation is idempotent; if an agent tries to claim a message
         that is already claimed, it will log a warning but not raise an error.
+        Claims are atomic, so when several agents race for the same message
+        exactly one of them wins.
 
         Args:
             message_id (str): The ID of the message to claim.
             by_agent (str): The name of the agent claiming the message.
+
+        Returns:
+            bool: True if this call claimed the message, False otherwise.
         """
-        for msg in self.message_board:
-            if msg["id"] == message_id:
-                if msg["claimed_by"] is None:
-                    msg["claimed_by"] = by_agent
-                    logger.info(
-                        f"Message {message_id} has been claimed by agent '{by_agent}'."
+        with self._lock:
+            msg = self._board.get(message_id)
+            if msg is not None:
+                if msg.claimed_by is None:
+                    msg.claimed_by = by_agent
+                    log_event(
+                        logger,
+                        logging.INFO,
+                        "Message claimed by agent '%s'.",
+                        by_agent,
+                        message_id=message_id,
                     )
-                    return
+                    return True
                 else:
                     logger.warning(
-                        f"Agent '{by_agent}' failed to claim message {message_id}, as it was already claimed by '{msg['claimed_by']}'."
+                        f"Agent '{by_agent}' failed to claim message {message_id}, as it was already claimed by '{msg.claimed_by}'."
                     )
-                    return
+                    return False
         logger.error(f"Failed to claim message: ID {message_id} not found.")
+        return False
 
+    @traced("agora.post_reply")
     def post_reply(self, original_message_id: str, from_agent: str, result: Dict):
         """Posts a reply to a previously claimed message.
 
@@ -108,27 +204,36 @@ class Agora:
             from_agent (str): The name of the agent posting the reply.
             result (Dict): The result or outcome of the task.
         """
-        for msg in self.message_board:
-            if msg["id"] == original_message_id:
+        with self._lock:
+            msg = self._board.get(original_message_id)
+            if msg is not None:
                 # Optional: Check if the replier is the one who claimed the message.
-                if msg["claimed_by"] == from_agent:
-                    msg["reply"] = {
+                if msg.claimed_by == from_agent:
+                    msg.reply = {
                         "from_agent": from_agent,
                         "result": result,
                         "timestamp": time.time(),
                     }
-                    logger.info(
-                        f"Agent '{from_agent}' posted a reply to message {original_message_id}."
+                    self._reply_condition.notify_all()
+                    log_event(
+                        logger,
+                        logging.INFO,
+                        "Agent '%s' posted a reply.",
+                        from_agent,
+                        message_id=original_message_id,
                     )
+                    if self._archive_index is not None:
+                        self._archive_messages([msg])
                 else:
                     logger.error(
-                        f"Agent '{from_agent}' cannot reply to message {original_message_id} because it was claimed by '{msg['claimed_by']}'."
+                        f"Agent '{from_agent}' cannot reply to message {original_message_id} because it was claimed by '{msg.claimed_by}'."
                     )
                 return
         logger.error(
             f"Failed to post reply: Original message ID {original_message_id} not found."
         )
 
+    @traced("agora.get_reply")
     def get_reply_for_message(self, message_id: str) -> Optional[Dict]:
         """Checks for and retrieves a reply to a specific message.
 
@@ -141,7 +246,313 @@ class Agora:
         Returns:
             Optional[Dict]: The reply dictionary if it exists, otherwise None.
         """
-        for msg in self.message_board:
-            if msg["id"] == message_id:
-                return msg.get("reply")
+        msg = self._board.get(message_id)
+        if msg is not None:
+            return msg.reply
+        archived = self._read_archived_message(message_id)
+        if archived is not None:
+            return archived.reply
         return None
+
+    def wait_for_reply(
+        self, message_id: str, timeout: Optional[float] = None
+    ) -> Optional[Dict]:
+        """Blocks until a message has a reply, or until `timeout` passes.
+
+        Args:
+            message_id (str): The ID of the original message.
+            timeout (Optional[float]): The longest to wait, in seconds, or
+                None to wait indefinitely.
+
+        Returns:
+            Optional[Dict]: The reply dictionary, or None if none arrived in
+                time.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._reply_condition:
+            while True:
+                reply = self.get_reply_for_message(message_id)
+                if reply is not None:
+                    return reply
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._reply_condition.wait(remaining)
+
+    @traced("agora.publish")
+    def publish(self, topic: str, from_agent: str, payload: Dict) -> int:
+        """Appends an event to a topic's log for every subscriber to read.
+
+        Args:
+            topic (str): The topic to publish to (e.g. "memory.updated").
+            from_agent (str): The name of the publishing agent.
+            payload (Dict): The event data. Subscribers receive this same
+                object, so it must be treated as read-only after publishing.
+
+        Returns:
+            int: The offset of the published event within the topic.
+        """
+        with self._topic_condition:
+            log = self._topic_logs.setdefault(topic, [])
+            offset = self._topic_bases.setdefault(topic, 0) + len(log)
+            log.append(
+                {
+                    "offset": offset,
+                    "topic": topic,
+                    "from_agent": from_agent,
+                    "payload": payload,
+                    "timestamp": time.time(),
+                }
+            )
+            # Events published while nobody is subscribed are dropped at once.
+            self._trim_topic(topic)
+            self._topic_condition.notify_all()
+            waiters = self._async_waiters.pop(topic, [])
+        for loop, event in waiters:
+            loop.call_soon_threadsafe(event.set)
+        return offset
+
+    def subscribe(self, topic: str, subscriber: str, from_start: bool = False) -> int:
+        """Registers a subscriber on a topic and returns its starting cursor.
+
+        A subscriber that is already registered keeps its committed cursor.
+
+        Args:
+            topic (str): The topic to subscribe to.
+            subscriber (str): A unique name for the subscriber.
+            from_start (bool): If True, start from the oldest retained event
+                instead of only receiving events published from now on.
+
+        Returns:
+            int: The cursor to pass to the first `poll` call.
+        """
+        with self._lock:
+            base = self._topic_bases.setdefault(topic, 0)
+            end = base + len(self._topic_logs.setdefault(topic, []))
+            cursors = self._cursors.setdefault(topic, {})
+            if subscriber not in cursors:
+                cursors[subscriber] = base if from_start else end
+            logger.info(f"'{subscriber}' subscribed to topic '{topic}'.")
+            return cursors[subscriber]
+
+    def unsubscribe(self, topic: str, subscriber: str):
+        """Removes a subscriber so it no longer holds back log retention.
+
+        Args:
+            topic (str): The topic to unsubscribe from.
+            subscriber (str): The name the subscriber registered with.
+        """
+        with self._lock:
+            self._cursors.get(topic, {}).pop(subscriber, None)
+            self._trim_topic(topic)
+
+    @traced("agora.poll")
+    def poll(
+        self,
+        topic: str,
+        cursor: int,
+        max_n: int = 100,
+        timeout: Optional[float] = None,
+    ) -> Tuple[List[Dict], int]:
+        """Reads a batch of events from a topic starting at a cursor.
+
+        Args:
+            topic (str): The topic to read.
+            cursor (int): The offset of the first event to return.
+            max_n (int): The maximum number of events to return.
+            timeout (Optional[float]): If set and no events are available,
+                block for up to this many seconds waiting for one.
+
+        Returns:
+            Tuple[List[Dict], int]: The events read and the cursor to pass
+                to the next call. If the cursor points before the oldest
+                retained event, reading resumes from the oldest one.
+        """
+        with self._topic_condition:
+            if timeout is not None:
+                self._topic_condition.wait_for(
+                    lambda: self._topic_end(topic) > cursor, timeout=timeout
+                )
+            log = self._topic_logs.get(topic, [])
+            base = self._topic_bases.get(topic, 0)
+            start = max(cursor, base) - base
+            stop = start + max_n
+            events = log[start:stop]
+            return events, base + start + len(events)
+
+    def commit(self, topic: str, subscriber: str, cursor: int):
+        """Records how far a subscriber has consumed a topic.
+
+        Events that every subscriber has committed past are released from
+        memory.
+
+        Args:
+            topic (str): The topic being consumed.
+            subscriber (str): The name the subscriber registered with.
+            cursor (int): The cursor returned by the subscriber's last `poll`.
+        """
+        with self._lock:
+            cursors = self._cursors.setdefault(topic, {})
+            cursors[subscriber] = max(cursor, cursors.get(subscriber, 0))
+            self._trim_topic(topic)
+
+    async def listen(
+        self, topic: str, subscriber: str, max_n: int = 100
+    ) -> AsyncIterator[Dict]:
+        """Asynchronously iterates over a topic's events as they arrive.
+
+        The subscriber is registered if needed, and its cursor is committed
+        after each delivered batch. Waiting does not poll: publishers wake
+        the listener's event loop directly.
+
+        Args:
+            topic (str): The topic to listen to.
+            subscriber (str): A unique name for the subscriber.
+            max_n (int): The maximum number of events fetched per batch.
+
+        Yields:
+            Dict: Each event published to the topic, in order.
+        """
+        # Imported here: asyncio is costly to import and only listeners need it.
+        import asyncio
+
+        cursor = self.subscribe(topic, subscriber)
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._lock:
+                events, next_cursor = self.poll(topic, cursor, max_n)
+                if not events:
+                    wakeup = asyncio.Event()
+                    self._async_waiters.setdefault(topic, []).append((loop, wakeup))
+            if not events:
+                await wakeup.wait()
+                continue
+            for event in events:
+                yield event
+            cursor = next_cursor
+            self.commit(topic, subscriber, cursor)
+
+    def _topic_end(self, topic: str) -> int:
+        """Returns the offset one past the newest event in a topic."""
+        return self._topic_bases.get(topic, 0) + len(self._topic_logs.get(topic, []))
+
+    def _trim_topic(self, topic: str):
+        """Drops events that all subscribers of a topic have consumed.
+
+        Trimming is amortized: the log is only compacted once at least half
+        of it has been consumed, so commits stay cheap.
+        """
+        log = self._topic_logs.get(topic)
+        if not log:
+            return
+        cursors = self._cursors.get(topic)
+        base = self._topic_bases[topic]
+        consumed = (min(cursors.values()) if cursors else base + len(log)) - base
+        if consumed > 0 and consumed * 2 >= len(log):
+            del log[:consumed]
+            self._topic_bases[topic] = base + consumed
+
+    def compact(self) -> int:
+        """Moves every replied or expired message into the archive.
+
+        Replies are archived as soon as they are posted, so this is mainly
+        useful for sweeping expired messages on demand (e.g. from a
+        maintenance loop) rather than waiting for the next `post_message`.
+
+        Returns:
+            int: The number of messages that were archived.
+        """
+        if self._archive_index is None:
+            return 0
+        with self._lock:
+            now = time.time()
+            completed = [
+                msg
+                for msg in self._board.values()
+                if msg.reply is not None or self._is_expired(msg, now)
+            ]
+            self._archive_messages(completed)
+            return len(completed)
+
+    def close(self):
+        """Closes the on-disk archive and its index, if they are open."""
+        if self._archive_index is not None:
+            with self._lock:
+                self._archive_file.close()
+                self._archive_index.close()
+                self._archive_index = self._archive_file = None
+
+    def _is_expired(self, msg: Message, now: float) -> bool:
+        """Checks whether an unclaimed message has outlived the TTL."""
+        return (
+            self.message_ttl is not None
+            and msg.claimed_by is None
+            and msg.reply is None
+            and now - msg.timestamp >= self.message_ttl
+        )
+
+    def _expire_stale_messages(self):
+        """Archives the expired messages at the head of the board.
+
+        Messages are kept in timestamp order, so messages older than the TTL
+        form a prefix of the board and the sweep stops at the first younger
+        one. Claimed messages in that prefix are skipped, not expired.
+        """
+        if self._archive_index is None or self.message_ttl is None:
+            return
+        now = time.time()
+        expired = []
+        for msg in self._board.values():
+            if now - msg.timestamp < self.message_ttl:
+                break
+            if self._is_expired(msg, now):
+                expired.append(msg)
+        if expired:
+            logger.info(f"Expiring {len(expired)} unanswered messages to archive.")
+            self._archive_messages(expired)
+
+    def _archive_messages(self, messages: List[Message]):
+        """Appends messages to the archive and drops them from the board.
+
+        Args:
+            messages (List[Message]): The messages to archive.
+        """
+        if not messages:
+            return
+        with self._lock:
+            entries = []
+            f = self._archive_file
+            for msg in messages:
+                entries.append((msg.id, f.tell()))
+                f.write(dumps(msg).encode("utf-8"))
+                f.write(b"\n")
+            # Flushed before indexing, so an indexed offset is always readable.
+            f.flush()
+            self._archive_index.executemany(
+                "INSERT OR REPLACE INTO archive_index (id, offset) VALUES (?, ?)",
+                entries,
+            )
+            self._archive_index.commit()
+            for message_id, _ in entries:
+                del self._board[message_id]
+
+    def _read_archived_message(self, message_id: str) -> Optional[Message]:
+        """Looks up an archived message through the on-disk index.
+
+        Args:
+            message_id (str): The ID of the archived message.
+
+        Returns:
+            Optional[Message]: The archived message, or None if it is unknown.
+        """
+        if self._archive_index is None:
+            return None
+        with self._lock:
+            row = self._archive_index.execute(
+                "SELECT offset FROM archive_index WHERE id = ?", (message_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        with open(self.archive_path, "rb") as f:
+            f.seek(row[0])
+            return Message.from_dict(json.loads(f.readline()))
@@ -0,0 +1,212 @@
+import json
+import logging
+import os
+import threading
+from typing import List, Optional
+
+from .file_io import atomic_write
+from .models import json_default
+
+logger = logging.getLogger(__name__)
+
+# Bumped whenever the record format changes incompatibly.
+CHECKPOINT_VERSION = 1
+
+
+class CheckpointError(Exception):
+    """Raised when a checkpoint file cannot be understood."""
+
+
+class CheckpointLog:
+    """An append-only JSONL log of a Director's progress on its goal.
+
+    The first record of a goal is a full snapshot: the goal, the Agora
+    message it answers (if any), the remaining plan, whether a plan has
+    been generated, the history and the names of the learned tools. Every later checkpoint appends only what changed
+    since the previous one: the new history events, how many steps were
+    taken from the front of the plan and which steps were appended to it.
+    Starting a new goal rewrites the file with a fresh snapshot, so the log
+    never grows beyond one goal.
+
+    A record is flushed to the OS as soon as it is written, so it survives
+    a crash of the process. A torn final line (e.g. after a power loss
+    without `fsync`) is ignored when the log is read.
+
+    Attributes:
+        path (str): The checkpoint file.
+        fsync (bool): Whether every record is fsynced to disk.
+    """
+
+    def __init__(self, path: str, fsync: bool = False):
+        """Initializes the log; the file is only touched by `write`.
+
+        Args:
+            path (str): The file to write checkpoints to.
+            fsync (bool): Whether to fsync after every record, so that
+                checkpoints also survive a power loss.
+        """
+        self.path = path
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        self._handle = None
+        self._goal = None
+        self._message_id: Optional[str] = None
+        self._plan: Optional[list] = None
+        self._plan_generated = False
+        self._history_length = 0
+        self._tools: List[str] = []
+
+    def write(
+        self,
+        goal,
+        plan: list,
+        plan_generated: bool,
+        history: list,
+        tools: List[str],
+        message_id: Optional[str] = None,
+    ):
+        """Records the current state, appending only the changes.
+
+        Args:
+            goal: The goal being worked on.
+            plan (list): The remaining steps of the plan.
+            plan_generated (bool): Whether a plan has been generated.
+            history (list): The goal's history so far.
+            tools (List[str]): The names of the learned tools.
+            message_id (Optional[str]): The Agora message the goal answers.
+        """
+        with self._lock:
+            if (
+                self._plan is None
+                or goal != self._goal
+                or message_id != self._message_id
+                or len(history) < self._history_length
+            ):
+                record = {
+                    "v": CHECKPOINT_VERSION,
+                    "goal": goal,
+                    "message_id": message_id,
+                    "plan": plan,
+                    "plan_generated": plan_generated,
+                    "history": list(history),
+                    "tools": tools,
+                }
+                self._close_handle()
+                atomic_write(self.path, _encode(record), fsync=self.fsync)
+            else:
+                start = self._history_length
+                record = {"history": history[start:]}
+                popped, pushed = _plan_delta(self._plan, plan)
+                if popped:
+                    record["pop"] = popped
+                if pushed:
+                    record["push"] = pushed
+                if plan_generated != self._plan_generated:
+                    record["plan_generated"] = plan_generated
+                if tools != self._tools:
+                    record["tools"] = tools
+                self._append(_encode(record))
+            self._goal = goal
+            self._message_id = message_id
+            self._plan = list(plan)
+            self._plan_generated = plan_generated
+            self._history_length = len(history)
+            self._tools = list(tools)
+
+    def read(self) -> Optional[dict]:
+        """Replays the log into the latest recorded state.
+
+        Returns:
+            Optional[dict]: The state with the keys "goal", "message_id",
+                "plan", "plan_generated", "history" and "tools", or None if
+                there is no checkpoint.
+
+        Raises:
+            CheckpointError: If the file was written by an incompatible
+                version or does not start with a snapshot.
+        """
+        try:
+            with open(self.path, "rb") as f:
+                lines = f.read().splitlines()
+        except FileNotFoundError:
+            return None
+        state = None
+        for number, line in enumerate(lines, 1):
+            try:
+                record = json.loads(line)
+            except ValueError:
+                if number == len(lines):
+                    logger.warning(f"Ignoring a torn last record in '{self.path}'.")
+                    break
+                raise CheckpointError(f"Corrupt record {number} in '{self.path}'.")
+            if state is None:
+                if record.get("v") != CHECKPOINT_VERSION:
+                    raise CheckpointError(
+                        f"Unsupported checkpoint version {record.get('v')} "
+                        f"in '{self.path}'."
+                    )
+                state = {key: record[key] for key in record if key != "v"}
+                state.setdefault("message_id", None)
+                continue
+            state["history"].extend(record.get("history", []))
+            popped = record.get("pop", 0)
+            state["plan"] = state["plan"][popped:] + record.get("push", [])
+            for key in ("plan_generated", "tools"):
+                if key in record:
+                    state[key] = record[key]
+        return state
+
+    def clear(self):
+        """Deletes the checkpoint, e.g. once its goal has been completed."""
+        with self._lock:
+            self._close_handle()
+            self._plan = None
+            self._goal = None
+            self._history_length = 0
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+
+    def close(self):
+        """Closes the file handle; a later `write` reopens it."""
+        with self._lock:
+            self._close_handle()
+
+    def _append(self, data: bytes):
+        if self._handle is None:
+            self._handle = open(self.path, "ab")
+        self._handle.write(data)
+        self._handle.flush()
+        if self.fsync:
+            os.fsync(self._handle.fileno())
+
+    def _close_handle(self):
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+
+
+def _encode(record: dict) -> bytes:
+    """Serializes a record as one compact JSON line.
+
+    Models are stored as their dicts; other values JSON cannot represent
+    (e.g. tool instances returned by a skill) are stored as their string
+    form.
+    """
+    line = json.dumps(record, separators=(",", ":"), default=json_default)
+    return (line + "\n").encode("utf-8")
+
+
+def _plan_delta(old: list, new: list):
+    """Returns how many steps were taken from `old` and which were appended.
+
+    Plans only shrink at the front (steps are taken) and grow at the back
+    (steps are re-queued), so `new` is a suffix of `old` followed by new
+    steps. Any other change ends up as taking every old step and appending
+    the whole new plan.
+    """
+    for popped in range(len(old) + 1):
+        kept = len(old) - popped
+        if old[popped:] == new[:kept]:
+            return popped, new[kept:]
@@ -1,9 +1,11 @@
 import logging
 import json
-from typing import Dict, Union
+from typing import Dict, Iterable, List, Optional, Tuple, Union
 from .personality import Personality
 from .oracle import SentientOracle
 from .memory import VectorMemory
+from .models import Action, ModelError
+from .tracing import span, traced
 
 logger = logging.getLogger(__name__)
 
@@ -17,30 +19,61 @@ class CognitiveEngine:
     generate a multi-step plan. It also validates the plan to ensure it is
     executable by the agent.
 
+    When a step is rejected by validation or fails while running, the plan
+    is repaired rather than regenerated: the Oracle receives a compact delta
+    (completed steps, the failed step and its error, the remaining steps)
+    and its answer replaces the failed step and everything after it. At most
+    `max_replans` repairs are made per goal.
+
+    The retrieval (and optionally the plan) for a goal can be computed
+    ahead of time with `prepare`, e.g. while another goal is still running,
+    and handed back with `use_prepared` before the goal starts.
+
     Attributes:
         personality (Personality): The personality module for the agent.
         oracle (SentientOracle): The LLM interface for reasoning and planning.
-        memory (VectorMemory): The agent's long-term semantic memory.
+        memory (Optional[VectorMemory]): The agent's long-term semantic
+            memory, or None to plan without memory context.
+        memory_namespaces (Optional[list]): The memory namespaces searched
+            for context, or None for the default namespace.
+        max_replans (int): The most plan repairs per goal.
+        replans (int): The repairs made for the current goal.
         _plan (list): The current multi-step plan being executed.
         _plan_generated (bool): A flag indicating if a plan has been generated.
     """
 
     def __init__(
-        self, personality: Personality, oracle: SentientOracle, memory: VectorMemory
+        self,
+        personality: Personality,
+        oracle: SentientOracle,
+        memory: Optional[VectorMemory],
+        memory_namespaces: Optional[Iterable[Optional[str]]] = None,
+        max_replans: int = 3,
     ):
         """Initializes the CognitiveEngine.
 
         Args:
             personality (Personality): An instance of a personality class.
             oracle (SentientOracle): An instance of the SentientOracle.
-            memory (VectorMemory): An instance of the VectorMemory.
+            memory (Optional[VectorMemory]): An instance of the VectorMemory,
+                or None.
+            memory_namespaces (Optional[Iterable[Optional[str]]]): The
+                namespaces to retrieve context from, e.g. `[None, "Researcher"]`.
+            max_replans (int): The maximum number of plan repairs per goal.
         """
         self.personality = personality
         self.oracle = oracle
         self.memory = memory
+        self.memory_namespaces = (
+            list(memory_namespaces) if memory_namespaces is not None else None
+        )
+        self.max_replans = max_replans
+        self.replans = 0
         self._plan = []
         self._plan_generated = False
+        self._prepared: Optional[dict] = None
 
+    @traced("cognitive_engine.think")
     def think(
         self, goal: Union[str, Dict], history: list, available_tools: dict
     ) -> dict:
@@ -59,34 +92,53 @@ class CognitiveEngine:
             dict: A dictionary representing the next action to be executed.
         """
         if not self._plan_generated:
-            logger.info(
-                "Cognitive Engine consulting memory and Oracle for a strategic plan..."
-            )
-
-            # RAG Step 1: Retrieve context. The query can be the goal string or a task description.
-            query_text = goal if isinstance(goal, str) else json.dumps(goal)
-            logger.info(
-                f"Querying memory for context related to: '{query_text[:100]}...'"
-            )
-            retrieved_context = self.memory.query(query_text)
-            context_str = "\n".join(retrieved_context)
+            prepared, self._prepared = self._prepared, None
+            if prepared is not None and prepared["goal"] != goal:
+                prepared = None
+            if prepared is not None and prepared.get("plan") is not None:
+                logger.info("Cognitive Engine using the plan prepared in advance.")
+                plan = prepared["plan"]
+            else:
+                logger.info(
+                    "Cognitive Engine consulting memory and Oracle for a strategic plan..."
+                )
+                # RAG Step 1: Retrieve context, unless it was prepared in advance.
+                if prepared is not None:
+                    context_str = prepared["context"]
+                else:
+                    context_str = self._retrieve_context(goal)
 
-            # RAG Step 2: Generate plan from Oracle.
-            plan = self.oracle.generate_plan(goal, history, context_str)
+                # RAG Step 2: Generate plan from Oracle.
+                plan = self.oracle.generate_plan(goal, history, context_str)
             self._plan_generated = True
 
-            if self._validate_plan(plan, available_tools):
+            if not isinstance(plan, list):
+                plan = [plan]
+            with span("cognitive_engine.validate_plan"):
+                actions, invalid = self._parse_plan(plan, available_tools)
+            if invalid is not None:
+                index, reason = invalid
+                failed_step, *remaining = plan[index:]
+                repaired = self._request_repair(
+                    goal, history, failed_step, reason, remaining, available_tools
+                )
+                if repaired is not None:
+                    actions += repaired
+                    invalid = None
+            if invalid is None:
                 logger.info(
                     "The Oracle has provided a valid plan. Orchestrating its execution."
                 )
-                self._plan = plan
+                self._plan = actions
             else:
                 logger.error("The Oracle's plan is invalid. Rejecting the plan.")
                 self._plan = [
-                    {
-                        "action": "error",
-                        "message": "The Oracle proposed a plan with invalid tools.",
-                    }
+                    Action(
+                        "error",
+                        extra={
+                            "message": "The Oracle proposed a plan with invalid tools."
+                        },
+                    )
                 ]
 
         if not self._plan:
@@ -97,6 +149,151 @@ class CognitiveEngine:
 
         return self._plan.pop(0)
 
+    def peek_next_action(self):
+        """Returns the next planned action without taking it, or None."""
+        return self._plan[0] if self._plan else None
+
+    def requeue(self, action: dict):
+        """Puts an action back at the end of the current plan.
+
+        Used for actions that could not complete yet, such as waiting for a
+        reply that has not arrived, so the rest of the plan goes first.
+        """
+        self._plan.append(Action.from_dict(action))
+
+    def reset(self):
+        """Forgets the current plan, so the next `think` call makes a new one."""
+        self._plan = []
+        self._plan_generated = False
+        self._prepared = None
+        self.replans = 0
+
+    def prepare(
+        self, goal: Union[str, Dict], history: list, with_plan: bool = False
+    ) -> dict:
+        """Does the retrieval, and optionally the planning, for a future goal.
+
+        This does not change the engine's state, so it may run in another
+        thread while the current plan executes.
+
+        Args:
+            goal (Union[str, Dict]): The goal to prepare for.
+            history (list): The history the goal will start with; a plan is
+                only valid for a goal starting with the same history.
+            with_plan (bool): Whether to also ask the Oracle for the plan.
+
+        Returns:
+            dict: The goal, the retrieved context and, if requested, the plan;
+                pass it to `use_prepared`.
+        """
+        context = self._retrieve_context(goal)
+        prepared = {"goal": goal, "context": context, "plan": None}
+        if with_plan:
+            prepared["plan"] = self.oracle.generate_plan(goal, history, context)
+        return prepared
+
+    def use_prepared(self, prepared: dict):
+        """Makes the next new plan use the results of `prepare`.
+
+        They are ignored if the next goal is a different one.
+        """
+        self._prepared = prepared
+
+    @traced("cognitive_engine.replan")
+    def replan(
+        self,
+        goal: Union[str, Dict],
+        history: list,
+        failed_step: dict,
+        error: str,
+        available_tools: dict,
+    ) -> bool:
+        """Repairs the remaining plan after a step failed.
+
+        Args:
+            goal (Union[str, Dict]): The goal being worked on.
+            history (list): The goal's history, including the failed step.
+            failed_step (dict): The step that failed.
+            error (str): The reason it failed.
+            available_tools (dict): The tools a repaired plan may use.
+
+        Returns:
+            bool: True if the remaining plan was replaced, False if it was
+                kept because the replan limit is reached or the Oracle gave
+                no valid repair.
+        """
+        repaired = self._request_repair(
+            goal, history, failed_step, error, list(self._plan), available_tools
+        )
+        if repaired is None:
+            return False
+        self._plan = repaired
+        return True
+
+    def plan_state(self) -> Tuple[list, bool]:
+        """Returns a copy of the remaining plan and whether one was generated."""
+        return list(self._plan), self._plan_generated
+
+    def load_plan(self, plan: list, plan_generated: bool = True):
+        """Replaces the current plan, e.g. with one restored from a checkpoint.
+
+        Args:
+            plan (list): The remaining steps, next step first.
+            plan_generated (bool): Whether the plan came from the Oracle. If
+                True, `think` continues with it instead of planning again.
+        """
+        self._plan = [Action.from_dict(step) for step in plan]
+        self._plan_generated = plan_generated
+
+    def _retrieve_context(self, goal: Union[str, Dict]) -> str:
+        """Queries the memory for context on the goal; "" without a memory."""
+        if self.memory is None:
+            return ""
+        # The query can be the goal string or a task description.
+        query_text = goal if isinstance(goal, str) else json.dumps(goal)
+        logger.info(f"Querying memory for context related to: '{query_text[:100]}...'")
+        if self.memory_namespaces is None:
+            retrieved_context = self.memory.query(query_text)
+        else:
+            retrieved_context = self.memory.query(
+                query_text, namespaces=self.memory_namespaces
+            )
+        return "\n".join(retrieved_context)
+
+    def _request_repair(
+        self,
+        goal,
+        history: list,
+        failed_step: dict,
+        error: str,
+        remaining: list,
+        available_tools: dict,
+    ) -> Optional[List[Action]]:
+        """Asks the Oracle for steps replacing `failed_step` and `remaining`.
+
+        Returns:
+            Optional[List[Action]]: The validated replacement steps, or None
+                if no repair is allowed or the Oracle's answer is unusable.
+        """
+        if self.replans >= self.max_replans:
+            logger.warning(
+                f"Not repairing the plan: the limit of {self.max_replans} replans is reached."
+            )
+            return None
+        repair_plan = getattr(self.oracle, "repair_plan", None)
+        if repair_plan is None:
+            return None
+        self.replans += 1
+        logger.info(f"Repairing the plan after a failed step ({error}).")
+        repaired = repair_plan(goal, history, failed_step, error, remaining)
+        if repaired is None:
+            return None
+        actions, invalid = self._parse_plan(repaired, available_tools)
+        if invalid is not None:
+            logger.error("The Oracle's repaired plan is invalid. Keeping the old plan.")
+            return None
+        return actions
+
     def _validate_plan(self, plan: list, available_tools: dict) -> bool:
         """Validates an Oracle-generated plan against available tools and actions.
 
@@ -110,48 +307,27 @@ class CognitiveEngine:
         Returns:
             bool: True if the plan is valid, False otherwise.
         """
-        if not plan:
-            return True
-
-        VALID_ACTIONS = [
-            "use_tool",
-            "express_personality",
-            "delegate_task",
-            "wait_for_reply",
-            "final_answer",
-            "error",
-        ]
-
-        for step in plan:
-            action_type = step.get("action")
-            if action_type not in VALID_ACTIONS:
-                logger.warning(
-                    f"Plan validation failed: Action type '{action_type}' is not recognized."
-                )
-                return False
-
-            if action_type == "use_tool":
-                tool_name = step.get("tool_name")
-                if tool_name not in available_tools:
-                    logger.warning(
-                        f"Plan validation failed: Tool '{tool_name}' is not in the list of available tools: {list(available_tools.keys())}"
-                    )
-                    return False
-        return True
+        return self._parse_plan(plan, available_tools)[1] is None
 
-    def _get_context_from_history(self, history: list) -> str:
-        """Helper function to extract the most recent tool output as context.
+    def _parse_plan(
+        self, plan: list, available_tools: dict
+    ) -> Tuple[List[Action], Optional[Tuple[int, str]]]:
+        """Parses and validates the steps of a plan up to the first invalid one.
 
         Args:
-            history (list): A list of event dictionaries from the main loop.
+            plan (list): The list of action dictionaries from the Oracle.
+            available_tools (dict): A dictionary of tools the agent can currently use.
 
         Returns:
-            str: The content of the most recent tool output, or an empty string.
+            Tuple[List[Action], Optional[Tuple[int, str]]]: The valid steps
+                before the first invalid one, and that step's index and the
+                reason it is invalid, or None if every step is valid.
         """
-        for event in reversed(history):
-            if event.get("role") == "body" and "result" in event:
-                result = event["result"]
-                if isinstance(result, dict):
-                    return result.get("content", "")
-                return str(result)
-        return ""
+        actions = []
+        for index, step in enumerate(plan):
+            try:
+                actions.append(Action.parse(step, available_tools))
+            except ModelError as e:
+                logger.warning(f"Plan validation failed: {e}")
+                return actions, (index, str(e))
+        return actions, None
@@ -0,0 +1,212 @@
+import hashlib
+import logging
+import re
+import threading
+from functools import lru_cache
+from typing import List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+
+
+class EmbedderMismatchError(ValueError):
+    """Raised when a collection was built with a different embedder."""
+
+
+class Embedder:
+    """The interface of the text embedders behind `VectorMemory`.
+
+    Vectors from different embedders are not comparable, so every embedder
+    has an `identity` that `VectorMemory` records in its collection.
+
+    Attributes:
+        name (str): A short name of the embedding method.
+    """
+
+    name = "embedder"
+
+    @property
+    def identity(self) -> str:
+        """A string that changes whenever the produced vectors would change."""
+        return self.name
+
+    def encode(self, text: str):
+        """Embeds one text.
+
+        This method must be overridden by any concrete embedder.
+
+        Raises:
+            NotImplementedError: If the method is not overridden.
+        """
+        raise NotImplementedError("Each embedder must implement the 'encode' method.")
+
+    def encode_batch(self, texts: List[str]):
+        """Embeds several texts and returns one vector per text."""
+        return [self.encode(text) for text in texts]
+
+
+class SentenceTransformerEmbedder(Embedder):
+    """Embeds texts with a sentence-transformer model.
+
+    `sentence_transformers` (and with it torch) is imported and the model
+    is loaded on the first `encode` call.
+
+    Attributes:
+        model_name (str): The sentence-transformer model to use.
+        cache_folder (Optional[str]): Where the model is downloaded to.
+        device (str): The device to run the model on.
+    """
+
+    name = "sentence-transformers"
+
+    def __init__(
+        self,
+        model_name: str = "all-MiniLM-L6-v2",
+        cache_folder: Optional[str] = None,
+        device: str = "cpu",
+    ):
+        self.model_name = model_name
+        self.cache_folder = cache_folder
+        self.device = device
+        self._model = None
+        self._lock = threading.Lock()
+
+    @property
+    def identity(self) -> str:
+        return f"{self.name}:{self.model_name}"
+
+    @property
+    def model(self):
+        """The SentenceTransformer model, loaded on first access."""
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    from sentence_transformers import SentenceTransformer
+
+                    logger.info(
+                        f"Loading the sentence-transformer '{self.model_name}'."
+                    )
+                    self._model = SentenceTransformer(
+                        self.model_name,
+                        device=self.device,
+                        cache_folder=self.cache_folder,
+                    )
+        return self._model
+
+    def encode(self, text: str):
+        return self.model.encode(text)
+
+    def encode_batch(self, texts: List[str]):
+        return self.model.encode(texts)
+
+
+class HashingEmbedder(Embedder):
+    """A fast, deterministic embedder that needs no model or download.
+
+    Texts are split into lowercase word tokens. Every token, every pair of
+    adjacent tokens and every character trigram of a token is hashed with
+    BLAKE2b into one of `dimensions` buckets with a sign (the "hashing
+    trick"). Counts are dampened with `log1p` (sublinear term frequency)
+    and the vector is L2-normalized, so cosine distance behaves like a
+    TF-weighted keyword match with some tolerance for word forms.
+
+    No inverse document frequencies are used: they depend on the corpus,
+    which would make stored vectors drift as the memory grows.
+
+    The embedder is lexical: it finds texts sharing words with the query,
+    not paraphrases. Use a `SentenceTransformerEmbedder` for semantic recall.
+
+    Attributes:
+        dimensions (int): The length of the vectors.
+        char_ngrams (bool): Whether character trigrams are used as features.
+    """
+
+    name = "hashing-v1"
+
+    def __init__(self, dimensions: int = 1024, char_ngrams: bool = True):
+        self.dimensions = dimensions
+        self.char_ngrams = char_ngrams
+
+    @property
+    def identity(self) -> str:
+        return f"{self.name}:{self.dimensions}:{'char' if self.char_ngrams else 'word'}"
+
+    def encode(self, text: str):
+        import numpy as np
+
+        indices, signs = [], []
+        for feature in self._features(text):
+            bucket, sign = _hash_feature(feature, self.dimensions)
+            indices.append(bucket)
+            signs.append(sign)
+        vector = np.bincount(indices, weights=signs, minlength=self.dimensions)
+        vector = np.sign(vector) * np.log1p(np.abs(vector))
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector /= norm
+        return vector.astype(np.float32)
+
+    def _features(self, text: str) -> List[str]:
+        tokens = _TOKEN_PATTERN.findall(text.lower())
+        features = list(tokens)
+        features += [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+        if self.char_ngrams:
+            for token in tokens:
+                padded = f"<{token}>"
+                features += [
+                    "#" + "".join(gram) for gram in zip(padded, padded[1:], padded[2:])
+                ]
+        return features
+
+
+@lru_cache(maxsize=65536)
+def _hash_feature(feature: str, dimensions: int):
+    """Maps a feature to a bucket and a sign; cached for frequent features."""
+    digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+    value = int.from_bytes(digest, "little")
+    return value % dimensions, 1.0 if value >> 63 else -1.0
+
+
+# Embedders that can be selected by name, e.g. `VectorMemory(embedding_model="hashing")`.
+EMBEDDERS = {
+    "sentence-transformers": SentenceTransformerEmbedder,
+    "hashing": HashingEmbedder,
+}
+
+
+def get_embedder(embedder: Union[str, Embedder, None] = None, **kwargs):
+    """Returns an embedder instance.
+
+    Args:
+        embedder (Union[str, Embedder, None]): A name from `EMBEDDERS`,
+            "unix:<socket path>" for a shared `EmbeddingServer`, an object
+            with an `encode(text)` method (returned unchanged), or None for
+            the default sentence-transformer.
+        **kwargs: Arguments for the embedder class when one is named.
+
+    Raises:
+        ValueError: If the name is unknown.
+    """
+    if embedder is None:
+        embedder = "sentence-transformers"
+    if not isinstance(embedder, str):
+        return embedder
+    if embedder.startswith("unix:"):
+        from .embedding_server import RemoteEmbedder
+
+        return RemoteEmbedder(embedder.split(":", 1)[1], **kwargs)
+    if embedder not in EMBEDDERS:
+        raise ValueError(
+            f"Unknown embedder '{embedder}'. Choose one of {sorted(EMBEDDERS)}."
+        )
+    return EMBEDDERS[embedder](**kwargs)
+
+
+def embedder_identity(embedder) -> str:
+    """Returns the identity of an embedder, or its class path for plain objects."""
+    identity = getattr(embedder, "identity", None)
+    if isinstance(identity, str):
+        return identity
+    cls = type(embedder)
+    return f"{cls.__module__}.{cls.__qualname__}"
@@ -0,0 +1,389 @@
+import json
+import logging
+import multiprocessing
+import os
+import queue
+import socket
+import struct
+import threading
+import time
+from typing import List, Optional
+
+import numpy as np
+
+from .embedders import Embedder, get_embedder
+
+logger = logging.getLogger(__name__)
+
+# Every message is a frame: header length, payload length, JSON header, payload.
+_FRAME = struct.Struct("!II")
+
+
+class EmbeddingServerError(Exception):
+    """Raised when the embedding server cannot be reached or fails a request."""
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    chunks = []
+    while size:
+        chunk = sock.recv(size)
+        if not chunk:
+            raise ConnectionError("The connection was closed.")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def _send_frame(sock: socket.socket, header: dict, payload: bytes = b""):
+    encoded = json.dumps(header).encode("utf-8")
+    sock.sendall(_FRAME.pack(len(encoded), len(payload)) + encoded + payload)
+
+
+def _recv_frame(sock: socket.socket):
+    header_size, payload_size = _FRAME.unpack(_recv_exact(sock, _FRAME.size))
+    header = json.loads(_recv_exact(sock, header_size))
+    return header, _recv_exact(sock, payload_size) if payload_size else b""
+
+
+class _Request:
+    __slots__ = ("connection", "lock", "id", "texts")
+
+    def __init__(self, connection, lock, request_id, texts):
+        self.connection = connection
+        self.lock = lock
+        self.id = request_id
+        self.texts = texts
+
+
+class EmbeddingServer:
+    """Serves one embedding model to many processes over a Unix socket.
+
+    Each client connection is read by its own thread. Encode requests are
+    queued, and a single batching thread collects them into batches: a
+    batch is encoded as soon as it holds `max_batch_size` texts, or
+    `max_wait` seconds after its first request arrived, whichever comes
+    first. Clients send one request at a time per connection, so a batch
+    that already holds a request from every connected client is encoded
+    right away instead of waiting for the deadline. The model is loaded
+    once, in the server, and runs at the batch sizes where it is most
+    efficient, while each request waits at most `max_wait` for others to
+    join it.
+
+    Vectors are returned as raw float32 arrays. The server reports its
+    embedder's identity, so a `VectorMemory` using a `RemoteEmbedder`
+    accepts collections built with the same model in-process.
+
+    Attributes:
+        socket_path (str): The Unix socket the server listens on.
+        embedder (Embedder): The model used to encode texts.
+        max_batch_size (int): The number of texts that triggers a batch.
+        max_wait (float): The longest a request waits for a batch to fill.
+        batches (int): The number of batches encoded so far.
+        texts (int): The number of texts encoded so far.
+    """
+
+    def __init__(
+        self,
+        socket_path: str,
+        embedder="sentence-transformers",
+        max_batch_size: int = 64,
+        max_wait: float = 0.005,
+    ):
+        """Initializes the server; `serve` starts it.
+
+        Args:
+            socket_path (str): The path of the Unix socket to create.
+            embedder: An `Embedder`, or a name from `embedders.EMBEDDERS`.
+            max_batch_size (int): The most texts encoded in one batch.
+            max_wait (float): The batching deadline in seconds.
+        """
+        self.socket_path = socket_path
+        self.embedder = get_embedder(embedder)
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.batches = 0
+        self.texts = 0
+        self._queue: "queue.Queue[Optional[_Request]]" = queue.Queue()
+        self._listener: Optional[socket.socket] = None
+        self._stopping = threading.Event()
+        self._clients = 0
+        self._clients_lock = threading.Lock()
+
+    def serve(self):
+        """Listens for clients and encodes their requests until `stop`."""
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        self._listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._listener.bind(self.socket_path)
+        self._listener.listen(128)
+        batcher = threading.Thread(
+            target=self._batch_loop, name="EmbeddingServer-batcher", daemon=True
+        )
+        batcher.start()
+        logger.info(f"Embedding server listening on '{self.socket_path}'.")
+        try:
+            while not self._stopping.is_set():
+                try:
+                    connection, _ = self._listener.accept()
+                except OSError:
+                    break
+                threading.Thread(
+                    target=self._read_loop,
+                    args=(connection,),
+                    name="EmbeddingServer-client",
+                    daemon=True,
+                ).start()
+        finally:
+            self._queue.put(None)
+            batcher.join()
+            try:
+                os.unlink(self.socket_path)
+            except FileNotFoundError:
+                pass
+
+    def stop(self):
+        """Stops accepting clients; `serve` returns once the queue drains."""
+        self._stopping.set()
+        if self._listener is not None:
+            try:
+                self._listener.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            self._listener.close()
+
+    def _read_loop(self, connection: socket.socket):
+        """Reads one client's requests and queues them or answers directly."""
+        lock = threading.Lock()
+        with self._clients_lock:
+            self._clients += 1
+        try:
+            with connection:
+                self._serve_connection(connection, lock)
+        finally:
+            with self._clients_lock:
+                self._clients -= 1
+
+    def _serve_connection(self, connection: socket.socket, lock: threading.Lock):
+        while True:
+            try:
+                header, _ = _recv_frame(connection)
+            except (ConnectionError, OSError, ValueError):
+                return
+            if not isinstance(header, dict):
+                # Answered like an unknown operation rather than dropped.
+                header = {"op": None}
+            op = header.get("op", "encode")
+            if op == "encode":
+                texts = header.get("texts")
+                if isinstance(texts, list) and all(isinstance(t, str) for t in texts):
+                    self._queue.put(_Request(connection, lock, header.get("id"), texts))
+                    continue
+                reply = {
+                    "error": "An encode request needs a list of strings in 'texts'."
+                }
+            elif op == "identity":
+                reply = {"identity": self.embedder.identity}
+            elif op == "stats":
+                reply = {"batches": self.batches, "texts": self.texts}
+            else:
+                reply = {"error": f"Unknown operation '{op}'."}
+            reply["id"] = header.get("id")
+            with lock:
+                _send_frame(connection, reply)
+
+    def _batch_loop(self):
+        """Collects queued requests into batches and encodes them."""
+        stopping = False
+        while not stopping:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = [first]
+            size = len(first.texts)
+            deadline = time.monotonic() + self.max_wait
+            while size < self.max_batch_size and len(batch) < self._clients:
+                remaining = deadline - time.monotonic()
+                try:
+                    request = (
+                        self._queue.get(timeout=remaining)
+                        if remaining > 0
+                        else self._queue.get_nowait()
+                    )
+                except queue.Empty:
+                    break
+                if request is None:
+                    stopping = True
+                    break
+                batch.append(request)
+                size += len(request.texts)
+
+            texts = [text for request in batch for text in request.texts]
+            try:
+                vectors = np.asarray(
+                    self.embedder.encode_batch(texts), dtype=np.float32
+                )
+                error = None
+            except Exception as e:
+                logger.error(f"Failed to encode a batch: {e}", exc_info=True)
+                error = f"{type(e).__name__}: {e}"
+            self.batches += 1
+            self.texts += len(texts)
+
+            offset = 0
+            for request in batch:
+                end = offset + len(request.texts)
+                if error is None:
+                    rows = vectors[offset:end]
+                    reply = {"id": request.id, "shape": list(rows.shape)}
+                    payload = rows.tobytes()
+                else:
+                    reply, payload = {"id": request.id, "error": error}, b""
+                offset = end
+                try:
+                    with request.lock:
+                        _send_frame(request.connection, reply, payload)
+                except OSError:
+                    pass  # The client has gone away.
+
+
+class RemoteEmbedder(Embedder):
+    """An embedder that sends texts to an `EmbeddingServer`.
+
+    Each thread uses its own connection, so concurrent callers in one
+    process are batched by the server just like separate processes.
+
+    Attributes:
+        socket_path (str): The server's Unix socket.
+        timeout (float): How long to wait for a reply, in seconds.
+    """
+
+    name = "remote"
+
+    def __init__(self, socket_path: str, timeout: float = 30.0):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._local = threading.local()
+        self._identity: Optional[str] = None
+
+    def __getstate__(self):
+        return {"socket_path": self.socket_path, "timeout": self.timeout}
+
+    def __setstate__(self, state):
+        self.__init__(state["socket_path"], state["timeout"])
+
+    @property
+    def identity(self) -> str:
+        """The identity of the server's embedder, so vectors stay compatible."""
+        if self._identity is None:
+            self._identity = self._request({"op": "identity"})[0]["identity"]
+        return self._identity
+
+    def encode(self, text: str):
+        return self.encode_batch([text])[0]
+
+    def encode_batch(self, texts: List[str]):
+        header, payload = self._request({"op": "encode", "texts": list(texts)})
+        return np.frombuffer(payload, dtype=np.float32).reshape(header["shape"])
+
+    def stats(self) -> dict:
+        """Returns the server's batch and text counters."""
+        header, _ = self._request({"op": "stats"})
+        return {"batches": header["batches"], "texts": header["texts"]}
+
+    def close(self):
+        """Closes this thread's connection."""
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+    def _request(self, header: dict):
+        connection = getattr(self._local, "connection", None)
+        try:
+            if connection is None:
+                connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                connection.settimeout(self.timeout)
+                connection.connect(self.socket_path)
+                self._local.connection = connection
+            _send_frame(connection, header)
+            reply, payload = _recv_frame(connection)
+        except (OSError, ConnectionError) as e:
+            self.close()
+            raise EmbeddingServerError(
+                f"Embedding server at '{self.socket_path}' is unavailable: {e}"
+            ) from e
+        if "error" in reply:
+            raise EmbeddingServerError(reply["error"])
+        return reply, payload
+
+
+def _serve(socket_path: str, embedder, server_kwargs: dict):
+    EmbeddingServer(socket_path, embedder, **server_kwargs).serve()
+
+
+def start_server_process(
+    socket_path: str,
+    embedder="sentence-transformers",
+    startup_timeout: float = 60.0,
+    **server_kwargs,
+) -> multiprocessing.Process:
+    """Starts an `EmbeddingServer` in a new process and waits until it listens.
+
+    Args:
+        socket_path (str): The Unix socket to serve on.
+        embedder: An `Embedder` (picklable) or a name from `EMBEDDERS`.
+        startup_timeout (float): How long to wait for the socket to accept
+            connections.
+        **server_kwargs: `max_batch_size` and `max_wait` for the server.
+
+    Returns:
+        multiprocessing.Process: The server process; terminate it to stop.
+
+    Raises:
+        EmbeddingServerError: If the server does not come up in time.
+    """
+    # Spawned, not forked, so the model never shares state with the parent.
+    process = multiprocessing.get_context("spawn").Process(
+        target=_serve,
+        args=(socket_path, embedder, server_kwargs),
+        name="EmbeddingServer",
+        daemon=True,
+    )
+    process.start()
+    deadline = time.monotonic() + startup_timeout
+    while time.monotonic() < deadline:
+        if not process.is_alive():
+            raise EmbeddingServerError("The embedding server exited during startup.")
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(socket_path)
+            return process
+        except OSError:
+            time.sleep(0.05)
+        finally:
+            probe.close()
+    process.terminate()
+    raise EmbeddingServerError(
+        f"The embedding server did not start within {startup_timeout}s."
+    )
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Serves an embedding model to local agents over a Unix socket."
+    )
+    parser.add_argument("--socket", required=True)
+    parser.add_argument("--embedder", default="sentence-transformers")
+    parser.add_argument("--max-batch-size", type=int, default=64)
+    parser.add_argument("--max-wait", type=float, default=0.005)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    EmbeddingServer(
+        args.socket, args.embedder, args.max_batch_size, args.max_wait
+    ).serve()
+
+
+if __name__ == "__main__":
+    main()
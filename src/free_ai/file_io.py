@@ -0,0 +1,248 @@
+import atexit
+import logging
+import os
+import threading
+import time
+import uuid
+import weakref
+from collections import OrderedDict
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Every live AppendBuffer, so pending appends can be flushed at exit.
+_buffers: "weakref.WeakSet[AppendBuffer]" = weakref.WeakSet()
+
+
+def atomic_write(path: str, data: bytes, fsync: bool = True):
+    """Replaces a file's content atomically.
+
+    The data is written to a temporary file in the same directory, flushed
+    (and fsynced) and then renamed over the target, so readers and crashes
+    only ever observe the old or the new content, never a torn mix. An
+    existing file's permission bits are preserved.
+
+    Args:
+        path (str): The file to write.
+        data (bytes): The new content.
+        fsync (bool): Whether to fsync the file and its directory so the
+            new content survives a power loss, not just a process crash.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    tmp_path = os.path.join(
+        directory, f".{os.path.basename(path)}.{uuid.uuid4().hex}.tmp"
+    )
+    # Creating with 0o666 lets the umask apply exactly as for a plain open().
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            if fsync:
+                os.fsync(f.fileno())
+        try:
+            os.chmod(tmp_path, os.stat(path).st_mode & 0o7777)
+        except FileNotFoundError:
+            pass
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+    if fsync and hasattr(os, "O_DIRECTORY"):
+        dir_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+
+class AppendBuffer:
+    """Coalesces small appends to many files behind long-lived handles.
+
+    Appends are queued in memory per file and written with a single
+    `write` once a file has `max_bytes` pending or its oldest pending append
+    is `max_delay` seconds old. A daemon thread enforces the delay even when
+    no further appends arrive. At most `max_open` handles are kept; the
+    least recently used one is flushed and closed beyond that.
+
+    Data is only guaranteed to have reached the OS after `flush` (or
+    `close`) returns; it survives a crash of the process, but only
+    `flush(fsync=True)` also makes it survive a power loss. Pending appends
+    are also flushed when the interpreter exits normally. A forked child
+    starts with no pending appends (the parent still writes its own) and
+    its own flusher thread.
+
+    If the flusher thread fails to write a file, it logs the error and
+    stops, leaving the data pending: the next `flush` raises the error to
+    its caller, and the next `append` starts a new flusher.
+
+    Attributes:
+        max_bytes (int): The pending size that triggers a flush.
+        max_delay (float): The maximum age in seconds of a pending append.
+        max_open (int): The maximum number of open file handles.
+    """
+
+    def __init__(
+        self, max_bytes: int = 64 * 1024, max_delay: float = 0.5, max_open: int = 64
+    ):
+        """Initializes an empty buffer.
+
+        Args:
+            max_bytes (int): The pending size per file that triggers a flush.
+            max_delay (float): The maximum time an append may stay pending.
+            max_open (int): The maximum number of files kept open.
+        """
+        self.max_bytes = max_bytes
+        self.max_delay = max_delay
+        self.max_open = max_open
+        # Path -> [handle, pending chunks, pending size, oldest pending time]
+        self._files: "OrderedDict[str, list]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._flusher: Optional[threading.Thread] = None
+        self._closed = threading.Event()
+        _buffers.add(self)
+
+    def append(self, path: str, data: bytes):
+        """Queues data to be appended to a file.
+
+        Args:
+            path (str): The file to append to; it is created if missing.
+            data (bytes): The data to append.
+        """
+        with self._lock:
+            state = self._files.get(path)
+            if state is None:
+                state = [open(path, "ab"), [], 0, None]
+                self._files[path] = state
+                while len(self._files) > self.max_open:
+                    _, stale = self._files.popitem(last=False)
+                    self._write_pending(stale)
+                    stale[0].close()
+            self._files.move_to_end(path)
+            state[1].append(data)
+            state[2] += len(data)
+            if state[3] is None:
+                state[3] = time.monotonic()
+            if state[2] >= self.max_bytes or self.max_delay <= 0:
+                self._write_pending(state)
+            else:
+                self._ensure_flusher()
+
+    def pending(self, path: str) -> bool:
+        """Returns True if a file has appends that are not yet written."""
+        with self._lock:
+            state = self._files.get(path)
+            return bool(state and state[2])
+
+    def flush(self, path: Optional[str] = None, fsync: bool = False):
+        """Writes pending appends to disk.
+
+        Args:
+            path (Optional[str]): The file to flush, or None for all files.
+            fsync (bool): Whether to also fsync the flushed files, so the
+                data survives a power loss.
+        """
+        with self._lock:
+            if path is None:
+                states = list(self._files.values())
+            else:
+                states = [self._files[path]] if path in self._files else []
+            for state in states:
+                self._write_pending(state)
+                if fsync:
+                    os.fsync(state[0].fileno())
+
+    def release(self, path: str):
+        """Flushes and closes the handle of one file.
+
+        Must be called before a file is replaced (e.g. by `atomic_write`),
+        since the handle would otherwise keep appending to the old inode.
+        """
+        with self._lock:
+            state = self._files.pop(path, None)
+            if state is not None:
+                self._write_pending(state)
+                state[0].close()
+
+    def close(self):
+        """Flushes everything, closes all handles and stops the flusher.
+
+        The buffer remains usable; a later append reopens its file.
+        """
+        with self._lock:
+            self._closed.set()
+            self._closed = threading.Event()
+            self._flusher = None
+            while self._files:
+                _, state = self._files.popitem()
+                self._write_pending(state)
+                state[0].close()
+
+    def _after_fork(self):
+        """Resets the thread state inherited by a forked child."""
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self._flusher = None
+        for state in self._files.values():
+            state[1].clear()
+            state[2] = 0
+            state[3] = None
+
+    def _write_pending(self, state: list):
+        """Writes one file's pending chunks with a single call."""
+        if not state[2]:
+            return
+        state[0].write(b"".join(state[1]))
+        state[0].flush()
+        state[1].clear()
+        state[2] = 0
+        state[3] = None
+
+    def _ensure_flusher(self):
+        """Starts the background flusher thread on first use."""
+        if self._flusher is None:
+            self._flusher = threading.Thread(
+                target=self._flush_loop,
+                args=(self._closed,),
+                name="AppendBuffer-flusher",
+                daemon=True,
+            )
+            self._flusher.start()
+
+    def _flush_loop(self, closed: threading.Event):
+        """Periodically writes appends that have been pending too long."""
+        while not closed.wait(self.max_delay / 2):
+            deadline = time.monotonic() - self.max_delay
+            with self._lock:
+                failed = False
+                for path, state in self._files.items():
+                    if state[3] is not None and state[3] <= deadline:
+                        try:
+                            self._write_pending(state)
+                        except Exception as e:
+                            logger.error(f"Failed to flush appends to '{path}': {e}")
+                            failed = True
+                if failed:
+                    # Stop; the next append starts a fresh flusher.
+                    if closed is self._closed:
+                        self._flusher = None
+                    return
+
+
+def _close_all():
+    """Flushes and closes every live buffer; registered with atexit."""
+    for buffer in list(_buffers):
+        buffer.close()
+
+
+def _reset_after_fork():
+    for buffer in list(_buffers):
+        buffer._after_fork()
+
+
+atexit.register(_close_all)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
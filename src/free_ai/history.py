@@ -0,0 +1,231 @@
+import json
+import logging
+import os
+import tempfile
+import threading
+from array import array
+from collections import deque
+from typing import Iterator, List, Optional
+
+from .models import Event, json_default
+
+logger = logging.getLogger(__name__)
+
+
+class HistoryEvent(Event):
+    """A history event as kept by a `HistoryStore`.
+
+    Attributes:
+        ref (int): The spill file offset of the full result, or -1.
+    """
+
+    __slots__ = ("ref",)
+
+    def __init__(self, role=None, action=None, result=None, content=None, extra=None):
+        super().__init__(role, action, result, content, extra)
+        self.ref = -1
+
+    @classmethod
+    def from_dict(cls, event) -> "HistoryEvent":
+        compact = super().from_dict(event)
+        if compact is not event:
+            compact.ref = -1
+        return compact
+
+
+class HistoryStore:
+    """A goal's history, bounded in memory and spilled to disk.
+
+    The most recent `capacity` events are kept in memory as `HistoryEvent`
+    objects. Older events are appended to a spill file and only their
+    offsets are kept. Results whose JSON form is larger than
+    `max_payload_bytes` are spilled as soon as they are appended; in memory
+    they are replaced by a short preview, which is also what `last` returns,
+    so prompts built from the recent history stay small.
+
+    The store can be used like the plain list of event dicts it replaces:
+    `append`, `len`, iteration and indexing (including negative indices and
+    slices) work as before and return complete events, reading spilled data
+    back from disk when needed.
+
+    Attributes:
+        capacity (int): The number of events kept in memory.
+        max_payload_bytes (int): The size above which a result is spilled.
+        preview_chars (int): The length of the preview of a spilled result.
+        path (Optional[str]): The spill file, created on first spill.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        capacity: int = 64,
+        max_payload_bytes: int = 4096,
+        preview_chars: int = 200,
+    ):
+        """Initializes an empty store.
+
+        Args:
+            path (Optional[str]): The spill file. If None, a temporary file
+                is created when needed and deleted by `close`.
+            capacity (int): The number of recent events kept in memory.
+            max_payload_bytes (int): Results larger than this (as JSON) are
+                moved to the spill file.
+            preview_chars (int): How much of a spilled result's content is
+                kept in memory.
+        """
+        self.capacity = capacity
+        self.max_payload_bytes = max_payload_bytes
+        self.preview_chars = preview_chars
+        self.path = path
+        self._owns_file = path is None
+        self._events: deque = deque()
+        self._spilled = array("q")
+        self._last_result_index = -1
+        self._writer = None
+        self._reader = None
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._spilled) + len(self._events)
+
+    def __iter__(self) -> Iterator[dict]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        with self._lock:
+            length = len(self._spilled) + len(self._events)
+            if index < 0:
+                index += length
+            if not 0 <= index < length:
+                raise IndexError("history index out of range")
+            if index < len(self._spilled):
+                record = self._read(self._spilled[index])
+                event = HistoryEvent.from_dict(record.get("event", {}))
+                event.ref = record.get("ref", -1)
+            else:
+                event = self._events[index - len(self._spilled)]
+            return self._full(event)
+
+    def append(self, event: dict):
+        """Adds an event, spilling its result or the oldest event if needed.
+
+        Args:
+            event (dict): An event such as `{"role": "body", "action": ...,
+                "result": ...}`.
+        """
+        compact = HistoryEvent.from_dict(event)
+        if compact is event:
+            # The stored event's result may be replaced by a preview, so
+            # never keep (and change) the caller's object.
+            compact = event.copy()
+        with self._lock:
+            if compact.result is not None:
+                encoded = json.dumps(compact.result, default=json_default)
+                if len(encoded) > self.max_payload_bytes:
+                    compact.ref = self._write(encoded)
+                    compact.result = self._preview(compact.result)
+            if compact.role == "body" and "result" in event:
+                self._last_result_index = len(self)
+            if len(self._events) >= self.capacity:
+                oldest = self._events.popleft()
+                record = {"event": oldest.to_dict(), "ref": oldest.ref}
+                self._spilled.append(
+                    self._write(json.dumps(record, default=json_default))
+                )
+            self._events.append(compact)
+
+    def last(self, n: int) -> List[dict]:
+        """Returns the last `n` events, with previews of spilled results.
+
+        Args:
+            n (int): The number of events.
+
+        Returns:
+            List[dict]: The events, oldest first.
+        """
+        with self._lock:
+            recent = list(self._events)[-n:] if n > 0 else []
+        if len(recent) < n and self._spilled:
+            start = max(0, len(self._spilled) - (n - len(recent)))
+            older = []
+            for index in range(start, len(self._spilled)):
+                with self._lock:
+                    record = self._read(self._spilled[index])
+                event = HistoryEvent.from_dict(record.get("event", {}))
+                older.append(event)
+            recent = older + recent
+        return [event.to_dict() for event in recent]
+
+    def last_tool_result(self):
+        """Returns the complete result of the most recent action, or None."""
+        if self._last_result_index < 0:
+            return None
+        return self[self._last_result_index].get("result")
+
+    def close(self):
+        """Closes the spill file, deleting it if the store created it."""
+        with self._lock:
+            for handle in (self._writer, self._reader):
+                if handle is not None:
+                    handle.close()
+            self._writer = self._reader = None
+            if self._owns_file and self.path is not None:
+                try:
+                    os.unlink(self.path)
+                except FileNotFoundError:
+                    pass
+                self.path = None
+
+    def _full(self, event: HistoryEvent) -> dict:
+        """Returns an event as a dict with its spilled result loaded."""
+        full = event.to_dict()
+        if event.ref >= 0:
+            full["result"] = self._read(event.ref)
+        return full
+
+    def _preview(self, result):
+        """Returns the in-memory stand-in for a spilled result."""
+        if isinstance(result, dict):
+            preview = {key: value for key, value in result.items() if key != "content"}
+            content = str(result.get("content", ""))
+        else:
+            preview = {}
+            content = str(result)
+        preview["content"] = content[: self.preview_chars]
+        preview["truncated"] = True
+        return preview
+
+    def _write(self, line: str) -> int:
+        """Appends one line to the spill file and returns its offset."""
+        if self._writer is None:
+            if self.path is None:
+                fd, self.path = tempfile.mkstemp(
+                    prefix="free_ai_history_", suffix=".jsonl"
+                )
+                os.close(fd)
+            self._writer = open(self.path, "ab")
+            self._size = self._writer.tell()
+        offset = self._size
+        data = (line + "\n").encode("utf-8")
+        self._writer.write(data)
+        self._size += len(data)
+        return offset
+
+    def _read(self, offset: int):
+        """Reads the JSON line at `offset` of the spill file."""
+        self._writer.flush()
+        if self._reader is None:
+            self._reader = open(self.path, "rb")
+        self._reader.seek(offset)
+        return json.loads(self._reader.readline())
+
+
+def recent_events(history, n: int) -> List[dict]:
+    """Returns the last `n` events of a `HistoryStore` or a plain list."""
+    if isinstance(history, HistoryStore):
+        return history.last(n)
+    return list(history[-n:]) if n > 0 else []
@@ -1,4 +1,8 @@
 import logging
+from typing import Optional
+
+from .sandbox import SkillSandbox
+from .skill_registry import SkillRegistry
 
 logger = logging.getLogger(__name__)
 
@@ -10,18 +14,42 @@ class LearningAnnex:
     expand its capabilities. It can execute a string of Python code, which is
     expected to define and instantiate a new tool. This allows the agent to
     create and integrate new functionalities at runtime.
+
+    When given a `SkillRegistry`, every successfully learned skill is
+    persisted there, and compiled code is reused from the registry's cache
+    instead of being recompiled. When given a `SkillSandbox`, skill code is
+    never executed in the agent's own process: it is loaded into an isolated
+    worker and the returned tool proxies its calls there.
+
+    Attributes:
+        registry (Optional[SkillRegistry]): Where learned skills are stored.
+        sandbox (Optional[SkillSandbox]): Where learned skills are executed.
     """
 
-    def __init__(self):
-        """Initializes the Learning Annex."""
+    def __init__(
+        self,
+        registry: Optional[SkillRegistry] = None,
+        sandbox: Optional[SkillSandbox] = None,
+    ):
+        """Initializes the Learning Annex.
+
+        Args:
+            registry (Optional[SkillRegistry]): A registry to persist learned
+                skills in. If None, skills only live for this process.
+            sandbox (Optional[SkillSandbox]): A sandbox to run skill code in.
+                If None, skills are executed in-process with `exec`.
+        """
+        self.registry = registry
+        self.sandbox = sandbox
         logger.info("Learning Annex forge is lit. Ready to create new skills.")
 
     def learn_new_skill(self, skill_code: str) -> dict:
         """Executes Python code to define and instantiate a new tool.
 
-        This method uses `exec` to run the provided code. The code must
-        create an instance of a new tool class and assign it to a variable
-        named `new_tool` in the local namespace.
+        This method uses `exec` to run the provided code, inside the sandbox
+        if one is configured. The code must create an instance of a new tool
+        class and assign it to a variable named `new_tool` in the local
+        namespace.
 
         Args:
             skill_code (str): A string containing the Python code for the new skill.
@@ -29,14 +57,17 @@ class LearningAnnex:
         Returns:
             dict: A dictionary containing the result of the operation.
                 On success, it includes `{'status': 'success', 'new_tool': ...,
-                'tool_name': ...}`.
+                'tool_name': ...}` (plus `skill_hash` when a registry is set).
                 On failure, it includes `{'status': 'error', 'message': ...}`.
         """
+        if self.sandbox is not None:
+            return self._learn_in_sandbox(skill_code)
         try:
             local_namespace = {}
             global_namespace = {}
 
-            exec(skill_code, global_namespace, local_namespace)
+            code = self.registry.compile(skill_code) if self.registry else skill_code
+            exec(code, global_namespace, local_namespace)
 
             if "new_tool" in local_namespace:
                 new_tool = local_namespace["new_tool"]
@@ -46,11 +77,18 @@ class LearningAnnex:
                     f"Successfully learned and created new tool: '{tool_name}'."
                 )
 
-                return {
+                result = {
                     "status": "success",
                     "new_tool": new_tool,
                     "tool_name": tool_name,
                 }
+                if self.registry is not None:
+                    result["skill_hash"] = self.registry.register(
+                        tool_name,
+                        skill_code,
+                        getattr(new_tool, "description", ""),
+                    )
+                return result
             else:
                 error_message = "The skill code did not produce a 'new_tool' object."
                 logger.error(error_message)
@@ -60,3 +98,31 @@ class LearningAnnex:
             error_message = f"Error during skill acquisition: {type(e).__name__}: {e}"
             logger.error(error_message, exc_info=True)
             return {"status": "error", "message": error_message}
+
+    def _learn_in_sandbox(self, skill_code: str) -> dict:
+        """Loads a skill into the sandbox and returns its proxy tool.
+
+        Args:
+            skill_code (str): A string containing the Python code for the new skill.
+
+        Returns:
+            dict: The same result format as `learn_new_skill`.
+        """
+        try:
+            new_tool = self.sandbox.load(skill_code)
+        except Exception as e:
+            error_message = f"Error during skill acquisition: {type(e).__name__}: {e}"
+            logger.error(error_message)
+            return {"status": "error", "message": error_message}
+
+        logger.info(f"Successfully learned sandboxed tool: '{new_tool.name}'.")
+        result = {
+            "status": "success",
+            "new_tool": new_tool,
+            "tool_name": new_tool.name,
+        }
+        if self.registry is not None:
+            result["skill_hash"] = self.registry.register(
+                new_tool.name, skill_code, new_tool.description
+            )
+        return result
@@ -1,11 +1,32 @@
+import bisect
+import heapq
 import logging
 import os
-import chromadb
+import re
+import threading
+import time
 import uuid
-from sentence_transformers import SentenceTransformer
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from .embedders import EmbedderMismatchError, embedder_identity, get_embedder
+from .logs import log_event
+from .tracing import traced
 
 logger = logging.getLogger(__name__)
 
+# Namespaces become part of a collection name, so they are restricted to
+# the characters ChromaDB allows there.
+_NAMESPACE_PATTERN = re.compile(r"^[A-Za-z0-9]([A-Za-z0-9._-]{0,200}[A-Za-z0-9])?$")
+
+# With recency weighting, this many times `n_results` candidates are
+# fetched per shard before they are re-ranked by age.
+RECENCY_CANDIDATES = 4
+# Metadata is read in pages of this many documents when a shard's index is
+# built; ChromaDB cannot return very large collections in one call.
+INDEX_PAGE_SIZE = 5000
+
 
 class VectorMemory:
     """A persistent, semantic memory store for agents using vector embeddings.
@@ -15,33 +36,119 @@ class VectorMemory:
     allows for efficient semantic search, enabling agents to recall relevant
     information based on meaning rather than keywords.
 
+    The embedder is pluggable (see `free_ai.embedders`). By default texts
+    are embedded with a sentence-transformer; the dependency-free
+    `HashingEmbedder` can be selected for CPU-only or air-gapped hosts. The
+    embedder's identity is stored in the collection's metadata, and opening
+    a collection with a different embedder fails, so vectors from
+    different embedders are never mixed.
+
+    Memories can be split into namespaces (e.g. per role or project). Each
+    namespace is a shard: a separate collection with its own index, so
+    writes to different namespaces do not contend and a query only scans
+    the namespaces it asks for. Queries over several namespaces run on a
+    thread pool, one shard per task, and the results are merged by
+    distance. The default namespace (None) is the original "collective
+    unconscious" collection.
+
+    Every document records its source, a numeric creation `timestamp`
+    (seconds since the epoch) and its tags (as boolean `tag:<name>` keys).
+    Queries can filter on these. Each shard has an in-memory index of its
+    document ids by source, tag and timestamp, built on the first filtered
+    query and kept current by `add`. The index selects the matching ids,
+    and only those are searched (ChromaDB's `ids=`), instead of ChromaDB
+    scanning the metadata of the whole collection. The index is rebuilt
+    when the shard's document count no longer matches it, e.g. after
+    another process added documents. An additional `where` filter is
+    still evaluated by ChromaDB. Queries can also weight results by
+    recency.
+
+    Shard handles are opened on first use and kept in an LRU of at most
+    `max_loaded_shards`; cold shards can also be unloaded explicitly. With
+    `cache_limit_bytes`, ChromaDB itself evicts the indexes of cold shards
+    from memory once the limit is reached.
+
+    `chromadb` is imported when a memory is created, and
+    `sentence_transformers` (which pulls in torch) only when the first text
+    is embedded, so importing this module, or starting an agent that never
+    touches its memory, stays cheap.
+
     Attributes:
         client: The ChromaDB client instance.
-        embedding_model: The SentenceTransformer model used for embeddings.
-        collection_name (str): The name of the ChromaDB collection.
-        collection: The ChromaDB collection object.
+        embedding_model: The embedder used for all texts in the collection.
+        embedder_identity (str): The identity recorded in the collection.
+        collection_name (str): The name of the default namespace's collection;
+            other namespaces are stored as "<collection_name>.<namespace>".
+        collection: The ChromaDB collection of the default namespace.
+        max_loaded_shards (Optional[int]): The most shard handles kept open.
+        query_workers (int): The threads used to query several shards.
     """
 
-    def __init__(self, path="./collective_memory_db"):
+    # The identity assumed for collections created before it was recorded.
+    LEGACY_EMBEDDER = "sentence-transformers:all-MiniLM-L6-v2"
+
+    def __init__(
+        self,
+        path="./collective_memory_db",
+        embedding_model=None,
+        max_loaded_shards: Optional[int] = None,
+        query_workers: int = 4,
+        cache_limit_bytes: int = 0,
+    ):
         """Initializes the VectorMemory database.
 
-        Sets up a persistent ChromaDB client at the specified path and
-        initializes the sentence-transformer model for creating embeddings.
+        Sets up a persistent ChromaDB client at the specified path. A
+        sentence-transformer model is only loaded on first use.
 
         Args:
             path (str): The file system path to store the database.
+            embedding_model (optional): The embedder: a name from
+                `free_ai.embedders.EMBEDDERS` (e.g. "hashing"), an `Embedder`,
+                or any object with an `encode(text)` method returning a
+                vector (e.g. a deterministic stub offline). Defaults to the
+                "all-MiniLM-L6-v2" sentence-transformer.
+            max_loaded_shards (Optional[int]): How many namespaces may be
+                open at once; the least recently used one is unloaded beyond
+                that. None means no limit.
+            query_workers (int): The number of threads for fan-out queries.
+            cache_limit_bytes (int): If positive, ChromaDB keeps shard
+                indexes in an LRU cache of this size instead of keeping
+                every loaded index in memory.
+
+        Raises:
+            EmbedderMismatchError: If the collection was built with a
+                different embedder.
         """
         logger.info(f"Initializing VectorMemory at path: {path}")
-        try:
-            self.client = chromadb.PersistentClient(path=path)
-            model_cache_path = os.path.join(path, "st_cache")
-            self.embedding_model = SentenceTransformer(
-                "all-MiniLM-L6-v2", device="cpu", cache_folder=model_cache_path
+        if embedding_model is None or embedding_model == "sentence-transformers":
+            embedding_model = get_embedder(
+                "sentence-transformers", cache_folder=os.path.join(path, "st_cache")
             )
+        self.embedding_model = get_embedder(embedding_model)
+        self.embedder_identity = embedder_identity(self.embedding_model)
+        self.max_loaded_shards = max_loaded_shards
+        self.query_workers = query_workers
+        self._shards: "OrderedDict[Optional[str], object]" = OrderedDict()
+        self._indexes: Dict[Optional[str], _MetadataIndex] = {}
+        self._shards_lock = threading.Lock()
+        self._pool: Optional[ThreadPoolExecutor] = None
+        try:
+            import chromadb
+
+            if cache_limit_bytes > 0:
+                from chromadb.config import Settings
+
+                self.client = chromadb.PersistentClient(
+                    path=path,
+                    settings=Settings(
+                        chroma_segment_cache_policy="LRU",
+                        chroma_memory_limit_bytes=cache_limit_bytes,
+                    ),
+                )
+            else:
+                self.client = chromadb.PersistentClient(path=path)
             self.collection_name = "collective_unconscious"
-            self.collection = self.client.get_or_create_collection(
-                name=self.collection_name
-            )
+            self.collection = self._shard(None)
             logger.info(
                 f"VectorMemory initialized. Collective Unconscious '{self.collection_name}' is online."
             )
@@ -49,7 +156,133 @@ class VectorMemory:
             logger.error(f"Failed to initialize VectorMemory: {e}", exc_info=True)
             raise
 
-    def add(self, text: str, metadata: dict = None):
+    def _open_collection(self, name: str, create: bool = True):
+        """Opens a collection and checks that it matches the embedder.
+
+        Raises:
+            NotFoundError: If `create` is False and the collection does not
+                exist.
+        """
+        if create:
+            collection = self.client.get_or_create_collection(
+                name=name, metadata={"embedder": self.embedder_identity}
+            )
+        else:
+            collection = self.client.get_collection(name=name)
+        metadata = collection.metadata or {}
+        recorded = metadata.get("embedder")
+        if recorded is None:
+            # Collections from older versions were always embedded with the
+            # default sentence-transformer.
+            if collection.count() > 0:
+                recorded = self.LEGACY_EMBEDDER
+            if recorded in (None, self.embedder_identity):
+                collection.modify(
+                    metadata=dict(metadata, embedder=self.embedder_identity)
+                )
+                recorded = self.embedder_identity
+        if recorded != self.embedder_identity:
+            raise EmbedderMismatchError(
+                f"Collection '{name}' was embedded with "
+                f"'{recorded}', not '{self.embedder_identity}'."
+            )
+        return collection
+
+    def _collection_for(self, namespace: Optional[str]) -> str:
+        """Returns the name of the collection holding a namespace."""
+        if namespace is None:
+            return self.collection_name
+        if not _NAMESPACE_PATTERN.match(namespace):
+            raise ValueError(
+                f"Invalid namespace '{namespace}': use letters, digits, '.', '_' "
+                "and '-', starting and ending with a letter or digit."
+            )
+        return f"{self.collection_name}.{namespace}"
+
+    def _shard(self, namespace: Optional[str], create: bool = True):
+        """Returns the collection of a namespace, opening it if needed.
+
+        Args:
+            namespace (Optional[str]): The namespace.
+            create (bool): Whether to create the collection if the namespace
+                has none yet. Reads pass False, so that querying an unknown
+                namespace does not create one on disk.
+
+        Returns:
+            The collection, or None if it does not exist and `create` is
+            False.
+
+        Raises:
+            ValueError: If the namespace is not a valid name.
+        """
+        with self._shards_lock:
+            collection = self._shards.get(namespace)
+            if collection is not None:
+                self._shards.move_to_end(namespace)
+                return collection
+            name = self._collection_for(namespace)
+            # Imported here: chromadb is only loaded once a memory exists.
+            from chromadb.errors import NotFoundError
+
+            try:
+                collection = self._open_collection(name, create)
+            except NotFoundError:
+                return None
+            self._shards[namespace] = collection
+            if self.max_loaded_shards is not None:
+                # The default namespace stays loaded; it backs `collection`.
+                for cold in list(self._shards):
+                    if len(self._shards) <= self.max_loaded_shards:
+                        break
+                    if cold is not None and cold != namespace:
+                        del self._shards[cold]
+                        self._indexes.pop(cold, None)
+                        logger.info(f"Unloaded cold memory namespace '{cold}'.")
+            return collection
+
+    def namespaces(self) -> List[Optional[str]]:
+        """Returns every namespace stored in the database, default first."""
+        prefix = self.collection_name + "."
+        names = []
+        for collection in self.client.list_collections():
+            name = getattr(collection, "name", collection)
+            if name.startswith(prefix):
+                names.append(name.split(".", 1)[1])
+        return [None] + sorted(names)
+
+    def loaded_namespaces(self) -> List[Optional[str]]:
+        """Returns the namespaces whose shards are open, least recent first."""
+        with self._shards_lock:
+            return list(self._shards)
+
+    def unload(self, namespace: str):
+        """Drops the handle of a namespace's shard; it reopens on next use.
+
+        Args:
+            namespace (str): The namespace to unload. The default namespace
+                cannot be unloaded.
+        """
+        if namespace is None:
+            return
+        with self._shards_lock:
+            self._indexes.pop(namespace, None)
+            if self._shards.pop(namespace, None) is not None:
+                logger.info(f"Unloaded memory namespace '{namespace}'.")
+
+    def close(self):
+        """Shuts down the query thread pool; it is recreated if needed."""
+        pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True)
+
+    @traced("memory.add")
+    def add(
+        self,
+        text: str,
+        metadata: dict = None,
+        namespace: Optional[str] = None,
+        tags: Optional[Iterable[str]] = None,
+    ):
         """Adds a text document to the vector memory.
 
         The text is encoded into a vector embedding and stored in the
@@ -58,82 +291,303 @@ class VectorMemory:
         Args:
             text (str): The text content to add to the memory.
             metadata (dict, optional): A dictionary of metadata to associate
-                with the text. Defaults to None.
+                with the text. A "source" of "unknown" and the current time
+                as "timestamp" are added unless given. Defaults to None.
+            namespace (Optional[str]): The namespace to store the text in,
+                or None for the default one.
+            tags (Optional[Iterable[str]]): Tags to file the text under, for
+                filtering queries by tag.
         """
         try:
-            logger.info(f"Adding text to collective memory: '{text[:50]}...'")
+            log_event(
+                logger,
+                logging.INFO,
+                "Adding text to collective memory: '%.50s...'",
+                text,
+                namespace=namespace,
+            )
             embedding = self.embedding_model.encode(text).tolist()
             doc_id = str(uuid.uuid4())
 
-            # ChromaDB requires metadata to be a non-empty dict.
-            final_metadata = (
-                metadata
-                if metadata
-                else {"source": "unknown", "timestamp": str(uuid.uuid4())}
-            )
+            final_metadata = dict(metadata or {})
+            final_metadata.setdefault("source", "unknown")
+            final_metadata.setdefault("timestamp", time.time())
+            for tag in tags or ():
+                final_metadata[f"tag:{tag}"] = True
 
-            self.collection.add(
+            self._shard(namespace).add(
                 embeddings=[embedding],
                 documents=[text],
                 metadatas=[final_metadata],
                 ids=[doc_id],
             )
-            logger.info(
-                f"Successfully added document with ID {doc_id} to collective memory."
+            index = self._indexes.get(namespace)
+            if index is not None:
+                index.add(doc_id, final_metadata)
+            log_event(
+                logger,
+                logging.INFO,
+                "Added a document to collective memory.",
+                doc_id=doc_id,
+                namespace=namespace,
             )
         except Exception as e:
             logger.error(f"Failed to add text to collective memory: {e}", exc_info=True)
 
-    def query(self, query_text: str, n_results: int = 3) -> list[str]:
+    @traced("memory.query")
+    def query(
+        self,
+        query_text: str,
+        n_results: int = 3,
+        namespaces: Optional[Iterable[Optional[str]]] = None,
+        source=None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        tags: Optional[Iterable[str]] = None,
+        where: Optional[dict] = None,
+        recency_half_life: Optional[float] = None,
+    ) -> list[str]:
         """Performs a semantic search on the vector memory.
 
         Encodes the query text into an embedding and searches the collection
-        for the most semantically similar documents.
+        for the most semantically similar documents. When several namespaces
+        are given, their shards are searched concurrently and the closest
+        documents overall are returned.
 
         Args:
             query_text (str): The text to search for.
             n_results (int): The maximum number of results to return.
+            namespaces (Optional[Iterable[Optional[str]]]): The namespaces to
+                search, e.g. `[None, "Researcher"]` for the default one and
+                a role's own. Defaults to the default namespace only.
+            source (Optional[Union[str, list]]): Only return documents from
+                this source, or from any of these sources.
+            since (Optional[float]): Only return documents added at or after
+                this time (seconds since the epoch).
+            until (Optional[float]): Only return documents added at or before
+                this time.
+            tags (Optional[Iterable[str]]): Only return documents having all
+                of these tags.
+            where (Optional[dict]): An additional ChromaDB `where` filter,
+                evaluated by ChromaDB rather than the metadata index.
+            recency_half_life (Optional[float]): If given, older documents
+                are ranked lower: a document's similarity to the query is
+                halved for every this many seconds of its age.
 
         Returns:
             list[str]: A list of the most relevant document texts found.
+                Namespaces that do not exist yet contribute no documents.
+
+        Raises:
+            ValueError: If a namespace is not a valid name.
         """
+        namespaces = list(namespaces or [None])
+        for namespace in namespaces:
+            self._collection_for(namespace)
         try:
-            logger.info(f"Querying collective memory with: '{query_text[:50]}...'")
-            if self.collection.count() == 0:
-                logger.warning("Query attempted on an empty collection.")
+            log_event(
+                logger,
+                logging.INFO,
+                "Querying collective memory with: '%.50s...'",
+                query_text,
+                namespaces=namespaces,
+            )
+            indexed = source is not None or since is not None or until is not None
+            indexed = indexed or bool(tags)
+            shards = []
+            for namespace in namespaces:
+                collection = self._shard(namespace, create=False)
+                count = collection.count() if collection is not None else 0
+                if count == 0:
+                    continue
+                ids = None
+                if indexed:
+                    ids = self._index(namespace, collection, count).select(
+                        source, since, until, tags
+                    )
+                    if not ids:
+                        continue
+                    if len(ids) == count:
+                        ids = None  # The filters match the whole shard.
+                shards.append((collection, count, ids))
+            if not shards:
+                logger.warning("Query found no documents to search.")
                 return []
 
             query_embedding = self.embedding_model.encode(query_text).tolist()
+            fetch = n_results
+            if recency_half_life:
+                fetch = n_results * RECENCY_CANDIDATES
 
-            results = self.collection.query(
-                query_embeddings=[query_embedding],
-                n_results=min(
-                    n_results, self.collection.count()
-                ),  # Ensure n_results <= collection count
-            )
+            def search(shard):
+                collection, count, ids = shard
+                size = count if ids is None else len(ids)
+                return _nearest(
+                    collection, query_embedding, min(fetch, size), where, ids
+                )
 
-            retrieved_docs = results.get("documents", [[]])[0]
-            logger.info(
-                f"Query returned {len(retrieved_docs)} results from collective memory."
+            if len(shards) == 1:
+                matches = search(shards[0])
+            else:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(
+                        max_workers=self.query_workers,
+                        thread_name_prefix="VectorMemory",
+                    )
+                matches = []
+                for shard_matches in self._pool.map(search, shards):
+                    matches.extend(shard_matches)
+            if recency_half_life:
+                matches = _weight_by_recency(matches, recency_half_life, time.time())
+            matches = heapq.nsmallest(n_results, matches, key=lambda m: m[0])
+
+            retrieved_docs = [document for _, document, _ in matches]
+            log_event(
+                logger,
+                logging.INFO,
+                "Query returned results from collective memory.",
+                results=len(retrieved_docs),
             )
             return retrieved_docs
         except Exception as e:
             logger.error(f"Failed to query collective memory: {e}", exc_info=True)
             return []
 
+    def _index(self, namespace: Optional[str], collection, count: int):
+        """Returns the shard's metadata index, building it if it is stale."""
+        index = self._indexes.get(namespace)
+        if index is None or index.count != count:
+            index = _MetadataIndex.build(collection)
+            self._indexes[namespace] = index
+        return index
+
     def clear(self):
-        """Clears all documents from the memory collection.
+        """Clears all documents from the default namespace's collection.
 
         This deletes and recreates the collection, effectively wiping all
-        stored memories.
+        memories stored outside of named namespaces.
         """
         logger.warning(
             f"Clearing all documents from collection '{self.collection_name}'."
         )
         self.client.delete_collection(name=self.collection_name)
-        self.collection = self.client.get_or_create_collection(
-            name=self.collection_name
-        )
+        with self._shards_lock:
+            self._shards.pop(None, None)
+            self._indexes.pop(None, None)
+        self.collection = self._shard(None)
         logger.info(
             f"Collection '{self.collection_name}' has been cleared and recreated."
         )
+
+
+def _nearest(
+    collection,
+    query_embedding: list,
+    n_results: int,
+    where: Optional[dict],
+    ids: Optional[Set[str]] = None,
+) -> List[Tuple[float, str, Optional[dict]]]:
+    """Runs one ChromaDB query and returns (distance, document, metadata)."""
+    results = collection.query(
+        query_embeddings=[query_embedding],
+        ids=list(ids) if ids is not None else None,
+        n_results=n_results,
+        where=where,
+        include=["documents", "distances", "metadatas"],
+    )
+    metadatas = results.get("metadatas") or [[None] * len(results["documents"][0])]
+    return list(zip(results["distances"][0], results["documents"][0], metadatas[0]))
+
+
+class _MetadataIndex:
+    """The document ids of one shard by source, tag and timestamp.
+
+    Attributes:
+        count (int): The number of documents indexed.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self._by_source: Dict[str, Set[str]] = {}
+        self._by_tag: Dict[str, Set[str]] = {}
+        # Timestamps in ascending order, and the ids they belong to.
+        self._times: List[float] = []
+        self._timed_ids: List[str] = []
+        self._lock = threading.Lock()
+
+    @classmethod
+    def build(cls, collection) -> "_MetadataIndex":
+        """Indexes every document in a ChromaDB collection."""
+        index = cls()
+        offset = 0
+        while True:
+            page = collection.get(
+                include=["metadatas"], limit=INDEX_PAGE_SIZE, offset=offset
+            )
+            for doc_id, metadata in zip(page["ids"], page["metadatas"]):
+                index.add(doc_id, metadata or {})
+            if len(page["ids"]) < INDEX_PAGE_SIZE:
+                return index
+            offset += INDEX_PAGE_SIZE
+
+    def add(self, doc_id: str, metadata: dict):
+        """Adds one document to the index."""
+        with self._lock:
+            self.count += 1
+            source = metadata.get("source")
+            if isinstance(source, str):
+                self._by_source.setdefault(source, set()).add(doc_id)
+            for key, value in metadata.items():
+                if value is True and key.startswith("tag:"):
+                    self._by_tag.setdefault(key[4:], set()).add(doc_id)
+            timestamp = metadata.get("timestamp")
+            if isinstance(timestamp, (int, float)) and not isinstance(timestamp, bool):
+                # Documents mostly arrive in time order, so this appends.
+                position = bisect.bisect_right(self._times, timestamp)
+                self._times.insert(position, timestamp)
+                self._timed_ids.insert(position, doc_id)
+
+    def select(self, source, since, until, tags) -> Set[str]:
+        """Returns the ids of the documents matching every given filter.
+
+        Args:
+            source (Optional[Union[str, list]]): A source, or any of several.
+            since (Optional[float]): The earliest timestamp, inclusive.
+            until (Optional[float]): The latest timestamp, inclusive.
+            tags (Optional[Iterable[str]]): Tags every document must have.
+        """
+        with self._lock:
+            candidates = []
+            if source is not None:
+                names = [source] if isinstance(source, str) else source
+                candidates.append(
+                    set().union(*(self._by_source.get(name, ()) for name in names))
+                )
+            if since is not None or until is not None:
+                low = 0 if since is None else bisect.bisect_left(self._times, since)
+                high = len(self._times)
+                if until is not None:
+                    high = bisect.bisect_right(self._times, until)
+                in_range = self._timed_ids[low:high]
+                candidates.append(set(in_range))
+            for tag in tags or ():
+                candidates.append(self._by_tag.get(tag, set()))
+        candidates.sort(key=len)
+        return candidates[0].intersection(*candidates[1:])
+
+
+def _weight_by_recency(matches: list, half_life: float, now: float) -> list:
+    """Re-scores matches by similarity and age, lower still being better.
+
+    The similarity `1 / (1 + distance)` is halved for every `half_life`
+    seconds of a document's age. Documents without a numeric timestamp
+    (e.g. from older versions) are not penalized.
+    """
+    weighted = []
+    for distance, document, metadata in matches:
+        score = 1.0 / (1.0 + distance)
+        timestamp = (metadata or {}).get("timestamp")
+        if isinstance(timestamp, (int, float)):
+            score *= 0.5 ** (max(0.0, now - timestamp) / half_life)
+        weighted.append((-score, document, metadata))
+    return weighted
@@ -0,0 +1,316 @@
+import json
+from collections.abc import Mapping, MutableMapping
+from typing import Iterator, List, Optional, Tuple
+
+# The action types a plan step may have.
+VALID_ACTIONS = frozenset(
+    {
+        "use_tool",
+        "express_personality",
+        "delegate_task",
+        "wait_for_reply",
+        "final_answer",
+        "error",
+    }
+)
+
+
+class ModelError(ValueError):
+    """Raised when data cannot be parsed into a model.
+
+    Attributes:
+        index (Optional[int]): The position of the offending step, when
+            parsing a plan.
+    """
+
+    def __init__(self, message: str, index: Optional[int] = None):
+        super().__init__(message)
+        self.index = index
+
+
+class Model(MutableMapping):
+    """The base of the slotted models, usable wherever a dict was.
+
+    A model stores its known keys in slots and any other keys in `extra`,
+    and implements the mutable mapping protocol over both, so `m["key"]`,
+    `m.get("key")`, `dict(m)`, `dict(m, key=value)` and comparisons with
+    dicts behave as for the dict the model replaces. A field that is None
+    counts as absent, unless it is one of the fields that are always
+    present.
+
+    Attributes:
+        extra (Optional[dict]): Keys that are not fields, or None.
+    """
+
+    __slots__ = ("extra",)
+
+    # The field names, in the order used for iteration and serialization.
+    _fields: Tuple[str, ...] = ()
+    _field_set: frozenset = frozenset()
+    # Fields that are present even when None.
+    _always: frozenset = frozenset()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._field_set = frozenset(cls._fields)
+
+    @classmethod
+    def from_dict(cls, data: Mapping):
+        """Builds a model from a mapping without validating it."""
+        # Models are ABCs, so skip the costly isinstance check for dicts.
+        if type(data) is not dict and isinstance(data, cls):
+            return data
+        # Every model's __init__ takes its fields in `_fields` order.
+        model = cls(*map(data.get, cls._fields))
+        if not cls._field_set.issuperset(data):
+            model.extra = {key: data[key] for key in data if key not in cls._field_set}
+        return model
+
+    def to_dict(self) -> dict:
+        """Returns the model as a plain dict."""
+        data = {}
+        for field in self._fields:
+            value = getattr(self, field)
+            if value is not None or field in self._always:
+                data[field] = value
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    def copy(self):
+        """Returns a shallow copy of the model."""
+        return type(self).from_dict(self.to_dict())
+
+    def __getitem__(self, key):
+        if key in self._field_set:
+            value = getattr(self, key)
+            if value is not None or key in self._always:
+                return value
+        elif self.extra is not None and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key in self._field_set:
+            setattr(self, key, value)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+
+    def __delitem__(self, key):
+        if key in self._field_set:
+            if getattr(self, key) is None and key not in self._always:
+                raise KeyError(key)
+            setattr(self, key, None)
+        elif self.extra is not None and key in self.extra:
+            del self.extra[key]
+        else:
+            raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        for field in self._fields:
+            if field in self._always or getattr(self, field) is not None:
+                yield field
+        if self.extra:
+            yield from self.extra
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+class Action(Model):
+    """One step of a plan, as proposed by the Oracle.
+
+    Attributes:
+        action (str): The action type, one of `VALID_ACTIONS`.
+        tool_name (Optional[str]): The tool a "use_tool" step calls.
+        arguments (Optional[dict]): The step's arguments.
+        extra (Optional[dict]): Other keys, e.g. an error step's "message".
+    """
+
+    __slots__ = ("action", "tool_name", "arguments")
+    _fields = ("action", "tool_name", "arguments")
+    _always = frozenset({"action"})
+
+    def __init__(
+        self,
+        action: str,
+        tool_name: Optional[str] = None,
+        arguments: Optional[dict] = None,
+        extra: Optional[dict] = None,
+    ):
+        self.action = action
+        self.tool_name = tool_name
+        self.arguments = arguments
+        self.extra = extra
+
+    @classmethod
+    def parse(cls, data, tools: Optional[Mapping] = None) -> "Action":
+        """Builds and validates a step in one pass.
+
+        Args:
+            data: A step as decoded from the Oracle's JSON, or an `Action`.
+            tools (Optional[Mapping]): The available tools; if given, a
+                "use_tool" step must name one of them.
+
+        Returns:
+            Action: The step.
+
+        Raises:
+            ModelError: If the step is not an object, has an unknown action
+                type, non-object arguments, or names an unavailable tool.
+        """
+        # Decoded JSON is made of dicts; the exact type check avoids the
+        # cost of an ABC check on every step.
+        if type(data) is not dict and not isinstance(data, Mapping):
+            raise ModelError("The step is not a JSON object.")
+        action = cls.from_dict(data)
+        if action.action not in VALID_ACTIONS:
+            raise ModelError(f"Action type '{action.action}' is not recognized.")
+        arguments = action.arguments
+        if (
+            arguments is not None
+            and type(arguments) is not dict
+            and not isinstance(arguments, Mapping)
+        ):
+            raise ModelError("The arguments of a step must be a JSON object.")
+        if (
+            tools is not None
+            and action.action == "use_tool"
+            and action.tool_name not in tools
+        ):
+            raise ModelError(
+                f"Tool '{action.tool_name}' is not available; the tools are {sorted(tools)}."
+            )
+        return action
+
+
+class Event(Model):
+    """One event of a goal's history.
+
+    Attributes:
+        role (Optional[str]): Who produced the event, e.g. "system" or "body".
+        action (Optional[dict]): The action that was executed.
+        result: The action's result.
+        content (Optional[str]): The text of a system event.
+        extra (Optional[dict]): Any other keys of the event.
+    """
+
+    __slots__ = ("role", "action", "result", "content")
+    _fields = ("role", "action", "result", "content")
+
+    def __init__(self, role=None, action=None, result=None, content=None, extra=None):
+        self.role = role
+        self.action = action
+        self.result = result
+        self.content = content
+        self.extra = extra
+
+
+class Message(Model):
+    """A message on the `Agora`'s board, e.g. a delegated task.
+
+    Attributes:
+        id (str): The message's unique ID.
+        from_agent (str): The name of the posting agent.
+        to_agent_role (str): The role the message is addressed to.
+        content: The message's content, typically a task description.
+        timestamp (float): When the message was posted.
+        claimed_by (Optional[str]): The agent working on it, if any.
+        reply (Optional[dict]): The reply, once one is posted.
+        extra (Optional[dict]): Any other keys.
+    """
+
+    __slots__ = (
+        "id",
+        "from_agent",
+        "to_agent_role",
+        "content",
+        "timestamp",
+        "claimed_by",
+        "reply",
+    )
+    _fields = (
+        "id",
+        "from_agent",
+        "to_agent_role",
+        "content",
+        "timestamp",
+        "claimed_by",
+        "reply",
+    )
+    _always = frozenset(_fields)
+
+    def __init__(
+        self,
+        id: str,
+        from_agent: str,
+        to_agent_role: str,
+        content,
+        timestamp: float,
+        claimed_by: Optional[str] = None,
+        reply: Optional[dict] = None,
+        extra: Optional[dict] = None,
+    ):
+        self.id = id
+        self.from_agent = from_agent
+        self.to_agent_role = to_agent_role
+        self.content = content
+        self.timestamp = timestamp
+        self.claimed_by = claimed_by
+        self.reply = reply
+        self.extra = extra
+
+
+def parse_plan(data, tools: Optional[Mapping] = None) -> List[Action]:
+    """Parses and validates a whole plan.
+
+    Args:
+        data: A list of steps, a `{"plan": [...]}` object, or either as a
+            JSON string or bytes.
+        tools (Optional[Mapping]): The available tools, see `Action.parse`.
+
+    Returns:
+        List[Action]: The steps.
+
+    Raises:
+        ModelError: If the plan is not a list or a step is invalid; the
+            error's `index` is the step's position.
+    """
+    if isinstance(data, (str, bytes)):
+        try:
+            data = json.loads(data)
+        except ValueError as e:
+            raise ModelError(f"The plan is not valid JSON: {e}") from e
+    if isinstance(data, Mapping) and "plan" in data:
+        data = data["plan"]
+    if not isinstance(data, list):
+        raise ModelError("The plan is not a JSON array.")
+    actions = []
+    for index, step in enumerate(data):
+        try:
+            actions.append(Action.parse(step, tools))
+        except ModelError as e:
+            raise ModelError(str(e), index) from e
+    return actions
+
+
+def json_default(obj):
+    """A `json.dumps` default that serializes models as their dicts."""
+    if isinstance(obj, Model):
+        return obj.to_dict()
+    return str(obj)
+
+
+def dumps(obj) -> str:
+    """Serializes models (and anything JSON can) to minified JSON."""
+    return json.dumps(obj, separators=(",", ":"), default=json_default)
+
+
+def loads(data):
+    """Parses JSON written by `dumps` back into plain dicts and lists."""
+    return json.loads(data)
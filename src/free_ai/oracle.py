@@ -1,10 +1,19 @@
 import os
 import json
 import logging
-from openai import OpenAI, AuthenticationError
+from collections.abc import Mapping
+from typing import Optional
+
+from .history import recent_events
+from .logs import log_event
+from .models import dumps
+from .tracing import span, traced
 
 logger = logging.getLogger(__name__)
 
+# How many of the most recent history events are included in a prompt.
+PROMPT_HISTORY_EVENTS = 20
+
 
 class SentientOracle:
     """The bridge to a real Large Language Model (LLM) for advanced reasoning.
@@ -12,7 +21,8 @@ class SentientOracle:
     The Sentient Oracle connects to the OpenAI API to provide dynamic,
     intelligent capabilities like planning and code generation. It is designed
     to fail gracefully if an API key is not provided, allowing the agent to
-    function in a limited, offline mode.
+    function in a limited, offline mode. The `openai` package is only
+    imported once an API key is configured.
 
     Attributes:
         client: An instance of the `openai.OpenAI` client if an API key is
@@ -36,8 +46,11 @@ class SentientOracle:
             logger.info(
                 "SENTIENT ORACLE: API Key found. Connection to higher consciousness established."
             )
+            from openai import OpenAI
+
             self.client = OpenAI(api_key=api_key)
 
+    @traced("oracle.api_call")
     def _make_api_call(self, prompt: str) -> dict:
         """A centralized, private method for making API calls to OpenAI.
 
@@ -54,6 +67,7 @@ class SentientOracle:
         """
         if not self.client:
             return {"error": "Oracle offline: OPENAI_API_KEY is not configured."}
+        from openai import AuthenticationError
 
         try:
             response = self.client.chat.completions.create(
@@ -100,8 +114,32 @@ class SentientOracle:
             list: A list of dictionaries, where each dictionary is a step in
                 the plan. Returns a list with an error action on failure.
         """
-        logger.info("Consulting the Sentient Oracle to generate a dynamic plan...")
-        prompt = f"""
+        log_event(
+            logger,
+            logging.INFO,
+            "Consulting the Sentient Oracle to generate a dynamic plan...",
+            history_events=len(history),
+            context_chars=len(context),
+        )
+        with span("oracle.build_prompt"):
+            prompt = self._plan_prompt(goal, history, context)
+        response = self._make_api_call(prompt)
+        return response.get(
+            "plan",
+            [
+                {
+                    "action": "error",
+                    "message": response.get(
+                        "error", "Failed to generate a valid plan."
+                    ),
+                }
+            ],
+        )
+
+    @staticmethod
+    def _plan_prompt(goal: str, history: list, context: str) -> str:
+        """Builds the planning prompt from the goal, memory and history."""
+        return f"""
         Given the high-level goal: "{goal}"
         And the following context from my memory:
         ---
@@ -109,7 +147,7 @@ class SentientOracle:
         ---
         And the recent history of actions:
         ---
-        {json.dumps(history, indent=2)}
+        {dumps(recent_events(history, PROMPT_HISTORY_EVENTS))}
         ---
         Generate a concise, step-by-step plan as a JSON array of actions.
         Each action must be a JSON object with an 'action' key (e.g., 'use_tool', 'delegate_task')
@@ -117,18 +155,65 @@ class SentientOracle:
         For example: `[ {{"action": "use_tool", "tool_name": "...", "arguments": {{...}} }} ]`
         Be strategic and minimalist. The plan should be the most direct path to the goal.
         """
+
+    def repair_plan(
+        self, goal, history: list, failed_step: dict, error: str, remaining: list
+    ) -> Optional[list]:
+        """Asks the LLM to replace the rest of a plan after a failed step.
+
+        Instead of the full planning context, the prompt only carries a
+        one-line summary per completed step, the failed step, its error and
+        the steps that were still to come, so a repair costs a fraction of
+        the tokens of a new plan.
+
+        Args:
+            goal: The goal the plan works towards.
+            history (list): The events of the goal so far.
+            failed_step (dict): The step that failed or was rejected.
+            error (str): Why the step failed.
+            remaining (list): The planned steps after the failed one.
+
+        Returns:
+            Optional[list]: The steps to run instead of the failed step and
+                the remaining ones, or None if the Oracle gave no plan.
+        """
+        log_event(
+            logger,
+            logging.INFO,
+            "Consulting the Sentient Oracle to repair the plan...",
+            remaining_steps=len(remaining),
+        )
+        with span("oracle.build_prompt"):
+            prompt = self._repair_prompt(goal, history, failed_step, error, remaining)
         response = self._make_api_call(prompt)
-        return response.get(
-            "plan",
-            [
-                {
-                    "action": "error",
-                    "message": response.get(
-                        "error", "Failed to generate a valid plan."
-                    ),
-                }
-            ],
+        plan = response.get("plan")
+        if not isinstance(plan, list):
+            logger.warning(
+                f"The Oracle could not repair the plan: {response.get('error', 'no plan returned')}"
+            )
+            return None
+        return plan
+
+    @staticmethod
+    def _repair_prompt(
+        goal, history: list, failed_step: dict, error: str, remaining: list
+    ) -> str:
+        """Builds the compact prompt asking for a repaired plan suffix."""
+        completed = "\n".join(
+            summarize_step(event)
+            for event in recent_events(history, PROMPT_HISTORY_EVENTS)
+            if isinstance(event, Mapping) and "action" in event
         )
+        return f"""
+        Goal: "{goal if isinstance(goal, str) else dumps(goal)}"
+        Completed steps:
+        {completed or "(none)"}
+        This step failed: {dumps(failed_step)}
+        Error: {error}
+        Steps still planned after it: {dumps(remaining)}
+        Return a JSON object {{"plan": [...]}} with the steps that should replace the failed
+        step and the steps after it, in the same format. Keep planned steps that still make sense.
+        """
 
     def generate_code(self, prompt: str, context: str) -> str:
         """Generates executable Python code by querying the LLM.
@@ -145,7 +230,12 @@ class SentientOracle:
             str: A string containing the raw Python code. Returns an error
                 comment on failure.
         """
-        logger.info("Consulting the Sentient Oracle to generate code...")
+        log_event(
+            logger,
+            logging.INFO,
+            "Consulting the Sentient Oracle to generate code...",
+            context_chars=len(context),
+        )
         prompt = f"""
         Given the following task: "{prompt}"
         And the following context (e.g., the content of a file to be modified):
@@ -162,3 +252,20 @@ class SentientOracle:
             "code",
             f"# Oracle Error: {response.get('error', 'Failed to generate valid code.')}",
         )
+
+
+def summarize_step(event: dict) -> str:
+    """Summarizes a history event as one line, e.g. "use_tool SearchTool: success"."""
+    action = event.get("action") or {}
+    if not isinstance(action, Mapping):
+        return str(action)
+    label = str(action.get("action", "?"))
+    if action.get("tool_name"):
+        label += f" {action['tool_name']}"
+    arguments = action.get("arguments")
+    operation = arguments.get("operation") if isinstance(arguments, Mapping) else None
+    if operation:
+        label += f".{operation}"
+    result = event.get("result")
+    status = result.get("status", "done") if isinstance(result, Mapping) else "done"
+    return f"- {label}: {status}"
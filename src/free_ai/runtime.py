@@ -0,0 +1,555 @@
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional
+
+from .action_executor import TERMINAL_ACTIONS, ActionExecutor
+from .agent import Director
+from .agora import Agora
+from .checkpoint import CheckpointError
+from .history import HistoryStore
+from .oracle import SentientOracle
+from .personality import Personality
+
+logger = logging.getLogger(__name__)
+
+
+class FairSemaphore:
+    """A thread semaphore that admits waiters strictly in arrival order.
+
+    `threading.Semaphore` lets whichever thread wakes first win, so a busy
+    agent can repeatedly overtake one that has been waiting longer. Here a
+    released permit is handed directly to the oldest waiter.
+    """
+
+    def __init__(self, value: int):
+        self._value = value
+        self._waiters: deque = deque()
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+    def acquire(self):
+        with self._lock:
+            if self._value > 0 and not self._waiters:
+                self._value -= 1
+                return
+            turn = threading.Event()
+            self._waiters.append(turn)
+        turn.wait()
+
+    def release(self):
+        with self._lock:
+            if self._waiters:
+                self._waiters.popleft().set()
+            else:
+                self._value += 1
+
+
+class ConcurrencyLimited:
+    """Wraps a shared client so at most `limit` of its calls run at once.
+
+    Every public method of the wrapped object is called under one
+    `FairSemaphore`, so a society of agents sharing an Oracle (or a memory)
+    neither overloads the backend nor starves any single agent. Attribute
+    access other than method calls is passed through unchanged.
+
+    Attributes:
+        wrapped: The shared client.
+        limit (int): The maximum number of concurrent calls.
+    """
+
+    def __init__(self, wrapped, limit: int):
+        self.wrapped = wrapped
+        self.limit = limit
+        self._semaphore = FairSemaphore(limit)
+        self._methods: Dict[str, Callable] = {}
+
+    def __getattr__(self, name: str):
+        attribute = getattr(self.wrapped, name)
+        if name.startswith("_") or not callable(attribute):
+            return attribute
+        method = self._methods.get(name)
+        if method is None:
+
+            def method(*args, **kwargs):
+                with self._semaphore:
+                    return getattr(self.wrapped, name)(*args, **kwargs)
+
+            method.__name__ = name
+            method.__doc__ = attribute.__doc__
+            self._methods[name] = method
+        return method
+
+
+class _AgentSlot:
+    """The runtime's bookkeeping for one Director."""
+
+    def __init__(
+        self,
+        director: Director,
+        goals: Iterable,
+        serve_agora: bool,
+        executor: ActionExecutor,
+    ):
+        self.director = director
+        self.executor = executor
+        self.goals = deque(goals)
+        self.serve_agora = serve_agora
+        self.busy = False
+        self.steps = 0
+        self.goals_done = 0
+        # Prefetches for Agora tasks not yet claimed, by message ID.
+        self.prefetched: Dict[str, Future] = {}
+
+
+class AgentRuntime:
+    """Runs a society of Directors concurrently on one host.
+
+    Every agent is an asyncio task that works through its goals one step at
+    a time. Each step (deciding on an action and carrying it out) runs in a
+    shared thread pool, because Directors, tools and the Oracle are
+    blocking. A FIFO pool of step slots makes scheduling round-robin: after
+    every step an agent queues behind all agents that are already waiting,
+    so one long plan cannot monopolize the workers.
+
+    All agents share one memory, one `Agora` and one Oracle client. Calls
+    into the Oracle and the memory are capped globally by
+    `ConcurrencyLimited` wrappers. Each goal has a step budget; a goal that
+    exhausts it is abandoned with the status "budget_exhausted".
+
+    Agents created with `serve_agora=True` also claim tasks posted to the
+    Agora for their role and reply with the outcome. The runtime stops when
+    every agent is idle and no claimable task is left, or when `stop` is
+    called, in which case agents finish their current step and exit.
+
+    With `prefetch_depth` > 0, such an agent works ahead while a goal runs:
+    after each step it peeks at up to `prefetch_depth` unclaimed tasks for
+    its role and retrieves their memory context (and, with
+    `prefetch_plans`, their plans) in the background. When it claims one of
+    them, the prefetched results are used; prefetches for tasks claimed by
+    other agents are discarded and counted as wasted. At most
+    `prefetch_budget` prefetches run at once across all agents.
+
+    Attributes:
+        agora (Agora): The message board shared by all agents.
+        oracle (ConcurrencyLimited): The shared, rate-limited Oracle.
+        memory (Optional[ConcurrencyLimited]): The shared, rate-limited memory.
+        step_budget (int): The maximum number of steps spent on one goal.
+        prefetch_depth (int): The unclaimed tasks each agent prefetches.
+        prefetch_plans (bool): Whether prefetching also generates plans.
+        prefetch_budget (int): The most prefetches running at once.
+        checkpoint_dir (Optional[str]): Where agents created by the runtime
+            checkpoint their current goal, if anywhere.
+        results (List[dict]): One record per finished or abandoned goal.
+    """
+
+    def __init__(
+        self,
+        memory=None,
+        agora: Optional[Agora] = None,
+        oracle: Optional[SentientOracle] = None,
+        max_workers: int = 8,
+        max_concurrent_steps: Optional[int] = None,
+        max_oracle_calls: int = 4,
+        max_memory_calls: int = 4,
+        step_budget: int = 20,
+        poll_interval: float = 0.1,
+        action_handler: Optional[Callable] = None,
+        prefetch_depth: int = 0,
+        prefetch_plans: bool = False,
+        prefetch_budget: int = 2,
+        checkpoint_dir: Optional[str] = None,
+    ):
+        """Initializes the runtime and its shared resources.
+
+        Args:
+            memory (Optional[VectorMemory]): The memory shared by all agents.
+            agora (Optional[Agora]): The shared message board; a new one is
+                created if None.
+            oracle (Optional[SentientOracle]): The shared Oracle client; a new
+                one is created if None.
+            max_workers (int): The number of threads that execute steps.
+            max_concurrent_steps (Optional[int]): The number of steps that
+                may run at once; defaults to `max_workers`.
+            max_oracle_calls (int): The maximum number of concurrent Oracle
+                calls across all agents.
+            max_memory_calls (int): The maximum number of concurrent memory
+                calls across all agents.
+            step_budget (int): The maximum number of steps per goal.
+            poll_interval (float): How long an idle agent waits before
+                looking for Agora tasks again.
+            action_handler (Optional[Callable]): Called as
+                `handler(director, action, history)` to carry out every
+                non-terminal action and return its result. By default each
+                agent gets an `ActionExecutor`, which also runs independent
+                tool steps concurrently.
+            prefetch_depth (int): How many upcoming Agora tasks an agent
+                serving the Agora prepares while it works; 0 disables
+                prefetching.
+            prefetch_plans (bool): Whether prefetching also asks the Oracle
+                for plans, trading speculative Oracle calls for latency.
+            prefetch_budget (int): The maximum number of prefetches running
+                at once across all agents.
+            checkpoint_dir (Optional[str]): A directory where each agent
+                created with `create_agent` checkpoints its current goal, in
+                `<name>.ckpt`. Goals interrupted by a crash are resumed when
+                the agents next run.
+        """
+        self.agora = agora if agora is not None else Agora()
+        self.oracle = ConcurrencyLimited(
+            oracle if oracle is not None else SentientOracle(), max_oracle_calls
+        )
+        self.memory = (
+            ConcurrencyLimited(memory, max_memory_calls) if memory is not None else None
+        )
+        self.max_workers = max_workers
+        self.max_concurrent_steps = max_concurrent_steps or max_workers
+        self.step_budget = step_budget
+        self.poll_interval = poll_interval
+        self.action_handler = action_handler
+        self.prefetch_depth = prefetch_depth
+        self.prefetch_plans = prefetch_plans
+        self.prefetch_budget = prefetch_budget
+        self.checkpoint_dir = checkpoint_dir
+        if checkpoint_dir is not None:
+            os.makedirs(checkpoint_dir, exist_ok=True)
+        self.results: List[dict] = []
+        self._prefetch_counts = {"started": 0, "used": 0, "wasted": 0, "failed": 0}
+        self._prefetching = 0
+        self._slots: List[_AgentSlot] = []
+        self._stopping = threading.Event()
+        # The running asyncio event loop, set by `run`.
+        self._loop = None
+
+    def create_agent(
+        self,
+        name: str,
+        role: str,
+        personality: Personality,
+        goals: Iterable = (),
+        serve_agora: bool = False,
+        external_tools: Optional[dict] = None,
+        **director_kwargs,
+    ) -> Director:
+        """Creates a Director wired to the shared resources and adds it.
+
+        Args:
+            name (str): The unique name of the agent.
+            role (str): The agent's role, used to route Agora tasks.
+            personality (Personality): The agent's personality.
+            goals (Iterable): Goals to work on, in order.
+            serve_agora (bool): Whether the agent also takes Agora tasks
+                addressed to its role.
+            external_tools (Optional[dict]): Extra tools for the agent.
+            **director_kwargs: Further `Director` arguments, e.g.
+                `skill_registry`.
+
+        Returns:
+            Director: The new agent.
+        """
+        if self.checkpoint_dir is not None:
+            director_kwargs.setdefault(
+                "checkpoint_path", os.path.join(self.checkpoint_dir, f"{name}.ckpt")
+            )
+        director = Director(
+            name=name,
+            role=role,
+            personality=personality,
+            external_tools=external_tools or {},
+            shared_memory=self.memory,
+            oracle=self.oracle,
+            **director_kwargs,
+        )
+        self.add_agent(director, goals, serve_agora)
+        return director
+
+    def add_agent(self, director: Director, goals: Iterable = (), serve_agora=False):
+        """Schedules an existing Director.
+
+        Args:
+            director (Director): The agent to run. To share the global
+                limits it should have been built with the runtime's `oracle`
+                and `memory`.
+            goals (Iterable): Goals to work on, in order.
+            serve_agora (bool): Whether the agent also takes Agora tasks
+                addressed to its role.
+        """
+        executor = ActionExecutor(director, agora=self.agora)
+        self._slots.append(_AgentSlot(director, goals, serve_agora, executor))
+
+    def run_sync(self) -> List[dict]:
+        """Runs all agents to completion from synchronous code."""
+        # Imported here and below: asyncio is costly to import, and importing
+        # the runtime (e.g. in worker processes) should stay cheap.
+        import asyncio
+
+        return asyncio.run(self.run())
+
+    async def run(self) -> List[dict]:
+        """Runs all agents until they are done or `stop` is called.
+
+        Returns:
+            List[dict]: The goal records, also available as `results`.
+        """
+        import asyncio
+
+        self._loop = asyncio.get_running_loop()
+        self._step_slots = asyncio.Semaphore(self.max_concurrent_steps)
+        started = time.monotonic()
+        with ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="AgentRuntime"
+        ) as pool:
+            await asyncio.gather(*(self._run_agent(slot, pool) for slot in self._slots))
+            for slot in self._slots:
+                self._discard_prefetches(slot, set(slot.prefetched))
+        logger.info(
+            f"AgentRuntime finished {len(self.results)} goals with "
+            f"{len(self._slots)} agents in {time.monotonic() - started:.2f}s."
+        )
+        return self.results
+
+    def stop(self):
+        """Asks every agent to stop after its current step.
+
+        Safe to call from any thread.
+        """
+        self._stopping.set()
+
+    @property
+    def stats(self) -> dict:
+        """Aggregate counters: goals by status, steps per agent and prefetches."""
+        by_status: Dict[str, int] = {}
+        for record in self.results:
+            by_status[record["status"]] = by_status.get(record["status"], 0) + 1
+        return {
+            "goals": by_status,
+            "steps": {slot.director.name: slot.steps for slot in self._slots},
+            "prefetch": dict(self._prefetch_counts),
+        }
+
+    async def _run_agent(self, slot: _AgentSlot, pool: ThreadPoolExecutor):
+        """Works through one agent's goals and Agora tasks.
+
+        A goal left in the agent's checkpoint by an earlier run is resumed
+        first.
+        """
+        import asyncio
+
+        resumed = await self._loop.run_in_executor(pool, self._restore, slot)
+        if resumed is not None:
+            goal, events = resumed
+            message_id = slot.director.message_id
+            await self._work_on(slot, goal, message_id, pool, resumed=events)
+        while not self._stopping.is_set():
+            goal, message_id = self._next_goal(slot)
+            if goal is None:
+                if not slot.serve_agora or self._all_idle():
+                    return
+                await asyncio.sleep(self.poll_interval)
+                continue
+            prefetch = slot.prefetched.pop(message_id, None)
+            await self._work_on(slot, goal, message_id, pool, prefetch)
+
+    async def _work_on(
+        self,
+        slot: _AgentSlot,
+        goal,
+        message_id,
+        pool: ThreadPoolExecutor,
+        prefetch: Optional[Future] = None,
+        resumed: Optional[list] = None,
+    ):
+        """Runs one goal and records, and if it was a task answers, the result."""
+        slot.busy = True
+        try:
+            record = await self._run_goal(
+                slot, goal, message_id, pool, prefetch, resumed
+            )
+        finally:
+            slot.busy = False
+        record["message_id"] = message_id
+        self.results.append(record)
+        if message_id is not None:
+            self.agora.post_reply(message_id, slot.director.name, record)
+
+    def _restore(self, slot: _AgentSlot):
+        """Resumes the agent's checkpointed goal; runs in a worker thread."""
+        try:
+            return slot.director.restore()
+        except (CheckpointError, OSError) as e:
+            logger.warning(
+                f"Agent '{slot.director.name}' could not resume its checkpoint: {e}"
+            )
+            return None
+
+    def _next_goal(self, slot: _AgentSlot):
+        """Returns the agent's next goal and, for Agora tasks, its message ID."""
+        if slot.goals:
+            return slot.goals.popleft(), None
+        if slot.serve_agora:
+            for message in self.agora.get_unclaimed_messages_for_role(
+                slot.director.role
+            ):
+                if self.agora.claim_message(message["id"], slot.director.name):
+                    return message["content"], message["id"]
+        return None, None
+
+    def _all_idle(self) -> bool:
+        """Checks whether no agent has work now or could receive more.
+
+        Runs on the event loop thread, where agents change state, so the
+        answer cannot go stale between the checks.
+        """
+        if any(slot.busy or slot.goals for slot in self._slots):
+            return False
+        roles = {slot.director.role for slot in self._slots if slot.serve_agora}
+        return not any(
+            self.agora.get_unclaimed_messages_for_role(role) for role in roles
+        )
+
+    async def _run_goal(
+        self,
+        slot: _AgentSlot,
+        goal,
+        message_id,
+        pool,
+        prefetch: Optional[Future] = None,
+        resumed: Optional[list] = None,
+    ) -> dict:
+        """Runs steps for one goal until it ends or its budget is spent.
+
+        If `resumed` is given, it is the history of a goal restored from a
+        checkpoint, whose remaining plan the Director has already loaded.
+        However the goal ends, its checkpoint is deleted; only a crash
+        leaves it behind to be resumed.
+        """
+        import asyncio
+
+        director = slot.director
+        prepared = None
+        if prefetch is not None:
+            # A prefetch still running is further along than a fresh start.
+            try:
+                prepared = await asyncio.wrap_future(prefetch)
+                self._prefetch_counts["used"] += 1
+            except Exception as e:
+                logger.warning(f"Agent '{director.name}' could not use a prefetch: {e}")
+                self._prefetch_counts["failed"] += 1
+        if resumed is None:
+            director.start_goal(prepared, message_id)
+        history = HistoryStore()
+        started = time.monotonic()
+        status, steps, action = "budget_exhausted", 0, None
+        # The history's spill file is removed even if the agent's task is
+        # cancelled or a step raises.
+        try:
+            for event in resumed if resumed is not None else _initial_history(goal):
+                history.append(event)
+            while steps < self.step_budget:
+                if self._stopping.is_set():
+                    status = "stopped"
+                    break
+                async with self._step_slots:
+                    action = await self._loop.run_in_executor(
+                        pool, self._step, slot, goal, history
+                    )
+                steps += 1
+                slot.steps += 1
+                if action.get("action") in TERMINAL_ACTIONS:
+                    status = "error" if action["action"] == "error" else "finished"
+                    break
+                self._prefetch(slot, pool)
+        finally:
+            history.close()
+            director.end_goal()
+        if status == "finished":
+            slot.goals_done += 1
+        return {
+            "agent": director.name,
+            "goal": goal,
+            "status": status,
+            "steps": steps,
+            "seconds": round(time.monotonic() - started, 4),
+            "last_action": action,
+        }
+
+    def _prefetch(self, slot: _AgentSlot, pool: ThreadPoolExecutor):
+        """Starts prefetches for the next unclaimed tasks of the agent's role.
+
+        Runs on the event loop thread. Prefetches of tasks that are no
+        longer unclaimed are discarded first.
+        """
+        if self.prefetch_depth <= 0 or not slot.serve_agora or slot.goals:
+            return
+        if self._stopping.is_set():
+            return
+        messages = self.agora.get_unclaimed_messages_for_role(slot.director.role)
+        unclaimed = {message["id"] for message in messages}
+        self._discard_prefetches(slot, set(slot.prefetched) - unclaimed)
+        for message in messages[: self.prefetch_depth]:
+            if len(slot.prefetched) >= self.prefetch_depth:
+                break
+            if self._prefetching >= self.prefetch_budget:
+                break
+            if message["id"] in slot.prefetched:
+                continue
+            self._prefetching += 1
+            self._prefetch_counts["started"] += 1
+            future = pool.submit(
+                slot.director.prepare,
+                message["content"],
+                _initial_history(message["content"]),
+                self.prefetch_plans,
+            )
+            future.add_done_callback(
+                lambda _: self._loop.call_soon_threadsafe(self._prefetch_finished)
+            )
+            slot.prefetched[message["id"]] = future
+
+    def _prefetch_finished(self):
+        self._prefetching -= 1
+
+    def _discard_prefetches(self, slot: _AgentSlot, message_ids):
+        """Drops prefetches that will not be used and counts them as wasted."""
+        for message_id in message_ids:
+            slot.prefetched.pop(message_id).cancel()
+            self._prefetch_counts["wasted"] += 1
+
+    def _step(self, slot: _AgentSlot, goal, history: list) -> dict:
+        """Decides on and carries out one action; runs in a worker thread."""
+        director = slot.director
+        try:
+            if self.action_handler is None:
+                return slot.executor.step(goal, history)
+            action = director.determine_next_action(goal, history)
+        except Exception as e:
+            logger.error(f"Agent '{director.name}' failed a step: {e}", exc_info=True)
+            return {"action": "error", "message": f"{type(e).__name__}: {e}"}
+        if action.get("action") in TERMINAL_ACTIONS:
+            director.end_goal()
+            return action
+        try:
+            result = self.action_handler(director, action, history)
+        except Exception as e:
+            logger.error(
+                f"Agent '{director.name}' failed to execute {action.get('action')}: {e}",
+                exc_info=True,
+            )
+            result = {"status": "error", "message": f"{type(e).__name__}: {e}"}
+        history.append({"role": "body", "action": action, "result": result})
+        director.checkpoint(goal, history)
+        return action
+
+
+def _initial_history(goal) -> List[dict]:
+    """The events every goal's history starts with."""
+    return [{"role": "system", "content": f"The goal is: {goal}"}]
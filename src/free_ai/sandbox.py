@@ -0,0 +1,517 @@
+import ast
+import builtins
+import json
+import logging
+import multiprocessing
+import queue
+import threading
+import time
+import types
+from typing import Dict, Iterable, Optional
+
+from .skill_registry import LazySkill, skill_hash
+from .tool_executor import apply_resource_limits, arm_cpu_limit, call_tool
+from .tools import Tool
+
+logger = logging.getLogger(__name__)
+
+# Standard-library modules that learned skills may import.
+DEFAULT_ALLOWED_MODULES = frozenset(
+    {
+        "base64",
+        "collections",
+        "dataclasses",
+        "datetime",
+        "functools",
+        "hashlib",
+        "itertools",
+        "json",
+        "math",
+        "random",
+        "re",
+        "statistics",
+        "string",
+        "textwrap",
+        "time",
+        "typing",
+    }
+)
+
+# Builtins that would let a skill bypass the sandbox's import and I/O rules.
+_BLOCKED_BUILTINS = frozenset(
+    {
+        "open",
+        "exec",
+        "eval",
+        "compile",
+        "input",
+        "breakpoint",
+        "help",
+        "exit",
+        "quit",
+        "globals",
+        "locals",
+        "vars",
+    }
+)
+
+# Attributes that lead from ordinary objects to module globals or stack
+# frames, in addition to every name starting with an underscore (which
+# covers `__globals__`, `__subclasses__` and the like). String formatting
+# is blocked because format fields can traverse attributes.
+_BLOCKED_ATTRIBUTES = frozenset(
+    {
+        "format",
+        "format_map",
+        "Formatter",
+        "gi_frame",
+        "gi_code",
+        "cr_frame",
+        "cr_code",
+        "ag_frame",
+        "ag_code",
+        "f_back",
+        "f_builtins",
+        "f_code",
+        "f_globals",
+        "f_locals",
+        "tb_frame",
+        "tb_next",
+    }
+)
+
+# The base class skill code finds predefined. It is compiled into the
+# skill's own namespace, so its functions' globals expose nothing that the
+# skill could not already reach.
+_SKILL_TOOL_SOURCE = """
+class Tool:
+    def __init__(self, name, description):
+        self.name = name
+        self.description = description
+
+    def use(self, *args, **kwargs):
+        raise NotImplementedError
+"""
+
+
+class SandboxError(Exception):
+    """Raised when a skill cannot be loaded into the sandbox."""
+
+
+class _ToolProxy:
+    """Lets sandboxed skill code call the agent's tools in the parent process.
+
+    Exposed to skills as the global `tools`: `tools.call("FileSystemTool",
+    operation="read_file", filepath=...)` sends the request over the IPC
+    channel and blocks until the parent answers.
+    """
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def call(self, tool_name: str, **kwargs):
+        message = {"type": "tool_call", "tool": tool_name, "kwargs": kwargs}
+        self._conn.send_bytes(json.dumps(message, default=str).encode("utf-8"))
+        reply = json.loads(self._conn.recv_bytes())
+        return reply["result"]
+
+
+def _is_blocked_attribute(name: str) -> bool:
+    return name.startswith("_") or name in _BLOCKED_ATTRIBUTES
+
+
+def _check_attribute(name: str):
+    if _is_blocked_attribute(name):
+        raise AttributeError(f"Access to '{name}' is not allowed in skills.")
+
+
+def _safe_getattr(obj, name, *default):
+    _check_attribute(name)
+    return getattr(obj, name, *default)
+
+
+def _safe_setattr(obj, name, value):
+    _check_attribute(name)
+    setattr(obj, name, value)
+
+
+def _safe_delattr(obj, name):
+    _check_attribute(name)
+    delattr(obj, name)
+
+
+def _module_view(module, allowed: frozenset, views: dict) -> types.ModuleType:
+    """A copy of a module's public names, without modules off the allowlist.
+
+    Allowlisted modules import others (e.g. `typing.sys`); skills only see
+    the views, so they cannot follow those references to `os` or `sys`.
+    """
+    view = views.get(module.__name__)
+    if view is None:
+        view = views[module.__name__] = types.ModuleType(module.__name__)
+        for key, value in vars(module).items():
+            if key.startswith("_"):
+                continue
+            if isinstance(value, types.ModuleType):
+                if value.__name__.split(".")[0] not in allowed:
+                    continue
+                value = _module_view(value, allowed, views)
+            setattr(view, key, value)
+    return view
+
+
+def _restricted_builtins(allowed_modules: Iterable[str]) -> dict:
+    """Builds the builtins for skill code: no file or code-execution
+    primitives, attribute functions that refuse private names, and an
+    `__import__` limited to the allowlist."""
+    allowed = frozenset(allowed_modules)
+    views: dict = {}
+
+    def guarded_import(name, globals=None, locals=None, fromlist=(), level=0):
+        if level != 0 or name.split(".")[0] not in allowed:
+            raise ImportError(f"Import of '{name}' is not allowed in skills.")
+        return _module_view(
+            __import__(name, globals, locals, fromlist, level), allowed, views
+        )
+
+    safe = {
+        key: value
+        for key, value in vars(builtins).items()
+        if key not in _BLOCKED_BUILTINS
+    }
+    safe["__import__"] = guarded_import
+    safe["getattr"] = _safe_getattr
+    safe["setattr"] = _safe_setattr
+    safe["delattr"] = _safe_delattr
+    return safe
+
+
+def _check_skill_code(tree: ast.AST):
+    """Rejects skill code that names a blocked attribute."""
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Attribute):
+            names = [node.attr]
+        elif isinstance(node, ast.MatchClass):
+            names = node.kwd_attrs
+        else:
+            continue
+        for name in names:
+            if _is_blocked_attribute(name):
+                raise SandboxError(
+                    f"Access to the attribute '{name}' is not allowed in skills."
+                )
+
+
+def _load_skill(skill_code: str, proxy: _ToolProxy, allowed_modules) -> object:
+    """Executes skill code in a restricted namespace and returns `new_tool`."""
+    tree = ast.parse(skill_code, "<skill>")
+    _check_skill_code(tree)
+    namespace = {
+        "__builtins__": _restricted_builtins(allowed_modules),
+        "__name__": "skill",
+        "tools": proxy,
+    }
+    exec(compile(_SKILL_TOOL_SOURCE, "<skill-base>", "exec"), namespace)
+    exec(compile(tree, "<skill>", "exec"), namespace)
+    if "new_tool" not in namespace:
+        raise SandboxError("The skill code did not produce a 'new_tool' object.")
+    return namespace["new_tool"]
+
+
+def _sandbox_worker(conn, memory_limit_mb, cpu_time_limit, allowed_modules):
+    """The request loop of a sandbox worker process.
+
+    Messages are JSON rather than pickles, so that nothing produced by
+    untrusted skill code is ever unpickled by the parent.
+    """
+    apply_resource_limits(memory_limit_mb)
+    proxy = _ToolProxy(conn)
+    skills: Dict[str, object] = {}
+    while True:
+        try:
+            request = json.loads(conn.recv_bytes())
+        except (EOFError, OSError, KeyboardInterrupt):
+            return
+        if request.get("op") == "stop":
+            return
+        arm_cpu_limit(cpu_time_limit)
+        try:
+            digest = request["hash"]
+            skill = skills.get(digest)
+            if skill is None:
+                if request.get("code") is None:
+                    raise SandboxError(f"Skill {digest[:12]} is not loaded.")
+                skill = _load_skill(request["code"], proxy, allowed_modules)
+                skills[digest] = skill
+            if request["op"] == "load":
+                reply = {
+                    "type": "result",
+                    "ok": True,
+                    "name": str(getattr(skill, "name", "UnnamedTool")),
+                    "description": str(getattr(skill, "description", "")),
+                }
+            else:
+                result = call_tool(skill, request.get("kwargs", {}))
+                reply = {"type": "result", "ok": True, "result": result}
+        except Exception as e:
+            reply = {"type": "result", "ok": False, "error": f"{type(e).__name__}: {e}"}
+        conn.send_bytes(json.dumps(reply, default=str).encode("utf-8"))
+
+
+class _SandboxWorker:
+    """A sandbox process, its pipe, and the skills it has already loaded."""
+
+    def __init__(self, context, args: tuple):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_sandbox_worker,
+            args=(child_conn,) + args,
+            name="SkillSandbox-worker",
+            daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+        self.loaded = set()
+
+    def stop(self, kill: bool = False):
+        if kill:
+            self.process.kill()
+        else:
+            try:
+                self.conn.send_bytes(b'{"op": "stop"}')
+            except OSError:
+                pass
+        self.process.join(timeout=1)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+
+class SkillSandbox:
+    """Runs untrusted, learned skill code in a warm pool of isolated processes.
+
+    Workers are started ahead of time from a clean interpreter (via the
+    `forkserver` start method where available), so loading a skill costs a
+    message round trip rather than an interpreter start. Skill code is
+    executed only inside the workers, with a restricted import allowlist,
+    no `open`/`exec`/`eval`, an address-space limit, a per-call CPU budget
+    and a wall-clock timeout; a misbehaving worker is killed and replaced
+    without affecting the Director.
+
+    Skill code finds a minimal `Tool` base class predefined, and reaches
+    the agent's tools through a `tools.call(name, **kwargs)` proxy that is
+    answered by the parent process. Requests and results travel as JSON.
+
+    Code that names an attribute starting with an underscore (such as
+    `__globals__`) or one that reaches stack frames is rejected before it
+    runs, `getattr` and friends refuse the same names, and imported modules
+    are replaced by copies of their public names without references to
+    modules off the allowlist. This closes the known routes from skill
+    code to `os`, but in-process Python restrictions are hardening, not a
+    security boundary. The workers run as the same OS user as the agent
+    and can use whatever that user can, so agents that learn skills from
+    untrusted sources should themselves run as an unprivileged user or in
+    a container.
+
+    Attributes:
+        tools (Optional[dict]): The tools that skills may call via the
+            proxy, typically `Director.tools`.
+        timeout (float): The default wall-clock limit per call, in seconds.
+    """
+
+    def __init__(
+        self,
+        tools: Optional[dict] = None,
+        pool_size: int = 2,
+        timeout: float = 10.0,
+        memory_limit_mb: Optional[int] = 512,
+        cpu_time_limit: Optional[float] = None,
+        allowed_modules: Iterable[str] = DEFAULT_ALLOWED_MODULES,
+    ):
+        """Initializes the sandbox and pre-starts its worker processes.
+
+        Args:
+            tools (Optional[dict]): The tools skills may call through the
+                proxy. `Director` fills this in with its own tools if unset.
+            pool_size (int): The number of warm worker processes.
+            timeout (float): The default wall-clock limit per call.
+            memory_limit_mb (Optional[int]): The address-space limit of each
+                worker, in megabytes.
+            cpu_time_limit (Optional[float]): The CPU seconds a single call
+                may consume.
+            allowed_modules (Iterable[str]): Top-level modules skills may
+                import.
+        """
+        methods = multiprocessing.get_all_start_methods()
+        method = next(m for m in ("forkserver", "spawn") if m in methods)
+        self._context = multiprocessing.get_context(method)
+        self.tools = tools
+        self.timeout = timeout
+        self._args = (memory_limit_mb, cpu_time_limit, sorted(allowed_modules))
+        self._idle: "queue.Queue[_SandboxWorker]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._workers = [
+            _SandboxWorker(self._context, self._args) for _ in range(pool_size)
+        ]
+        for worker in self._workers:
+            self._idle.put(worker)
+        self._closed = False
+        logger.info(f"SkillSandbox started {pool_size} warm worker processes.")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+
+    def load(self, skill_code: str) -> "SandboxedSkill":
+        """Loads skill code into the sandbox and returns a proxy tool for it.
+
+        Args:
+            skill_code (str): The skill source; it must assign its tool
+                instance to `new_tool`.
+
+        Returns:
+            SandboxedSkill: A tool whose `use` runs inside the sandbox.
+
+        Raises:
+            SandboxError: If the code fails, times out, or creates no tool.
+        """
+        digest = skill_hash(skill_code)
+        reply = self._request({"op": "load", "hash": digest}, skill_code, None)
+        if not reply.get("ok"):
+            raise SandboxError(reply.get("error", "Unknown sandbox error."))
+        return SandboxedSkill(
+            self, skill_code, digest, reply["name"], reply["description"]
+        )
+
+    def call(
+        self,
+        skill_code: str,
+        digest: str,
+        kwargs: dict,
+        timeout: Optional[float] = None,
+    ):
+        """Runs a loaded skill's `use` method inside a worker.
+
+        Returns:
+            The skill's result, or an error status dictionary if the call
+            raised, timed out, or exceeded a resource limit.
+        """
+        request = {"op": "call", "hash": digest, "kwargs": kwargs}
+        reply = self._request(request, skill_code, timeout)
+        if reply.get("ok"):
+            return reply["result"]
+        return {"status": "error", "message": f"Skill error: {reply.get('error')}"}
+
+    def shutdown(self):
+        """Stops all worker processes."""
+        self._closed = True
+        with self._lock:
+            workers, self._workers = self._workers, []
+        for worker in workers:
+            worker.stop()
+
+    def _request(
+        self, request: dict, skill_code: str, timeout: Optional[float]
+    ) -> dict:
+        """Sends a request to a worker, serving proxied tool calls until it
+        answers or the deadline passes."""
+        if self._closed:
+            return {"ok": False, "error": "SkillSandbox has been shut down."}
+        timeout = self.timeout if timeout is None else timeout
+        # The time limit covers waiting for a free worker as well.
+        deadline = time.monotonic() + timeout
+        try:
+            worker = self._idle.get(timeout=timeout)
+        except queue.Empty:
+            logger.error(f"No sandbox worker became free within {timeout}s.")
+            return {
+                "ok": False,
+                "error": f"No sandbox worker became free within {timeout} seconds.",
+            }
+        healthy = False
+        try:
+            if request["hash"] not in worker.loaded:
+                request = dict(request, code=skill_code)
+            worker.conn.send_bytes(json.dumps(request, default=str).encode("utf-8"))
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not worker.conn.poll(remaining):
+                    logger.error(f"Sandboxed skill timed out after {timeout}s.")
+                    return {"ok": False, "error": f"Timed out after {timeout} seconds."}
+                message = json.loads(worker.conn.recv_bytes())
+                if message.get("type") == "tool_call":
+                    result = self._serve_tool_call(message["tool"], message["kwargs"])
+                    reply = {"type": "tool_result", "result": result}
+                    worker.conn.send_bytes(
+                        json.dumps(reply, default=str).encode("utf-8")
+                    )
+                    continue
+                healthy = True
+                if message.get("ok"):
+                    worker.loaded.add(request["hash"])
+                return message
+        except (EOFError, OSError, ValueError):
+            logger.error("A sandbox worker died while running a skill.")
+            return {
+                "ok": False,
+                "error": "The sandbox worker was terminated, most likely for exceeding its CPU or memory limit.",
+            }
+        finally:
+            if not healthy:
+                worker = self._replace(worker)
+            if self._closed:
+                worker.stop()
+            else:
+                self._idle.put(worker)
+
+    def _serve_tool_call(self, tool_name: str, kwargs: dict):
+        """Runs a tool on behalf of a sandboxed skill."""
+        tool = (self.tools or {}).get(tool_name)
+        if tool is None:
+            return {"status": "error", "message": f"Unknown tool '{tool_name}'."}
+        if isinstance(tool, SandboxedSkill) or (
+            isinstance(tool, LazySkill) and tool.sandbox is not None
+        ):
+            # Nested sandbox calls could exhaust the pool and deadlock.
+            return {
+                "status": "error",
+                "message": f"Skills cannot call other sandboxed skills ('{tool_name}').",
+            }
+        try:
+            return call_tool(tool, kwargs)
+        except Exception as e:
+            return {
+                "status": "error",
+                "message": f"Error in tool '{tool_name}': {type(e).__name__}: {e}",
+            }
+
+    def _replace(self, worker: _SandboxWorker) -> _SandboxWorker:
+        worker.stop(kill=True)
+        replacement = _SandboxWorker(self._context, self._args)
+        with self._lock:
+            self._workers = [replacement if w is worker else w for w in self._workers]
+        return replacement
+
+
+class SandboxedSkill(Tool):
+    """A learned tool whose code lives and runs inside a `SkillSandbox`."""
+
+    def __init__(
+        self,
+        sandbox: SkillSandbox,
+        skill_code: str,
+        digest: str,
+        name: str,
+        description: str,
+    ):
+        super().__init__(name, description)
+        self.sandbox = sandbox
+        self.skill_code = skill_code
+        self.skill_hash = digest
+
+    def use(self, **kwargs):
+        """Runs the skill in a sandbox worker and returns its result."""
+        return self.sandbox.call(self.skill_code, self.skill_hash, kwargs)
@@ -0,0 +1,261 @@
+import logging
+import os
+import re
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from .walker import walk_parallel
+
+logger = logging.getLogger(__name__)
+
+# Characters that end a literal run in a regular expression.
+_REGEX_META = set(".^$*+?{}[]()|\\")
+# Quantifiers that make the preceding character optional.
+_OPTIONAL_QUANTIFIERS = set("*?{")
+
+
+def _trigrams(text: str) -> Set[str]:
+    """Returns the set of lowercase three-character substrings of a text."""
+    text = text.lower()
+    return {a + b + c for a, b, c in zip(text, text[1:], text[2:])}
+
+
+def _required_literals(pattern: str) -> List[str]:
+    """Extracts literal runs that every match of a regex must contain.
+
+    The scan is conservative: alternations and extension groups disable
+    pruning entirely, a character followed by an optional quantifier is
+    dropped from its run, and so is everything inside a group followed by
+    one, e.g. `(abc)?def` only requires "def".
+
+    Args:
+        pattern (str): The regular expression.
+
+    Returns:
+        List[str]: Literal substrings of length >= 3, possibly empty.
+    """
+    if "|" in pattern or "(?" in pattern:
+        return []
+    literals, current, i = [], [], 0
+    # The literals collected outside each open group.
+    enclosing: List[List[str]] = []
+    while i < len(pattern):
+        c = pattern[i]
+        if c == "\\" and i + 1 < len(pattern):
+            escaped = pattern[i + 1]
+            if escaped.isalnum():
+                # Character classes such as \w or \d are not literals.
+                literals.append("".join(current))
+                current = []
+            else:
+                current.append(escaped)
+            i += 2
+            continue
+        if c == "(":
+            literals.append("".join(current))
+            enclosing.append(literals)
+            literals, current = [], []
+        elif c == ")":
+            if not enclosing:
+                return []
+            literals.append("".join(current))
+            current = []
+            group, literals = literals, enclosing.pop()
+            following = pattern[i + 1] if i + 1 < len(pattern) else ""
+            if following not in _OPTIONAL_QUANTIFIERS:
+                literals.extend(group)
+        elif c in _REGEX_META:
+            if c in _OPTIONAL_QUANTIFIERS and current:
+                current.pop()
+            literals.append("".join(current))
+            current = []
+            # Skip over character classes and repetition counts.
+            if c in "[{":
+                close = pattern.find("]" if c == "[" else "}", i + 2)
+                i = close if close != -1 else i
+        else:
+            current.append(c)
+        i += 1
+    if enclosing:
+        return []
+    literals.append("".join(current))
+    return [literal for literal in literals if len(literal) >= 3]
+
+
+class TrigramIndex:
+    """An incremental trigram index over the text files of a directory tree.
+
+    Every indexed file is reduced to the set of its lowercase trigrams, and
+    a posting list maps each trigram to the files containing it. A query
+    only opens the files whose trigram sets cover the query's literals, so
+    most of the tree is never read. `refresh` re-indexes only files whose
+    modification time or size changed since the last refresh.
+
+    Attributes:
+        root (str): The directory being indexed.
+        max_file_bytes (int): Files larger than this are not indexed.
+    """
+
+    def __init__(
+        self,
+        root: str = ".",
+        include: Optional[Iterable[str]] = None,
+        exclude: Optional[Iterable[str]] = None,
+        use_gitignore: bool = True,
+        max_file_bytes: int = 2_000_000,
+    ):
+        """Initializes an empty index; call `refresh` to populate it.
+
+        Args:
+            root (str): The directory tree to index.
+            include (Optional[Iterable[str]]): Glob patterns of files to index.
+            exclude (Optional[Iterable[str]]): Glob patterns to skip.
+            use_gitignore (bool): Whether to honour `.gitignore` files.
+            max_file_bytes (int): The size above which files are skipped.
+        """
+        self.root = root
+        self.include = list(include) if include else None
+        self.exclude = list(exclude) if exclude else None
+        self.use_gitignore = use_gitignore
+        self.max_file_bytes = max_file_bytes
+        self._signatures: Dict[str, Tuple[float, int]] = {}
+        self._file_trigrams: Dict[str, Set[str]] = {}
+        self._postings: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._file_trigrams)
+
+    def refresh(self) -> dict:
+        """Brings the index up to date with the file system.
+
+        Returns:
+            dict: Counts of `added`, `updated` and `removed` files, and the
+                time taken in `seconds`.
+        """
+        start = time.monotonic()
+        seen = {}
+        for entry in walk_parallel(
+            self.root,
+            include=self.include,
+            exclude=self.exclude,
+            use_gitignore=self.use_gitignore,
+        ):
+            if entry["size"] <= self.max_file_bytes:
+                seen[entry["path"]] = (entry["mtime"], entry["size"])
+
+        with self._lock:
+            added = updated = 0
+            for path, signature in seen.items():
+                previous = self._signatures.get(path)
+                if previous == signature:
+                    continue
+                self._remove(path)
+                trigrams = self._read_trigrams(path)
+                self._signatures[path] = signature
+                if trigrams is None:
+                    continue
+                self._file_trigrams[path] = trigrams
+                for trigram in trigrams:
+                    self._postings.setdefault(trigram, set()).add(path)
+                if previous is None:
+                    added += 1
+                else:
+                    updated += 1
+            removed = [path for path in self._signatures if path not in seen]
+            for path in removed:
+                self._remove(path)
+                del self._signatures[path]
+
+        stats = {
+            "added": added,
+            "updated": updated,
+            "removed": len(removed),
+            "seconds": round(time.monotonic() - start, 4),
+        }
+        logger.info(f"Search index refreshed for '{self.root}': {stats}")
+        return stats
+
+    def search(
+        self,
+        query: str,
+        regex: bool = False,
+        case_sensitive: bool = True,
+        max_results: int = 100,
+    ) -> List[dict]:
+        """Finds the lines that match a substring or regular expression.
+
+        Args:
+            query (str): The substring or pattern to look for.
+            regex (bool): Whether `query` is a regular expression.
+            case_sensitive (bool): Whether matching is case sensitive.
+            max_results (int): The maximum number of hits to return.
+
+        Returns:
+            List[dict]: Hits with the root-relative `path`, the one-based
+                `line` number and the line's `text`.
+        """
+        flags = 0 if case_sensitive else re.IGNORECASE
+        pattern = re.compile(query if regex else re.escape(query), flags)
+        literals = _required_literals(query) if regex else [query]
+
+        with self._lock:
+            candidates = self._candidates(literals)
+
+        hits = []
+        for path in sorted(candidates):
+            try:
+                with open(
+                    os.path.join(self.root, path),
+                    "r",
+                    encoding="utf-8",
+                    errors="replace",
+                ) as f:
+                    for number, line in enumerate(f, start=1):
+                        if pattern.search(line):
+                            hits.append(
+                                {"path": path, "line": number, "text": line.rstrip()}
+                            )
+                            if len(hits) >= max_results:
+                                return hits
+            except OSError:
+                continue
+        return hits
+
+    def _candidates(self, literals: List[str]) -> Set[str]:
+        """Intersects posting lists to find files that may contain a match."""
+        required = set()
+        for literal in literals:
+            required |= _trigrams(literal)
+        if not required:
+            return set(self._file_trigrams)
+        postings = sorted(
+            (self._postings.get(trigram, set()) for trigram in required), key=len
+        )
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            candidates &= posting
+            if not candidates:
+                break
+        return candidates
+
+    def _read_trigrams(self, path: str) -> Optional[Set[str]]:
+        """Reads a file and returns its trigrams, or None if it is binary."""
+        try:
+            with open(os.path.join(self.root, path), "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        if b"\0" in data[:8192]:
+            return None
+        return _trigrams(data.decode("utf-8", errors="replace"))
+
+    def _remove(self, path: str):
+        """Drops a file from the posting lists."""
+        for trigram in self._file_trigrams.pop(path, ()):
+            posting = self._postings.get(trigram)
+            if posting is not None:
+                posting.discard(path)
+                if not posting:
+                    del self._postings[trigram]
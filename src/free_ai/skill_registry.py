@@ -0,0 +1,231 @@
+import hashlib
+import json
+import logging
+import marshal
+import os
+import sys
+import threading
+import time
+from types import CodeType
+from typing import Dict, Optional
+
+from .file_io import atomic_write
+from .tools import Tool
+
+logger = logging.getLogger(__name__)
+
+
+def skill_hash(skill_code: str) -> str:
+    """Returns the content hash that identifies a skill's source code."""
+    return hashlib.sha256(skill_code.encode("utf-8")).hexdigest()
+
+
+class SkillRegistry:
+    """A persistent, content-addressed store of learned skills.
+
+    Every skill that the `LearningAnnex` successfully learns is saved under
+    the SHA-256 hash of its source, together with its compiled code object
+    (marshalled, tagged with the interpreter's cache tag like `.pyc`
+    files). An index maps tool names to hashes and descriptions, so a new
+    process can list and expose all learned tools without compiling or
+    executing anything, and without asking the Oracle to regenerate them.
+
+    Attributes:
+        path (str): The directory holding the index and the skill files.
+    """
+
+    INDEX_FILE = "index.json"
+
+    def __init__(self, path: str = "./skill_registry"):
+        """Opens (or creates) a registry directory.
+
+        Args:
+            path (str): The directory to store skills in.
+        """
+        self.path = path
+        self._skills_dir = os.path.join(path, "skills")
+        os.makedirs(self._skills_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._code_cache: Dict[str, CodeType] = {}
+        self._index: Dict[str, dict] = self._load_index()
+        logger.info(f"SkillRegistry at '{path}' holds {len(self._index)} skills.")
+
+    def __contains__(self, tool_name: str) -> bool:
+        return tool_name in self._index
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def entries(self) -> Dict[str, dict]:
+        """Returns a copy of the index: tool name -> hash and description."""
+        with self._lock:
+            return {name: dict(entry) for name, entry in self._index.items()}
+
+    def compile(self, skill_code: str) -> CodeType:
+        """Returns the code object for a skill, compiling it at most once.
+
+        Compiled code is cached in memory and on disk by content hash, so
+        re-learning or reloading an identical skill skips compilation.
+
+        Args:
+            skill_code (str): The skill's Python source.
+
+        Returns:
+            CodeType: The compiled module-level code object.
+        """
+        digest = skill_hash(skill_code)
+        code = self._code_cache.get(digest)
+        if code is not None:
+            return code
+        compiled_path = self._compiled_path(digest)
+        if compiled_path and os.path.exists(compiled_path):
+            try:
+                with open(compiled_path, "rb") as f:
+                    code = marshal.loads(f.read())
+            except (OSError, ValueError, EOFError, TypeError):
+                code = None
+        if code is None:
+            code = compile(skill_code, f"<skill {digest[:12]}>", "exec")
+            if compiled_path:
+                atomic_write(compiled_path, marshal.dumps(code), fsync=False)
+        self._code_cache[digest] = code
+        return code
+
+    def register(self, tool_name: str, skill_code: str, description: str = "") -> str:
+        """Stores a validated skill under a tool name.
+
+        Args:
+            tool_name (str): The name the learned tool is called by.
+            skill_code (str): The source that produced the tool.
+            description (str): The tool's description, kept in the index so
+                the tool can be listed without being loaded.
+
+        Returns:
+            str: The content hash of the skill.
+        """
+        digest = skill_hash(skill_code)
+        source_path = os.path.join(self._skills_dir, f"{digest}.py")
+        if not os.path.exists(source_path):
+            atomic_write(source_path, skill_code.encode("utf-8"))
+        self.compile(skill_code)
+        with self._lock:
+            self._index[tool_name] = {
+                "hash": digest,
+                "description": description,
+                "created": time.time(),
+            }
+            self._save_index()
+        logger.info(f"Registered skill '{tool_name}' ({digest[:12]}).")
+        return digest
+
+    def source(self, tool_name: str) -> str:
+        """Returns the stored source code of a registered skill.
+
+        Raises:
+            KeyError: If no skill is registered under `tool_name`.
+        """
+        digest = self._index[tool_name]["hash"]
+        with open(os.path.join(self._skills_dir, f"{digest}.py"), "r") as f:
+            return f.read()
+
+    def instantiate(self, tool_name: str):
+        """Executes a registered skill and returns the tool it creates.
+
+        Raises:
+            KeyError: If no skill is registered under `tool_name`.
+            RuntimeError: If the skill does not produce a `new_tool`.
+        """
+        code = self.compile(self.source(tool_name))
+        global_namespace, local_namespace = {}, {}
+        exec(code, global_namespace, local_namespace)
+        if "new_tool" not in local_namespace:
+            raise RuntimeError(f"Skill '{tool_name}' did not produce a 'new_tool'.")
+        return local_namespace["new_tool"]
+
+    def lazy_tools(self, sandbox=None) -> Dict[str, "LazySkill"]:
+        """Returns a lazily loading proxy for every registered tool.
+
+        Building the proxies only reads the index; skills are compiled (or
+        loaded from the marshal cache) and executed on first use.
+
+        Args:
+            sandbox (Optional[SkillSandbox]): If given, skills are loaded
+                into this sandbox instead of being executed in-process.
+        """
+        with self._lock:
+            return {
+                name: LazySkill(self, name, entry.get("description", ""), sandbox)
+                for name, entry in self._index.items()
+            }
+
+    def _compiled_path(self, digest: str) -> Optional[str]:
+        """Returns the interpreter-specific path of a marshalled code object."""
+        tag = sys.implementation.cache_tag
+        if tag is None:
+            return None
+        return os.path.join(self._skills_dir, f"{digest}.{tag}.marshal")
+
+    def _load_index(self) -> Dict[str, dict]:
+        try:
+            with open(os.path.join(self.path, self.INDEX_FILE), "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.error(f"Could not read skill index, starting empty: {e}")
+            return {}
+
+    def _save_index(self):
+        atomic_write(
+            os.path.join(self.path, self.INDEX_FILE),
+            json.dumps(self._index, indent=2).encode("utf-8"),
+        )
+
+
+class LazySkill(Tool):
+    """A stand-in for a learned tool that is only instantiated on first use.
+
+    Attributes:
+        registry (SkillRegistry): The registry the skill is loaded from.
+    """
+
+    def __init__(
+        self, registry: SkillRegistry, name: str, description: str, sandbox=None
+    ):
+        """Initializes the proxy without loading the skill.
+
+        Args:
+            registry (SkillRegistry): The registry holding the skill.
+            name (str): The registered tool name.
+            description (str): The registered tool description.
+            sandbox (Optional[SkillSandbox]): The sandbox to load the skill
+                into, or None to execute it in-process.
+        """
+        super().__init__(name, description)
+        self.registry = registry
+        self.sandbox = sandbox
+        self._tool = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        """Whether the underlying tool has been instantiated."""
+        return self._tool is not None
+
+    def resolve(self):
+        """Instantiates the underlying tool if needed and returns it."""
+        if self._tool is None:
+            with self._lock:
+                if self._tool is None and self.sandbox is not None:
+                    self._tool = self.sandbox.load(self.registry.source(self.name))
+                elif self._tool is None:
+                    self._tool = self.registry.instantiate(self.name)
+                    logger.info(f"Loaded learned skill '{self.name}' on first use.")
+        return self._tool
+
+    def use(self, *args, **kwargs):
+        """Loads the skill if needed and forwards the call to it."""
+        tool = self.resolve()
+        if hasattr(tool, "use"):
+            return tool.use(*args, **kwargs)
+        return tool(*args, **kwargs)
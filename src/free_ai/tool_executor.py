@@ -0,0 +1,364 @@
+import logging
+import multiprocessing
+import pickle
+import queue
+import threading
+import time
+from typing import Dict, Optional, Union
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - resource limits are POSIX-only.
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+
+class ExecutorShutdownError(RuntimeError):
+    """Raised when a worker is requested from a shut-down `ToolExecutor`."""
+
+
+def apply_resource_limits(memory_limit_mb: Optional[int]):
+    """Caps the address space of the current process.
+
+    Args:
+        memory_limit_mb (Optional[int]): The limit in megabytes, or None for
+            no limit. Ignored on platforms without the `resource` module.
+    """
+    if resource is None or memory_limit_mb is None:
+        return
+    limit = memory_limit_mb * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def arm_cpu_limit(cpu_time_limit: Optional[float]):
+    """Allows the current process `cpu_time_limit` more seconds of CPU time.
+
+    Warm workers serve many calls, so the soft RLIMIT_CPU is re-armed
+    relative to the CPU time already used before each call. Exceeding it
+    makes the kernel send SIGXCPU, which terminates the worker.
+    """
+    if resource is None or cpu_time_limit is None:
+        return
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    used = usage.ru_utime + usage.ru_stime
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    soft = int(used + cpu_time_limit) + 1
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+
+def call_tool(tool, kwargs: dict):
+    """Invokes a `Tool` instance or a plain callable registered as a tool."""
+    if hasattr(tool, "use"):
+        return tool.use(**kwargs)
+    return tool(**kwargs)
+
+
+def _worker_main(conn, tools: dict, memory_limit_mb, cpu_time_limit, max_result_bytes):
+    """The request loop of a tool worker process."""
+    apply_resource_limits(memory_limit_mb)
+    while True:
+        try:
+            request = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            return
+        if request is None:
+            return
+        tool_name, kwargs = request
+        tool = tools.get(tool_name)
+        if tool is None:
+            error = {"status": "error", "message": f"Unknown tool '{tool_name}'."}
+            conn.send_bytes(pickle.dumps(error))
+            continue
+        arm_cpu_limit(cpu_time_limit)
+        try:
+            result = call_tool(tool, kwargs)
+            payload = pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+        except MemoryError:
+            result = {
+                "status": "error",
+                "message": f"Tool '{tool_name}' exceeded its memory limit.",
+            }
+            payload = pickle.dumps(result)
+        except Exception as e:
+            result = {
+                "status": "error",
+                "message": f"Error in tool '{tool_name}': {type(e).__name__}: {e}",
+            }
+            payload = pickle.dumps(result)
+        if max_result_bytes is not None and len(payload) > max_result_bytes:
+            result = {
+                "status": "error",
+                "message": f"Result of tool '{tool_name}' is {len(payload)} bytes, exceeding the {max_result_bytes} byte limit.",
+            }
+            payload = pickle.dumps(result)
+        conn.send_bytes(payload)
+
+
+class _Worker:
+    """A warm worker process together with the pipe used to talk to it."""
+
+    def __init__(self, context, tools: dict, version: int, limits: tuple):
+        self.version = version
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main,
+            args=(child_conn, tools) + limits,
+            name="ToolExecutor-worker",
+            daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+
+    def stop(self, kill: bool = False):
+        if kill:
+            self.process.kill()
+        else:
+            try:
+                self.conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        self.process.join(timeout=1)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+
+class ToolExecutor:
+    """Runs tool calls in a pool of warm, resource-limited worker processes.
+
+    Each call is sent to an idle worker over a pipe and answered with the
+    tool's usual result dictionary, so a slow or CPU-heavy tool neither
+    blocks the calling agent's process nor is confined to one core. Workers
+    are started ahead of time from a clean interpreter (via the
+    `forkserver` start method where available, so no locks or threads of
+    the agent are inherited) and reused across calls. Tools are pickled
+    into each worker and must therefore be picklable; `FileSystemTool`
+    and `SearchTool` arrive as fresh instances with the same settings.
+
+    A call that exceeds its wall-clock timeout, its CPU budget or its memory
+    limit is reported as an error; the offending worker is killed and
+    replaced. Results larger than `max_result_bytes` (pickled) are replaced
+    by an error, and `per_tool_concurrency` bounds how many calls of the
+    same tool may run at once.
+
+    Attributes:
+        timeout (float): The default wall-clock limit per call, in seconds.
+        max_result_bytes (Optional[int]): The largest result a call may return.
+    """
+
+    def __init__(
+        self,
+        tools: dict,
+        max_workers: int = 4,
+        timeout: float = 30.0,
+        memory_limit_mb: Optional[int] = None,
+        cpu_time_limit: Optional[float] = None,
+        max_result_bytes: Optional[int] = 1_000_000,
+        per_tool_concurrency: Union[int, Dict[str, int], None] = None,
+    ):
+        """Initializes the executor and starts its worker processes.
+
+        Args:
+            tools (dict): A mapping of tool names to tools, as in
+                `Director.tools`.
+            max_workers (int): The number of worker processes.
+            timeout (float): The default wall-clock limit per call, in seconds.
+            memory_limit_mb (Optional[int]): The address-space limit of each
+                worker, in megabytes.
+            cpu_time_limit (Optional[float]): The CPU seconds a single call
+                may consume.
+            max_result_bytes (Optional[int]): The maximum pickled size of a
+                call's result.
+            per_tool_concurrency (Union[int, Dict[str, int], None]): The
+                maximum number of concurrent calls per tool, either one limit
+                for every tool or a mapping of tool name to limit.
+        """
+        methods = multiprocessing.get_all_start_methods()
+        method = next(m for m in ("forkserver", "spawn") if m in methods)
+        self._context = multiprocessing.get_context(method)
+        self._tools = dict(tools)
+        self._version = 0
+        self._limits = (memory_limit_mb, cpu_time_limit, max_result_bytes)
+        self.timeout = timeout
+        self.max_result_bytes = max_result_bytes
+        self._per_tool_concurrency = per_tool_concurrency
+        self._semaphores: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        self._workers = [self._spawn() for _ in range(max_workers)]
+        for worker in self._workers:
+            self._idle.put(worker)
+        self._closed = False
+        logger.info(f"ToolExecutor started {max_workers} warm worker processes.")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+
+    def __contains__(self, tool_name: str) -> bool:
+        return tool_name in self._tools
+
+    def register_tool(self, tool_name: str, tool):
+        """Adds or replaces a tool.
+
+        Workers started before the change are recycled on their next use so
+        that they pick up the new tool.
+
+        Args:
+            tool_name (str): The name the tool is called by.
+            tool: The tool instance or callable.
+
+        Raises:
+            TypeError: If the tool cannot be pickled into a worker.
+        """
+        try:
+            pickle.dumps(tool)
+        except (pickle.PicklingError, TypeError, AttributeError) as e:
+            raise TypeError(f"Tool '{tool_name}' cannot be sent to a worker: {e}")
+        with self._lock:
+            self._tools[tool_name] = tool
+            self._version += 1
+
+    def execute(
+        self,
+        tool_name: str,
+        arguments: Optional[dict] = None,
+        timeout: Optional[float] = None,
+    ):
+        """Runs a tool call in a worker process.
+
+        The arguments are pickled before a worker is taken, so arguments
+        that cannot be sent to another process are reported without
+        disturbing the pool.
+
+        Args:
+            tool_name (str): The name of the tool to call.
+            arguments (Optional[dict]): The keyword arguments passed to the
+                tool's `use` method (or to the tool itself if it is a plain
+                callable).
+            timeout (Optional[float]): The wall-clock limit for this call;
+                defaults to the executor's `timeout`.
+
+        Returns:
+            The tool's result, or an error status dictionary if the call
+            failed, timed out, or exceeded a resource limit.
+        """
+        if self._closed:
+            return {"status": "error", "message": "ToolExecutor has been shut down."}
+        if tool_name not in self._tools:
+            return {"status": "error", "message": f"Unknown tool '{tool_name}'."}
+        timeout = self.timeout if timeout is None else timeout
+        try:
+            request = pickle.dumps(
+                (tool_name, dict(arguments or {})), protocol=pickle.HIGHEST_PROTOCOL
+            )
+        except (pickle.PicklingError, TypeError, AttributeError) as e:
+            return {
+                "status": "error",
+                "message": f"Arguments of tool '{tool_name}' cannot be sent to a worker: {e}",
+            }
+
+        with self._semaphore_for(tool_name):
+            try:
+                worker = self._checkout()
+            except ExecutorShutdownError as e:
+                return {"status": "error", "message": str(e)}
+            healthy = False
+            try:
+                started = time.monotonic()
+                worker.conn.send_bytes(request)
+                if not worker.conn.poll(timeout):
+                    logger.error(
+                        f"Tool '{tool_name}' timed out after {timeout}s; restarting its worker."
+                    )
+                    return {
+                        "status": "error",
+                        "message": f"Tool '{tool_name}' timed out after {timeout} seconds.",
+                    }
+                payload = worker.conn.recv_bytes()
+                healthy = True
+                result = pickle.loads(payload)
+                logger.info(
+                    f"Tool '{tool_name}' finished in a worker process in {time.monotonic() - started:.3f}s."
+                )
+                return result
+            except (EOFError, BrokenPipeError, ConnectionResetError, OSError):
+                logger.error(f"Worker running tool '{tool_name}' died unexpectedly.")
+                return {
+                    "status": "error",
+                    "message": f"Tool '{tool_name}' was terminated, most likely for exceeding its CPU or memory limit.",
+                }
+            except (pickle.UnpicklingError, TypeError, AttributeError) as e:
+                return {
+                    "status": "error",
+                    "message": f"Result of tool '{tool_name}' cannot be received from its worker: {e}",
+                }
+            finally:
+                self._checkin(worker, healthy)
+
+    def shutdown(self):
+        """Stops all worker processes.
+
+        Calls waiting for a worker are answered with an error.
+        """
+        self._closed = True
+        with self._lock:
+            workers, self._workers = self._workers, []
+        for worker in workers:
+            worker.stop()
+        self._idle.put(None)
+        logger.info("ToolExecutor has shut down its workers.")
+
+    def _spawn(self) -> _Worker:
+        return _Worker(self._context, self._tools, self._version, self._limits)
+
+    def _semaphore_for(self, tool_name: str) -> threading.BoundedSemaphore:
+        """Returns the concurrency limiter of a tool."""
+        with self._lock:
+            semaphore = self._semaphores.get(tool_name)
+            if semaphore is None:
+                limit = self._per_tool_concurrency
+                if isinstance(limit, dict):
+                    limit = limit.get(tool_name)
+                semaphore = threading.BoundedSemaphore(limit or len(self._workers) or 1)
+                self._semaphores[tool_name] = semaphore
+            return semaphore
+
+    def _checkout(self) -> _Worker:
+        """Takes an idle worker, replacing it if it predates a tool change.
+
+        Raises:
+            ExecutorShutdownError: If the executor is shut down, including
+                while waiting for a worker.
+        """
+        worker = self._idle.get()
+        if worker is None or self._closed:
+            # Pass the wake-up on to the next caller waiting for a worker.
+            self._idle.put(None)
+            raise ExecutorShutdownError("ToolExecutor has been shut down.")
+        if worker.version != self._version or not worker.process.is_alive():
+            worker = self._replace(worker, kill=False)
+        return worker
+
+    def _checkin(self, worker: _Worker, healthy: bool):
+        """Returns a worker to the pool, replacing it if it misbehaved."""
+        if not healthy:
+            worker = self._replace(worker, kill=True)
+        if self._closed:
+            worker.stop()
+        else:
+            self._idle.put(worker)
+
+    def _replace(self, worker: _Worker, kill: bool) -> _Worker:
+        """Stops a worker and starts a fresh one in its place."""
+        worker.stop(kill=kill)
+        with self._lock:
+            replacement = self._spawn()
+            self._workers = [replacement if w is worker else w for w in self._workers]
+        return replacement
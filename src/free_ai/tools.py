@@ -1,3 +1,20 @@
+import codecs
+import itertools
+import mmap
+import os
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Union
+
+from .file_io import AppendBuffer, atomic_write
+from .search_index import TrigramIndex
+from .walker import walk_parallel
+
+
 class Tool:
     """An abstract base class for all agent tools.
 
@@ -27,22 +44,168 @@ class Tool:
         raise NotImplementedError
 
 
+class _FileCache:
+    """A byte-bounded LRU cache of file contents.
+
+    Entries are keyed by absolute path and validated against the file's
+    `(st_mtime_ns, st_size, st_ino)` signature, so a file changed behind
+    the cache's back is never served stale. Each entry holds the decoded
+    content once, together with the number of bytes it was read from
+    (which is what counts against `max_bytes`) and whether it was cut off
+    by the read cap.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._entries: "OrderedDict[str, list]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def signature(st: os.stat_result) -> tuple:
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def get(self, path: str, signature: tuple) -> Optional[list]:
+        """Returns the `[signature, content, size, truncated]` entry if still valid."""
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is None:
+                return None
+            if entry[0] != signature:
+                self._discard(path)
+                return None
+            self._entries.move_to_end(path)
+            return entry
+
+    def put(
+        self,
+        path: str,
+        signature: tuple,
+        content: str,
+        size: int,
+        truncated: bool = False,
+    ):
+        """Stores a file's content, evicting least recently used entries.
+
+        Args:
+            path (str): The absolute path of the file.
+            signature (tuple): The file's signature when it was read.
+            content (str): The decoded content.
+            size (int): The number of bytes the content was decoded from.
+            truncated (bool): Whether the content is only a prefix of the file.
+        """
+        with self._lock:
+            self._discard(path)
+            if size > self.max_bytes:
+                return
+            self._entries[path] = [signature, content, size, truncated]
+            self.total_bytes += size
+            while self.total_bytes > self.max_bytes:
+                self._discard(next(iter(self._entries)))
+
+    def invalidate(self, path: str):
+        with self._lock:
+            self._discard(path)
+
+    def _discard(self, path: str):
+        entry = self._entries.pop(path, None)
+        if entry is not None:
+            self.total_bytes -= entry[2]
+
+
 class FileSystemTool(Tool):
-    """A tool for interacting with the local file system."""
+    """A tool for interacting with the local file system.
+
+    Every read is capped at `max_result_bytes` so that a single tool call can
+    never flood a prompt. Whole-file reads are served from an LRU cache of up
+    to `cache_bytes`, validated by modification time, size and inode, and
+    kept current by the tool's own writes. `read_many` and `write_many`
+    process a batch of files on a thread pool.
 
-    def __init__(self):
-        """Initializes the FileSystemTool."""
+    Writes are crash-safe: `write_file` replaces files atomically through a
+    fsynced temporary file. `modify_file` can buffer appends
+    (`buffered=True`), coalescing bursts of small appends behind a kept-open
+    handle until `append_buffer_bytes` are pending or
+    `append_flush_interval` seconds pass. Buffered data is flushed before
+    any read or write of the same file through this tool, on the "flush"
+    operation, and on `close`. Large files can be consumed piecewise with
+    `read_range`, `read_chunks` and `tail`; line-range reads on files above
+    `mmap_threshold` bytes scan a memory map instead of decoding every line.
+
+    Attributes:
+        max_result_bytes (int): The maximum amount of content returned by a
+            single read operation.
+        mmap_threshold (int): The file size above which line-range reads use
+            a memory-mapped scan.
+    """
+
+    # The number of paginated `list_recursive` walks kept open at once.
+    MAX_OPEN_LISTINGS = 16
+
+    def __init__(
+        self,
+        max_result_bytes: int = 1_000_000,
+        mmap_threshold: int = 16 * 1024 * 1024,
+        cache_bytes: int = 32 * 1024 * 1024,
+        max_workers: int = 8,
+        fsync: bool = True,
+        append_buffer_bytes: int = 64 * 1024,
+        append_flush_interval: float = 0.5,
+    ):
+        """Initializes the FileSystemTool.
+
+        Args:
+            max_result_bytes (int): The cap on content returned per read.
+            mmap_threshold (int): The file size, in bytes, above which
+                line-range reads are served from a memory map.
+            cache_bytes (int): The total size, in bytes on disk, of file
+                contents kept in the read cache. Zero disables caching.
+            max_workers (int): The number of threads shared by `read_many`,
+                `write_many` and `list_recursive`.
+            fsync (bool): Whether atomic writes are fsynced to disk before
+                they replace the original file.
+            append_buffer_bytes (int): The pending size per file that
+                flushes buffered appends.
+            append_flush_interval (float): The maximum time, in seconds, a
+                buffered append stays in memory.
+        """
         super().__init__(
             "FileSystemTool",
-            "A tool for interacting with the file system, capable of reading, writing, and modifying files.",
+            "A tool for interacting with the file system, capable of reading, writing, and modifying files, reading byte or line ranges, chunks, or the tail of large files, and listing directory trees recursively.",
         )
+        self.max_result_bytes = max_result_bytes
+        self.mmap_threshold = mmap_threshold
+        self._listings: "OrderedDict[str, Iterator[dict]]" = OrderedDict()
+        self._cache = _FileCache(cache_bytes)
+        self.max_workers = max_workers
+        self._pool = None
+        self.fsync = fsync
+        self._appends = AppendBuffer(append_buffer_bytes, append_flush_interval)
+
+    def __getstate__(self):
+        # Worker processes get a fresh tool with the same settings; the cache,
+        # pending appends and thread pool stay with the original.
+        return {
+            "max_result_bytes": self.max_result_bytes,
+            "mmap_threshold": self.mmap_threshold,
+            "cache_bytes": self._cache.max_bytes,
+            "max_workers": self.max_workers,
+            "fsync": self.fsync,
+            "append_buffer_bytes": self._appends.max_bytes,
+            "append_flush_interval": self._appends.max_delay,
+        }
+
+    def __setstate__(self, state):
+        self.__init__(**state)
 
     def use(self, operation: str, **kwargs) -> dict:
         """Dispatches file operations based on the provided command.
 
         Args:
             operation (str): The file operation to perform. Supported values
-                are "read_file", "write_file", and "modify_file".
+                are "read_file", "write_file", "modify_file", "flush",
+                "read_many", "write_many", "read_range", "read_chunks",
+                "tail", and "list_recursive".
             **kwargs: The arguments required for the specific operation.
 
         Returns:
@@ -55,28 +218,71 @@ class FileSystemTool(Tool):
             return self._write_file(**kwargs)
         elif operation == "modify_file":
             return self._modify_file(**kwargs)
+        elif operation == "flush":
+            return self._flush(**kwargs)
+        elif operation == "read_many":
+            return self._read_many(**kwargs)
+        elif operation == "write_many":
+            return self._write_many(**kwargs)
+        elif operation == "read_range":
+            return self._read_range(**kwargs)
+        elif operation == "read_chunks":
+            return self._read_chunks_page(**kwargs)
+        elif operation == "tail":
+            return self._tail(**kwargs)
+        elif operation == "list_recursive":
+            return self._list_recursive(**kwargs)
         else:
             return {
                 "status": "error",
-                "message": f"Unknown operation '{operation}'. Supported: read_file, write_file, modify_file.",
+                "message": f"Unknown operation '{operation}'. Supported: read_file, write_file, modify_file, flush, read_many, write_many, read_range, read_chunks, tail, list_recursive.",
             }
 
     def _read_file(self, filepath: str) -> dict:
-        """Reads the entire content of a specified file.
+        """Reads the content of a specified file, up to `max_result_bytes`.
+
+        Repeated reads of an unchanged file are answered from the cache
+        without touching its content on disk.
 
         Args:
             filepath (str): The path to the file to be read.
 
         Returns:
             dict: A dictionary containing the status and, on success, the
-                file's content.
+                file's content, its size in bytes, the encoding used, and
+                whether the content was truncated.
         """
         try:
-            with open(filepath, "r") as f:
-                content = f.read()
+            key = os.path.abspath(filepath)
+            self._flush_pending(key)
+            st = os.stat(filepath)
+            signature = self._cache.signature(st)
+            entry = self._cache.get(key, signature)
+            if entry is not None:
+                return {
+                    "status": "success",
+                    "content": self._format_content(filepath, entry[1]),
+                    "size": st.st_size,
+                    "encoding": "utf-8",
+                    "truncated": entry[3],
+                }
+
+            limit = self.max_result_bytes
+            with open(filepath, "rb") as f:
+                data = f.read(limit + 1)
+            truncated = len(data) > limit
+            # The cap is in bytes; a character cut by it is left out.
+            decoder = codecs.getincrementaldecoder("utf-8")()
+            data = data[:limit]
+            content = decoder.decode(data, final=not truncated)
+            content = _normalize_newlines(content)
+            self._cache.put(key, signature, content, len(data), truncated)
             return {
                 "status": "success",
-                "content": f"Content of '{filepath}':\n---\n{content}\n---",
+                "content": self._format_content(filepath, content),
+                "size": st.st_size,
+                "encoding": "utf-8",
+                "truncated": truncated,
             }
         except FileNotFoundError:
             return {"status": "error", "message": f"File not found at '{filepath}'."}
@@ -86,8 +292,418 @@ class FileSystemTool(Tool):
                 "message": f"Error reading file '{filepath}': {type(e).__name__}: {e}",
             }
 
+    @staticmethod
+    def _format_content(filepath: str, content: str) -> str:
+        """Formats file content the way `read_file` presents it."""
+        return f"Content of '{filepath}':\n---\n{content}\n---"
+
+    def _read_many(self, filepaths: List[str]) -> dict:
+        """Reads several files concurrently.
+
+        Args:
+            filepaths (List[str]): The paths of the files to read.
+
+        Returns:
+            dict: A dictionary containing the overall status and a `results`
+                mapping of each path to its individual `read_file` result.
+        """
+        return self._run_batch(self._read_file, [(path,) for path in filepaths])
+
+    def _write_many(self, files: Union[Dict[str, str], List[dict]]) -> dict:
+        """Writes several files concurrently.
+
+        Args:
+            files (Union[Dict[str, str], List[dict]]): Either a mapping of
+                path to content, or a list of `{"filepath", "content"}`
+                dictionaries.
+
+        Returns:
+            dict: A dictionary containing the overall status and a `results`
+                mapping of each path to its individual `write_file` result.
+        """
+        if isinstance(files, dict):
+            items = list(files.items())
+        else:
+            items = [(item["filepath"], item["content"]) for item in files]
+        return self._run_batch(self._write_file, items)
+
+    def _get_pool(self) -> ThreadPoolExecutor:
+        """Returns the thread pool shared by batches and listings."""
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="FileSystemTool"
+            )
+        return self._pool
+
+    def _run_batch(self, operation, argument_tuples: List[tuple]) -> dict:
+        """Runs a file operation over many argument tuples on the thread pool.
+
+        Returns:
+            dict: The overall status ("error" if any file failed) and the
+                per-file results keyed by path.
+        """
+        outcomes = self._get_pool().map(lambda args: operation(*args), argument_tuples)
+        results = {args[0]: outcome for args, outcome in zip(argument_tuples, outcomes)}
+        failed = [
+            path for path, result in results.items() if result["status"] != "success"
+        ]
+        response = {
+            "status": "error" if failed else "success",
+            "results": results,
+        }
+        if failed:
+            response["message"] = f"{len(failed)} of {len(results)} files failed."
+        return response
+
+    def _read_range(
+        self,
+        filepath: str,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+        start_line: Optional[int] = None,
+        end_line: Optional[int] = None,
+        encoding: str = "utf-8",
+    ) -> dict:
+        """Reads a byte range or a line range of a file.
+
+        Byte offsets are zero-based and `end` is exclusive. Line numbers are
+        one-based and inclusive, so "lines 1000-1200" is
+        `start_line=1000, end_line=1200`. Either bound may be omitted; an
+        `end_line` before `start_line` is an error.
+
+        Args:
+            filepath (str): The path to the file to be read.
+            start (Optional[int]): The first byte offset to read.
+            end (Optional[int]): The byte offset to stop reading at.
+            start_line (Optional[int]): The first line to read.
+            end_line (Optional[int]): The last line to read.
+            encoding (str): The text encoding used to decode the bytes.
+
+        Returns:
+            dict: A dictionary containing the status and, on success, the
+                requested content together with its byte offsets, the file
+                size, the encoding, and whether the result was truncated.
+        """
+        try:
+            self._flush_pending(os.path.abspath(filepath))
+            if end_line is not None and end_line < (start_line or 1):
+                return {
+                    "status": "error",
+                    "message": f"end_line {end_line} is before start_line {start_line or 1}.",
+                }
+            size = os.path.getsize(filepath)
+            if start_line is not None or end_line is not None:
+                first, last = self._find_line_span(
+                    filepath, size, start_line or 1, end_line
+                )
+            else:
+                first = min(max(start or 0, 0), size)
+                last = size if end is None else min(max(end, first), size)
+            stop = min(last, first + self.max_result_bytes)
+            with open(filepath, "rb") as f:
+                f.seek(first)
+                data = f.read(stop - first)
+            return {
+                "status": "success",
+                "content": data.decode(encoding, errors="replace"),
+                "start": first,
+                "end": stop,
+                "size": size,
+                "encoding": encoding,
+                "truncated": stop < last,
+            }
+        except FileNotFoundError:
+            return {"status": "error", "message": f"File not found at '{filepath}'."}
+        except Exception as e:
+            return {
+                "status": "error",
+                "message": f"Error reading file '{filepath}': {type(e).__name__}: {e}",
+            }
+
+    def _find_line_span(
+        self, filepath: str, size: int, start_line: int, end_line: Optional[int]
+    ) -> tuple:
+        """Finds the byte span covering an inclusive, one-based line range.
+
+        Large files are scanned through a memory map, which locates newlines
+        without decoding or allocating each line.
+
+        Returns:
+            tuple: The start and end byte offsets of the line range.
+        """
+        with open(filepath, "rb") as f:
+            # An empty file cannot be memory-mapped.
+            if size and size >= self.mmap_threshold:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    return self._scan_line_span(mm.find, size, start_line, end_line)
+            data = f.read()
+            return self._scan_line_span(data.find, size, start_line, end_line)
+
+    @staticmethod
+    def _scan_line_span(find, size: int, start_line: int, end_line: Optional[int]):
+        """Walks newline positions with `find` to locate a line range."""
+        line, pos, first = 1, 0, None
+        while True:
+            if line == start_line:
+                first = pos
+            if end_line is not None and line > end_line:
+                return (size if first is None else first), pos
+            newline = find(b"\n", pos)
+            if newline == -1:
+                return (size if first is None else first), size
+            pos, line = newline + 1, line + 1
+
+    def read_chunks(
+        self, filepath: str, chunk_size: int = 65536, encoding: str = "utf-8"
+    ) -> Iterator[dict]:
+        """Lazily reads a file as a sequence of decoded chunks.
+
+        Multi-byte characters that straddle a chunk boundary are carried
+        over to the next chunk, so every chunk decodes cleanly.
+
+        Args:
+            filepath (str): The path to the file to be read.
+            chunk_size (int): The number of bytes read per chunk, capped to
+                `max_result_bytes`.
+            encoding (str): The text encoding used to decode the bytes.
+
+        Yields:
+            dict: The chunk's byte `offset`, its raw `size` in bytes, and its
+                decoded `content`.
+        """
+        chunk_size = max(1, min(chunk_size, self.max_result_bytes))
+        decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+        with open(filepath, "rb") as f:
+            offset = 0
+            while True:
+                data = f.read(chunk_size)
+                content = decoder.decode(data, final=not data)
+                if not data:
+                    if content:
+                        yield {"offset": offset, "size": 0, "content": content}
+                    return
+                yield {"offset": offset, "size": len(data), "content": content}
+                offset += len(data)
+
+    def _read_chunks_page(
+        self,
+        filepath: str,
+        offset: int = 0,
+        chunk_size: int = 65536,
+        encoding: str = "utf-8",
+    ) -> dict:
+        """Reads the chunks of a file that fit in one result, from `offset`.
+
+        Like the paginated `list_recursive`, each call returns plain data
+        that can be stored in history or sent between processes, plus the
+        `next_offset` to pass to the following call. A multi-byte character
+        cut by the size cap is left for the next page.
+
+        Args:
+            filepath (str): The path to the file to be read.
+            offset (int): The byte offset to start at, e.g. a previous
+                page's `next_offset`.
+            chunk_size (int): The number of bytes per chunk, capped to
+                `max_result_bytes`.
+            encoding (str): The text encoding used to decode the bytes.
+
+        Returns:
+            dict: On success, the file size, encoding, the list of `chunks`
+                (see `read_chunks`) totalling at most `max_result_bytes`,
+                and the `next_offset` (None when the file is exhausted).
+        """
+        try:
+            self._flush_pending(os.path.abspath(filepath))
+            size = os.path.getsize(filepath)
+            offset = min(max(offset, 0), size)
+            chunk_size = max(1, min(chunk_size, self.max_result_bytes))
+            decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+            chunks, position = [], offset
+            with open(filepath, "rb") as f:
+                f.seek(offset)
+                while position - offset < self.max_result_bytes:
+                    budget = self.max_result_bytes - (position - offset)
+                    data = f.read(min(chunk_size, budget))
+                    if not data:
+                        break
+                    content = decoder.decode(data)
+                    chunks.append(
+                        {"offset": position, "size": len(data), "content": content}
+                    )
+                    position += len(data)
+            next_offset = None
+            if position < size:
+                pending = len(decoder.getstate()[0])
+                if pending:
+                    chunks[-1]["size"] -= pending
+                next_offset = position - pending
+            else:
+                remainder = decoder.decode(b"", final=True)
+                if remainder:
+                    chunks[-1]["content"] += remainder
+            return {
+                "status": "success",
+                "chunks": chunks,
+                "size": size,
+                "encoding": encoding,
+                "next_offset": next_offset,
+            }
+        except FileNotFoundError:
+            return {"status": "error", "message": f"File not found at '{filepath}'."}
+        except Exception as e:
+            return {
+                "status": "error",
+                "message": f"Error reading file '{filepath}': {type(e).__name__}: {e}",
+            }
+
+    def _tail(self, filepath: str, lines: int = 10, encoding: str = "utf-8") -> dict:
+        """Reads the last lines of a file without reading the whole file.
+
+        Args:
+            filepath (str): The path to the file to be read.
+            lines (int): The number of trailing lines to return.
+            encoding (str): The text encoding used to decode the bytes.
+
+        Returns:
+            dict: A dictionary containing the status and, on success, the
+                trailing content, its starting byte offset, the file size,
+                the encoding, and whether the result was truncated.
+        """
+        try:
+            self._flush_pending(os.path.abspath(filepath))
+            size = os.path.getsize(filepath)
+            pos, chunks, newlines = size, [], 0
+            with open(filepath, "rb") as f:
+                # Read backwards block by block until the window holds more
+                # newlines than requested lines, or the size cap is reached.
+                # Only each new block is scanned for newlines.
+                while pos > 0 and newlines <= lines:
+                    if size - pos >= self.max_result_bytes:
+                        break
+                    step = min(8192, pos)
+                    pos -= step
+                    f.seek(pos)
+                    chunk = f.read(step)
+                    chunks.append(chunk)
+                    newlines += chunk.count(b"\n")
+            data = b"".join(reversed(chunks))
+            suffix = b"\n" if data.endswith(b"\n") else b""
+            parts = (data[:-1] if suffix else data).split(b"\n")
+            tail = b"\n".join(parts[-lines:]) + suffix if lines > 0 and data else b""
+            truncated = len(tail) > self.max_result_bytes
+            if truncated:
+                cut = len(tail) - self.max_result_bytes
+                tail = tail[cut:]
+            return {
+                "status": "success",
+                "content": tail.decode(encoding, errors="replace"),
+                "start": size - len(tail),
+                "end": size,
+                "size": size,
+                "encoding": encoding,
+                "truncated": truncated,
+            }
+        except FileNotFoundError:
+            return {"status": "error", "message": f"File not found at '{filepath}'."}
+        except Exception as e:
+            return {
+                "status": "error",
+                "message": f"Error reading file '{filepath}': {type(e).__name__}: {e}",
+            }
+
+    def _list_recursive(
+        self,
+        path: str = ".",
+        page_size: int = 1000,
+        cursor: Optional[str] = None,
+        include: Optional[Iterable[str]] = None,
+        exclude: Optional[Iterable[str]] = None,
+        use_gitignore: bool = True,
+        max_depth: Optional[int] = None,
+        max_entries: Optional[int] = None,
+        include_dirs: bool = False,
+        with_stat: bool = True,
+    ) -> dict:
+        """Lists all files under a directory, one page at a time.
+
+        The walk runs with `walker.walk_parallel`, scanning subdirectories on
+        the tool's shared thread pool, so open listings hold no threads of
+        their own between calls. Each page is taken from a live walk: when more entries
+        remain, the result carries a `next_cursor` that resumes the same walk
+        on the next call instead of re-scanning the tree.
+
+        Args:
+            path (str): The directory to list.
+            page_size (int): The maximum number of entries per page.
+            cursor (Optional[str]): The `next_cursor` of a previous page.
+                When given, all other listing options are ignored.
+            include (Optional[Iterable[str]]): Glob patterns files must match.
+            exclude (Optional[Iterable[str]]): Glob patterns to skip.
+            use_gitignore (bool): Whether to honour `.gitignore` files.
+            max_depth (Optional[int]): The deepest level to descend to (0
+                lists only the direct children of `path`).
+            max_entries (Optional[int]): The total number of entries to list
+                across all pages.
+            include_dirs (bool): Whether directories are listed as entries.
+            with_stat (bool): Whether entries include `size` and `mtime`.
+
+        Returns:
+            dict: A dictionary containing the status and, on success, the
+                page of `entries` and the `next_cursor` (None when done).
+        """
+        if cursor is not None:
+            listing = self._listings.pop(cursor, None)
+            if listing is None:
+                return {
+                    "status": "error",
+                    "message": f"Unknown or expired listing cursor '{cursor}'.",
+                }
+        elif not os.path.isdir(path):
+            return {"status": "error", "message": f"Directory not found at '{path}'."}
+        else:
+            listing = walk_parallel(
+                path,
+                include=include,
+                exclude=exclude,
+                use_gitignore=use_gitignore,
+                max_depth=max_depth,
+                max_entries=max_entries,
+                include_dirs=include_dirs,
+                with_stat=with_stat,
+                pool=self._get_pool(),
+            )
+
+        page_size = max(1, page_size)
+        try:
+            entries = list(itertools.islice(listing, page_size + 1))
+        except Exception as e:
+            return {
+                "status": "error",
+                "message": f"Error listing directory '{path}': {type(e).__name__}: {e}",
+            }
+
+        next_cursor = None
+        if len(entries) > page_size:
+            # The look-ahead entry proves the walk is not finished; push it
+            # back in front of the remaining entries for the next page.
+            listing = _prepend(entries.pop(), listing)
+            next_cursor = uuid.uuid4().hex
+            self._listings[next_cursor] = listing
+            while len(self._listings) > self.MAX_OPEN_LISTINGS:
+                _, stale = self._listings.popitem(last=False)
+                stale.close()
+        return {
+            "status": "success",
+            "entries": entries,
+            "count": len(entries),
+            "next_cursor": next_cursor,
+        }
+
     def _write_file(self, filepath: str, content: str) -> dict:
-        """Writes content to a file, overwriting it if it exists.
+        """Atomically writes content to a file, overwriting it if it exists.
+
+        The content goes to a fsynced temporary file that is then renamed
+        over the target, so a crash never leaves a partially written file.
 
         Args:
             filepath (str): The path to the file to be written to.
@@ -97,8 +713,10 @@ class FileSystemTool(Tool):
             dict: A dictionary containing the status of the write operation.
         """
         try:
-            with open(filepath, "w") as f:
-                f.write(content)
+            # Pending appends target the old inode; settle them first.
+            self._appends.release(os.path.abspath(filepath))
+            atomic_write(filepath, content.encode("utf-8"), fsync=self.fsync)
+            self._cache_written(filepath, _normalize_newlines(content))
             return {
                 "status": "success",
                 "message": f"Successfully wrote to file '{filepath}'.",
@@ -109,19 +727,38 @@ class FileSystemTool(Tool):
                 "message": f"Error writing to file '{filepath}': {type(e).__name__}: {e}",
             }
 
-    def _modify_file(self, filepath: str, content_to_append: str) -> dict:
+    def _modify_file(
+        self, filepath: str, content_to_append: str, buffered: bool = False
+    ) -> dict:
         """Appends content to the end of a specified file.
 
         Args:
             filepath (str): The path to the file to be modified.
             content_to_append (str): The content to append to the file.
+            buffered (bool): If True, the append is queued and coalesced
+                with other small appends; it reaches the file on the next
+                size or time threshold, on "flush", or before the file is
+                next read or written through this tool.
 
         Returns:
             dict: A dictionary containing the status of the append operation.
         """
         try:
-            with open(filepath, "a") as f:
+            key = os.path.abspath(filepath)
+            if buffered:
+                self._cache.invalidate(key)
+                self._appends.append(key, content_to_append.encode("utf-8"))
+                return {
+                    "status": "success",
+                    "message": f"Queued append to file '{filepath}'.",
+                }
+            self._flush_pending(key)
+            entry = self._cache_entry_for(key)
+            with open(filepath, "a", encoding="utf-8") as f:
                 f.write(content_to_append)
+            if entry is not None and not entry[3]:
+                appended = entry[1] + _normalize_newlines(content_to_append)
+                self._cache_written(filepath, appended)
             return {
                 "status": "success",
                 "message": f"Successfully modified file '{filepath}'.",
@@ -131,3 +768,184 @@ class FileSystemTool(Tool):
                 "status": "error",
                 "message": f"Error modifying file '{filepath}': {type(e).__name__}: {e}",
             }
+
+    def _flush(self, filepath: Optional[str] = None) -> dict:
+        """Writes buffered appends to disk, fsyncing them if `fsync` is set.
+
+        Args:
+            filepath (Optional[str]): The file to flush, or None to flush
+                every file with pending appends.
+
+        Returns:
+            dict: A dictionary containing the status of the flush.
+        """
+        try:
+            self._appends.flush(
+                os.path.abspath(filepath) if filepath else None, fsync=self.fsync
+            )
+            return {"status": "success", "message": "Flushed buffered appends."}
+        except Exception as e:
+            return {
+                "status": "error",
+                "message": f"Error flushing appends: {type(e).__name__}: {e}",
+            }
+
+    def close(self):
+        """Flushes buffered appends and releases open handles and threads."""
+        self._appends.close()
+        while self._listings:
+            _, listing = self._listings.popitem()
+            listing.close()
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def _flush_pending(self, key: str):
+        """Writes any buffered appends for a file before it is accessed."""
+        if self._appends.pending(key):
+            self._appends.flush(key)
+
+    def _cache_entry_for(self, key: str) -> Optional[list]:
+        """Returns the valid cache entry for an absolute path, if any."""
+        try:
+            return self._cache.get(key, self._cache.signature(os.stat(key)))
+        except OSError:
+            return None
+
+    def _cache_written(self, filepath: str, content: str):
+        """Records freshly written content in the cache under its new signature."""
+        key = os.path.abspath(filepath)
+        try:
+            st = os.stat(key)
+        except OSError:
+            self._cache.invalidate(key)
+            return
+        if st.st_size > self.max_result_bytes:
+            # A read would be truncated; let it populate the cache instead.
+            self._cache.invalidate(key)
+            return
+        self._cache.put(key, self._cache.signature(st), content, st.st_size)
+
+
+class SearchTool(Tool):
+    """A tool for searching file contents across a workspace.
+
+    Instead of reading files one by one, agents can ask where something is
+    defined or used. Queries are answered from an incremental
+    `TrigramIndex`, which is built on first use and refreshed for changed
+    files at most once every `refresh_interval` seconds.
+
+    Attributes:
+        index (TrigramIndex): The trigram index over the workspace.
+        refresh_interval (float): The minimum number of seconds between
+            automatic index refreshes.
+    """
+
+    def __init__(self, root: str = ".", refresh_interval: float = 2.0):
+        """Initializes the SearchTool.
+
+        Args:
+            root (str): The directory tree to search.
+            refresh_interval (float): How stale the index may get, in
+                seconds, before a search triggers a refresh.
+        """
+        super().__init__(
+            "SearchTool",
+            "A tool for finding which files and lines of the workspace contain a substring or regular expression, without reading the files one by one.",
+        )
+        self.index = TrigramIndex(root)
+        self.refresh_interval = refresh_interval
+        self._last_refresh = None
+
+    def __getstate__(self):
+        # The index is rebuilt on first use rather than copied.
+        return {"root": self.index.root, "refresh_interval": self.refresh_interval}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def use(self, operation: str, **kwargs) -> dict:
+        """Dispatches search operations based on the provided command.
+
+        Args:
+            operation (str): The operation to perform. Supported values are
+                "search" and "refresh".
+            **kwargs: The arguments required for the specific operation.
+
+        Returns:
+            dict: A dictionary containing the status and result of the
+                operation.
+        """
+        if operation == "search":
+            return self._search(**kwargs)
+        elif operation == "refresh":
+            return self._refresh()
+        else:
+            return {
+                "status": "error",
+                "message": f"Unknown operation '{operation}'. Supported: search, refresh.",
+            }
+
+    def _refresh(self) -> dict:
+        """Re-indexes files whose modification time or size changed.
+
+        Returns:
+            dict: A dictionary containing the status and refresh statistics.
+        """
+        try:
+            stats = self.index.refresh()
+            self._last_refresh = time.monotonic()
+            return {"status": "success", **stats}
+        except Exception as e:
+            return {
+                "status": "error",
+                "message": f"Error indexing '{self.index.root}': {type(e).__name__}: {e}",
+            }
+
+    def _search(
+        self,
+        query: str,
+        regex: bool = False,
+        case_sensitive: bool = True,
+        max_results: int = 100,
+    ) -> dict:
+        """Searches the workspace for a substring or regular expression.
+
+        Args:
+            query (str): The substring or pattern to look for.
+            regex (bool): Whether `query` is a regular expression.
+            case_sensitive (bool): Whether matching is case sensitive.
+            max_results (int): The maximum number of hits to return.
+
+        Returns:
+            dict: A dictionary containing the status and, on success, a list
+                of `hits` with `path`, `line` and `text` keys.
+        """
+        if (
+            self._last_refresh is None
+            or time.monotonic() - self._last_refresh >= self.refresh_interval
+        ):
+            refreshed = self._refresh()
+            if refreshed["status"] == "error":
+                return refreshed
+        try:
+            hits = self.index.search(query, regex, case_sensitive, max_results)
+        except re.error as e:
+            return {"status": "error", "message": f"Invalid regex '{query}': {e}"}
+        return {
+            "status": "success",
+            "hits": hits,
+            "count": len(hits),
+            "truncated": len(hits) >= max_results,
+        }
+
+
+def _normalize_newlines(content: str) -> str:
+    """Applies the universal-newline translation that text-mode reads perform."""
+    return content.replace("\r\n", "\n").replace("\r", "\n")
+
+
+def _prepend(first, rest: Iterator) -> Iterator:
+    """Yields `first` and then the items of `rest`, closing `rest` with it."""
+    yield first
+    yield from rest
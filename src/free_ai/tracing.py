@@ -0,0 +1,312 @@
+"""Lightweight span tracing for the Director pipeline.
+
+Tracing is off by default. While it is off, `span` returns a shared no-op
+context manager and `traced` functions call straight through, so the
+instrumentation left in hot paths costs one global lookup per call.
+
+Enable it with `enable()` (or by setting `FREE_AI_TRACE=<path>` and calling
+`enable_from_env()`), then inspect `get_tracer().summary()` or write a
+Chrome trace-event file with `export_chrome_trace` and open it in
+chrome://tracing or https://ui.perfetto.dev.
+"""
+
+import atexit
+import functools
+import json
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_tracer: Optional["Tracer"] = None
+
+
+class _NullSpan:
+    """The span returned while tracing is disabled; does nothing."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def set(self, **attributes):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Span:
+    """A timed section of work, recorded by its `Tracer` when it ends."""
+
+    __slots__ = ("tracer", "name", "attributes", "start_ns", "profiler")
+
+    def __init__(self, tracer: "Tracer", name: str, attributes: dict):
+        self.tracer = tracer
+        self.name = name
+        self.attributes = attributes
+        self.start_ns = 0
+        self.profiler = None
+
+    def __enter__(self):
+        self.profiler = self.tracer._maybe_start_profile(self.name)
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end_ns = time.perf_counter_ns()
+        if self.profiler is not None:
+            self.tracer._stop_profile(self.profiler)
+        if exc_type is not None:
+            self.attributes["error"] = exc_type.__name__
+        self.tracer._record(self, end_ns)
+        return False
+
+    def set(self, **attributes):
+        """Adds attributes to the span, e.g. result sizes."""
+        self.attributes.update(attributes)
+
+
+class Tracer:
+    """Collects spans from all threads and summarizes or exports them.
+
+    Optionally, a random sample of spans is run under `cProfile`; the
+    sampled profiles are merged and can be written with `dump_profile`.
+
+    Attributes:
+        max_spans (int): The number of most recent spans that are kept.
+        profile_rate (float): The fraction of eligible spans to profile.
+        profile_spans (Optional[frozenset]): The span names eligible for
+            profiling, or None for all.
+    """
+
+    def __init__(
+        self,
+        max_spans: int = 100_000,
+        profile_rate: float = 0.0,
+        profile_spans: Optional[Iterable[str]] = None,
+    ):
+        """Initializes an empty tracer.
+
+        Args:
+            max_spans (int): The number of spans to keep; older ones are
+                dropped.
+            profile_rate (float): The probability that an eligible span is
+                profiled with cProfile.
+            profile_spans (Optional[Iterable[str]]): Names of the spans that
+                may be profiled, e.g. {"cognitive_engine.think"}.
+        """
+        self.max_spans = max_spans
+        self.profile_rate = profile_rate
+        self.profile_spans = frozenset(profile_spans) if profile_spans else None
+        self._spans: deque = deque(maxlen=max_spans)
+        self._origin_ns = time.perf_counter_ns()
+        self._pid = os.getpid()
+        self._local = threading.local()
+        # The merged `pstats.Stats` of the profiled spans.
+        self._stats = None
+        self._stats_lock = threading.Lock()
+
+    def span(self, name: str, **attributes) -> Span:
+        return Span(self, name, attributes)
+
+    def spans(self) -> List[dict]:
+        """Returns the recorded spans, oldest first."""
+        return [
+            {
+                "name": name,
+                "start_us": (start - self._origin_ns) / 1000,
+                "duration_us": duration / 1000,
+                "thread": thread,
+                "attributes": attributes,
+            }
+            for name, start, duration, thread, attributes in list(self._spans)
+        ]
+
+    def summary(self) -> Dict[str, dict]:
+        """Returns the count, total, mean and max duration (ms) per span name."""
+        totals: Dict[str, list] = {}
+        for name, _, duration, _, _ in list(self._spans):
+            entry = totals.setdefault(name, [0, 0, 0])
+            entry[0] += 1
+            entry[1] += duration
+            entry[2] = max(entry[2], duration)
+        return {
+            name: {
+                "count": count,
+                "total_ms": round(total / 1e6, 3),
+                "mean_ms": round(total / count / 1e6, 3),
+                "max_ms": round(longest / 1e6, 3),
+            }
+            for name, (count, total, longest) in sorted(totals.items())
+        }
+
+    def export_chrome_trace(self, path: str):
+        """Writes the spans as a Chrome trace-event JSON file.
+
+        Args:
+            path (str): The file to write.
+        """
+        events = [
+            {
+                "name": name,
+                "cat": name.split(".")[0],
+                "ph": "X",
+                "ts": (start - self._origin_ns) / 1000,
+                "dur": duration / 1000,
+                "pid": self._pid,
+                "tid": thread,
+                "args": attributes,
+            }
+            for name, start, duration, thread, attributes in list(self._spans)
+        ]
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f, default=str)
+        logger.info(f"Wrote {len(events)} trace events to '{path}'.")
+
+    def dump_profile(self, path: str) -> bool:
+        """Writes the merged cProfile statistics of the sampled spans.
+
+        Returns:
+            bool: False if no span has been profiled yet.
+        """
+        with self._stats_lock:
+            if self._stats is None:
+                return False
+            self._stats.dump_stats(path)
+        return True
+
+    def clear(self):
+        """Drops all recorded spans and profiles."""
+        self._spans.clear()
+        with self._stats_lock:
+            self._stats = None
+
+    def _record(self, span: Span, end_ns: int):
+        self._spans.append(
+            (
+                span.name,
+                span.start_ns,
+                end_ns - span.start_ns,
+                threading.get_ident(),
+                span.attributes,
+            )
+        )
+
+    def _maybe_start_profile(self, name: str):
+        """Starts a profiler for a sampled span, unless one is running.
+
+        Returns:
+            Optional[cProfile.Profile]: The running profiler, or None.
+        """
+        if not self.profile_rate or getattr(self._local, "profiling", False):
+            return None
+        if self.profile_spans is not None and name not in self.profile_spans:
+            return None
+        if random.random() >= self.profile_rate:
+            return None
+        # Imported here: only profiled runs need the profiler modules.
+        import cProfile
+
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler is already active in this thread.
+            return None
+        self._local.profiling = True
+        return profiler
+
+    def _stop_profile(self, profiler):
+        import pstats
+
+        profiler.disable()
+        self._local.profiling = False
+        with self._stats_lock:
+            if self._stats is None:
+                self._stats = pstats.Stats(profiler)
+            else:
+                self._stats.add(profiler)
+
+
+def enable(**tracer_kwargs) -> Tracer:
+    """Turns tracing on with a fresh `Tracer` and returns it.
+
+    Args:
+        **tracer_kwargs: Arguments for `Tracer`, e.g. `profile_rate`.
+    """
+    global _tracer
+    _tracer = Tracer(**tracer_kwargs)
+    return _tracer
+
+
+def disable():
+    """Turns tracing off; recorded spans stay on the returned tracer."""
+    global _tracer
+    _tracer = None
+
+
+def get_tracer() -> Optional[Tracer]:
+    """Returns the active tracer, or None if tracing is disabled."""
+    return _tracer
+
+
+def enable_from_env() -> Optional[Tracer]:
+    """Enables tracing if `FREE_AI_TRACE` names an output file.
+
+    The Chrome trace is written to that file when the process exits. If
+    `FREE_AI_PROFILE_RATE` is set, that fraction of Director `think` steps
+    is also profiled and the statistics are written next to the trace with
+    a `.prof` suffix.
+    """
+    path = os.environ.get("FREE_AI_TRACE")
+    if not path:
+        return None
+    rate = float(os.environ.get("FREE_AI_PROFILE_RATE", "0") or 0)
+    tracer = enable(profile_rate=rate, profile_spans={"cognitive_engine.think"})
+
+    def export():
+        tracer.export_chrome_trace(path)
+        tracer.dump_profile(os.path.splitext(path)[0] + ".prof")
+
+    atexit.register(export)
+    logger.info(f"Tracing enabled; the trace will be written to '{path}'.")
+    return tracer
+
+
+def span(name: str, **attributes):
+    """Returns a context manager that times the enclosed block.
+
+    Args:
+        name (str): The span name, dotted by component (e.g. "memory.query").
+        **attributes: Extra data shown with the span in trace viewers.
+    """
+    tracer = _tracer
+    if tracer is None:
+        return _NULL_SPAN
+    return Span(tracer, name, attributes)
+
+
+def traced(name: str) -> Callable:
+    """Decorates a function so each call is recorded as a span."""
+
+    def decorator(function: Callable) -> Callable:
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            tracer = _tracer
+            if tracer is None:
+                return function(*args, **kwargs)
+            with Span(tracer, name, {}):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
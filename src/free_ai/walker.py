@@ -0,0 +1,332 @@
+import os
+import re
+from concurrent.futures import FIRST_COMPLETED, Executor, ThreadPoolExecutor, wait
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+
+class IgnoreRules:
+    """A set of gitignore-style path patterns.
+
+    Supports the common gitignore syntax: `*`, `?`, `[...]` and `**`
+    wildcards, `!` negation, a trailing `/` to match directories only, and a
+    leading or inner `/` to anchor a pattern to the rules' base directory.
+    Patterns without a slash match a name at any depth. As in git, the last
+    matching pattern wins.
+
+    Attributes:
+        base (str): The POSIX-style directory, relative to the walk root,
+            that anchored patterns are resolved against.
+    """
+
+    def __init__(self, patterns: Iterable[str] = (), base: str = ""):
+        """Compiles the given patterns.
+
+        Args:
+            patterns (Iterable[str]): Lines in gitignore format. Blank lines
+                and comments are skipped.
+            base (str): The directory the rules were defined in, relative to
+                the walk root ("" for the root itself).
+        """
+        self.base = base.strip("/")
+        self._rules: List[Tuple[re.Pattern, bool, bool]] = []
+        for line in patterns:
+            line = line.rstrip("\n").rstrip()
+            if not line or line.startswith("#"):
+                continue
+            negated = line.startswith("!")
+            if negated:
+                line = line[1:]
+            dir_only = line.endswith("/")
+            line = line.rstrip("/")
+            anchored = "/" in line
+            line = line.lstrip("/")
+            regex = _translate(line)
+            if not anchored:
+                regex = "(?:.*/)?" + regex
+            self._rules.append((re.compile(regex + r"\Z"), negated, dir_only))
+
+    def __bool__(self) -> bool:
+        return bool(self._rules)
+
+    @classmethod
+    def from_file(cls, path: str, base: str = "") -> "IgnoreRules":
+        """Loads rules from a `.gitignore`-style file.
+
+        Args:
+            path (str): The file to read.
+            base (str): The directory the file lives in, relative to the
+                walk root.
+
+        Returns:
+            IgnoreRules: The parsed rules (empty if the file is unreadable).
+        """
+        try:
+            with open(path, "r", errors="replace") as f:
+                return cls(f.readlines(), base=base)
+        except OSError:
+            return cls((), base=base)
+
+    def match(self, rel_path: str, is_dir: bool) -> Optional[bool]:
+        """Evaluates the rules against a path.
+
+        Args:
+            rel_path (str): The POSIX-style path relative to the walk root.
+            is_dir (bool): Whether the path is a directory.
+
+        Returns:
+            Optional[bool]: True if the path is matched, False if it is
+                explicitly re-included by a negated rule, or None if no
+                rule applies.
+        """
+        if self.base:
+            if not rel_path.startswith(self.base + "/"):
+                return None
+            prefix_length = len(self.base) + 1
+            rel_path = rel_path[prefix_length:]
+        result = None
+        for regex, negated, dir_only in self._rules:
+            if dir_only and not is_dir:
+                continue
+            if regex.match(rel_path):
+                result = not negated
+        return result
+
+    def matches(self, rel_path: str, is_dir: bool = False) -> bool:
+        """Returns True if the path is matched by the rules."""
+        return bool(self.match(rel_path, is_dir))
+
+
+def _translate(pattern: str) -> str:
+    """Translates a single gitignore glob into a regular expression."""
+    i, n, out = 0, len(pattern), []
+    while i < n:
+        c = pattern[i]
+        if pattern.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("/**", i) and i + 3 == n:
+            out.append("/.*")
+            i += 3
+        elif pattern.startswith("**", i):
+            out.append(".*")
+            i += 2
+        elif c == "*":
+            out.append("[^/]*")
+            i += 1
+        elif c == "?":
+            out.append("[^/]")
+            i += 1
+        elif c == "[":
+            close = pattern.find("]", i + 1)
+            if close == -1:
+                out.append(re.escape(c))
+                i += 1
+            else:
+                start = i + 1
+                body = pattern[start:close].replace("\\", "\\\\")
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                out.append(f"[{body}]")
+                i = close + 1
+        else:
+            out.append(re.escape(c))
+            i += 1
+    return "".join(out)
+
+
+def _is_ignored(rules: Tuple[IgnoreRules, ...], rel_path: str, is_dir: bool) -> bool:
+    """Applies a chain of rule sets; deeper (later) rule sets take precedence."""
+    ignored = False
+    for rule_set in rules:
+        result = rule_set.match(rel_path, is_dir)
+        if result is not None:
+            ignored = result
+    return ignored
+
+
+def _scan_directory(
+    root: str,
+    rel_dir: str,
+    depth: int,
+    rules: Tuple[IgnoreRules, ...],
+    include: IgnoreRules,
+    exclude: IgnoreRules,
+    use_gitignore: bool,
+    with_stat: bool,
+    include_dirs: bool,
+) -> Tuple[List[dict], List[Tuple[str, int, Tuple[IgnoreRules, ...]]]]:
+    """Scans one directory and returns its entries and subdirectories to visit.
+
+    Runs on a worker thread: `os.scandir` and `stat` release the GIL, so
+    sibling directories are read concurrently.
+    """
+    abs_dir = os.path.join(root, rel_dir) if rel_dir else root
+    try:
+        with os.scandir(abs_dir) as it:
+            dir_entries = list(it)
+    except OSError:
+        return [], []
+
+    if use_gitignore and any(e.name == ".gitignore" for e in dir_entries):
+        local_rules = IgnoreRules.from_file(
+            os.path.join(abs_dir, ".gitignore"), base=rel_dir
+        )
+        if local_rules:
+            rules = rules + (local_rules,)
+
+    # Rule evaluation is the per-entry hot spot; skip it when nothing applies.
+    filtered = bool(rules) or bool(exclude)
+    prefix = rel_dir + "/" if rel_dir else ""
+    entries, subdirs = [], []
+    for entry in dir_entries:
+        rel_path = prefix + entry.name
+        try:
+            is_dir = entry.is_dir(follow_symlinks=False)
+        except OSError:
+            continue
+        if is_dir and entry.name == ".git":
+            continue
+        if filtered and (
+            _is_ignored(rules, rel_path, is_dir) or exclude.matches(rel_path, is_dir)
+        ):
+            continue
+        if is_dir:
+            subdirs.append((rel_path, depth + 1, rules))
+            if not include_dirs:
+                continue
+        elif include and not include.matches(rel_path, False):
+            continue
+
+        if with_stat:
+            try:
+                st = entry.stat(follow_symlinks=False)
+            except OSError:
+                continue
+            entries.append(
+                {
+                    "path": rel_path,
+                    "is_dir": is_dir,
+                    "size": st.st_size,
+                    "mtime": st.st_mtime,
+                }
+            )
+        else:
+            entries.append({"path": rel_path, "is_dir": is_dir})
+    return entries, subdirs
+
+
+def walk_parallel(
+    root: str,
+    include: Optional[Iterable[str]] = None,
+    exclude: Optional[Iterable[str]] = None,
+    use_gitignore: bool = True,
+    max_depth: Optional[int] = None,
+    max_entries: Optional[int] = None,
+    include_dirs: bool = False,
+    with_stat: bool = True,
+    max_workers: int = 8,
+    pool: Optional[Executor] = None,
+) -> Iterator[dict]:
+    """Recursively lists a directory tree, scanning subdirectories in parallel.
+
+    Entries are yielded as soon as their directory has been scanned, so
+    callers can stream or paginate results without waiting for the whole
+    walk. The order is not deterministic.
+
+    Args:
+        root (str): The directory to walk.
+        include (Optional[Iterable[str]]): Glob patterns a file must match to
+            be listed (directories are always traversed).
+        exclude (Optional[Iterable[str]]): Glob patterns for files and
+            directories to skip entirely.
+        use_gitignore (bool): Whether to honour `.gitignore` files found in
+            the tree. `.git` directories are always skipped.
+        max_depth (Optional[int]): The deepest level to descend to, where the
+            root's direct children are at depth 0.
+        max_entries (Optional[int]): Stop after yielding this many entries.
+        include_dirs (bool): Whether to list directories as well as files.
+        with_stat (bool): Whether to include `size` and `mtime` per entry.
+        max_workers (int): The number of scanning threads, if no `pool` is
+            given.
+        pool (Optional[Executor]): An executor to scan on, shared with other
+            walks. It is left running when the walk ends. If None, the walk
+            starts its own threads and stops them when it ends.
+
+    Yields:
+        dict: An entry with its root-relative POSIX `path`, `is_dir` and,
+            if requested, `size` and `mtime`.
+    """
+    if pool is not None:
+        yield from _walk(
+            pool,
+            root,
+            include,
+            exclude,
+            use_gitignore,
+            max_depth,
+            max_entries,
+            include_dirs,
+            with_stat,
+        )
+        return
+    with ThreadPoolExecutor(max_workers=max_workers) as own_pool:
+        yield from _walk(
+            own_pool,
+            root,
+            include,
+            exclude,
+            use_gitignore,
+            max_depth,
+            max_entries,
+            include_dirs,
+            with_stat,
+        )
+
+
+def _walk(
+    pool: Executor,
+    root: str,
+    include: Optional[Iterable[str]],
+    exclude: Optional[Iterable[str]],
+    use_gitignore: bool,
+    max_depth: Optional[int],
+    max_entries: Optional[int],
+    include_dirs: bool,
+    with_stat: bool,
+) -> Iterator[dict]:
+    """Runs the walk of `walk_parallel` on `pool`."""
+    include_rules = IgnoreRules(include or ())
+    exclude_rules = IgnoreRules(exclude or ())
+    yielded = 0
+
+    def submit(rel_dir, depth, rules):
+        return pool.submit(
+            _scan_directory,
+            root,
+            rel_dir,
+            depth,
+            rules,
+            include_rules,
+            exclude_rules,
+            use_gitignore,
+            with_stat,
+            include_dirs,
+        )
+
+    pending = {submit("", 0, ())}
+    try:
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                entries, subdirs = future.result()
+                for rel_dir, depth, rules in subdirs:
+                    if max_depth is None or depth <= max_depth:
+                        pending.add(submit(rel_dir, depth, rules))
+                for entry in entries:
+                    yield entry
+                    yielded += 1
+                    if max_entries is not None and yielded >= max_entries:
+                        return
+    finally:
+        for future in pending:
+            future.cancel()
@@ -0,0 +1,274 @@
+import threading
+import time
+
+from free_ai.action_executor import ActionExecutor
+from free_ai.agent import Director
+from free_ai.agora import Agora
+from free_ai.personality import PhilosophicalPersonality
+
+
+class PlanOracle:
+    """An offline Oracle that always returns the same plan."""
+
+    def __init__(self, plan):
+        self.plan = plan
+
+    def generate_plan(self, goal, history, context=""):
+        return [dict(step) for step in self.plan]
+
+    def generate_code(self, prompt, context):
+        return ""
+
+
+class NullMemory:
+    def query(self, query_text, n_results=3):
+        return []
+
+
+class SlowProbe:
+    """A tool that records how many of its calls overlap."""
+
+    def __init__(self):
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, n):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(0.05)
+        with self.lock:
+            self.active -= 1
+        return {"status": "success", "content": str(n)}
+
+
+def make_director(plan, tools=None, oracle=None):
+    return Director(
+        name="Agent",
+        role="Worker",
+        personality=PhilosophicalPersonality(),
+        external_tools=tools or {},
+        shared_memory=NullMemory(),
+        oracle=oracle or PlanOracle(plan),
+    )
+
+
+def run_to_end(executor, history, max_steps=20):
+    for _ in range(max_steps):
+        action = executor.step("goal", history)
+        if action["action"] in ("finish", "final_answer", "error"):
+            return action
+    raise AssertionError("The plan did not finish.")
+
+
+def test_consecutive_independent_tool_steps_run_concurrently():
+    """
+    Tests that independent tool steps overlap and are recorded in plan order.
+    """
+    probe = SlowProbe()
+    plan = [
+        {"action": "use_tool", "tool_name": "Probe", "arguments": {"n": i}}
+        for i in range(3)
+    ]
+    director = make_director(plan, {"Probe": probe})
+    # Tools with unknown effects are not batched unless declared pure.
+    executor = ActionExecutor(director, max_parallel=4, pure_tools={"Probe"})
+    history = []
+    assert run_to_end(executor, history)["action"] == "finish"
+    executor.close()
+
+    assert probe.peak == 3
+    assert [event["result"]["content"] for event in history] == ["0", "1", "2"]
+
+
+def test_conflicting_file_steps_keep_their_order(tmp_path):
+    """
+    Tests that a read of a path is not batched with an earlier write to it.
+    """
+    path = str(tmp_path / "notes.txt")
+    other = str(tmp_path / "other.txt")
+    plan = [
+        {
+            "action": "use_tool",
+            "tool_name": "FileSystemTool",
+            "arguments": {"operation": "write_file", "filepath": path, "content": "v1"},
+        },
+        {
+            "action": "use_tool",
+            "tool_name": "FileSystemTool",
+            "arguments": {"operation": "write_file", "filepath": other, "content": "x"},
+        },
+        {
+            "action": "use_tool",
+            "tool_name": "FileSystemTool",
+            "arguments": {"operation": "read_file", "filepath": path},
+        },
+    ]
+    director = make_director(plan)
+    executor = ActionExecutor(director)
+    history = []
+
+    first = executor.step("goal", history)
+    # The two writes touch different files and run as one batch.
+    assert first["arguments"]["filepath"] == other
+    assert len(history) == 2
+    run_to_end(executor, history)
+    executor.close()
+
+    assert "v1" in history[2]["result"]["content"]
+
+
+def test_write_many_with_a_list_of_files_is_batched_by_its_paths(tmp_path):
+    """
+    Tests that write_many's list-of-dicts form is understood when batching.
+    """
+    path = str(tmp_path / "a.txt")
+    plan = [
+        {
+            "action": "use_tool",
+            "tool_name": "FileSystemTool",
+            "arguments": {
+                "operation": "write_many",
+                "files": [{"filepath": path, "content": "many"}],
+            },
+        },
+        {
+            "action": "use_tool",
+            "tool_name": "FileSystemTool",
+            "arguments": {"operation": "read_file", "filepath": path},
+        },
+    ]
+    executor = ActionExecutor(make_director(plan))
+    history = []
+
+    assert run_to_end(executor, history)["action"] == "finish"
+    executor.close()
+
+    assert history[0]["result"]["status"] == "success"
+    assert "many" in history[1]["result"]["content"]
+
+
+def test_delegation_and_non_blocking_wait():
+    """
+    Tests that a pending wait is re-queued behind the remaining plan.
+    """
+    agora = Agora()
+    plan = [
+        {
+            "action": "delegate_task",
+            "arguments": {"to_role": "Researcher", "task": {"topic": "SOLID"}},
+        },
+        {"action": "wait_for_reply", "arguments": {}},
+        {"action": "express_personality", "arguments": {}},
+    ]
+    director = make_director(plan)
+    executor = ActionExecutor(director, agora=agora, reply_timeout=0.01)
+    history = []
+
+    executor.step("goal", history)
+    message_id = history[0]["result"]["message_id"]
+    executor.step("goal", history)
+    assert history[1]["result"] == {"status": "pending", "message_id": message_id}
+
+    executor.step("goal", history)
+    assert history[2]["action"]["action"] == "express_personality"
+
+    agora.claim_message(message_id, "Researcher-1")
+    agora.post_reply(message_id, "Researcher-1", {"summary": "done"})
+    executor.step("goal", history)
+    assert history[3]["result"]["reply"]["result"] == {"summary": "done"}
+    assert run_to_end(executor, history)["action"] == "finish"
+
+
+def test_a_wait_with_nothing_else_to_do_blocks_until_the_reply():
+    """
+    Tests that the last step of a plan waits for its reply instead of polling.
+    """
+    agora = Agora()
+    plan = [
+        {"action": "delegate_task", "arguments": {"to_role": "Researcher"}},
+        {"action": "wait_for_reply", "arguments": {}},
+    ]
+    executor = ActionExecutor(make_director(plan), agora=agora, reply_timeout=10)
+    history = []
+    executor.step("goal", history)
+    message_id = history[0]["result"]["message_id"]
+
+    def answer():
+        time.sleep(0.2)
+        agora.claim_message(message_id, "Researcher-1")
+        agora.post_reply(message_id, "Researcher-1", {"summary": "done"})
+
+    threading.Thread(target=answer).start()
+    started = time.monotonic()
+    executor.step("goal", history)
+
+    assert time.monotonic() - started < 5
+    assert history[1]["result"]["status"] == "success"
+    assert history[1]["result"]["reply"]["result"] == {"summary": "done"}
+
+
+class RepairingOracle(PlanOracle):
+    """A PlanOracle that answers repair requests with `repair`."""
+
+    def __init__(self, plan, repair):
+        super().__init__(plan)
+        self.repair = repair
+        self.repairs = []
+
+    def repair_plan(self, goal, history, failed_step, error, remaining):
+        self.repairs.append((failed_step, error, remaining))
+        return [dict(step) for step in self.repair]
+
+
+def fail(text):
+    return {"status": "error", "message": f"cannot handle {text}"}
+
+
+def echo(text):
+    return {"status": "success", "content": text}
+
+
+def test_failed_step_splices_a_repaired_suffix():
+    """
+    Tests that a failure replaces the remaining plan and replans are capped.
+    """
+    plan = [
+        {"action": "use_tool", "tool_name": "Fail", "arguments": {"text": "a"}},
+        {"action": "use_tool", "tool_name": "Echo", "arguments": {"text": "stale"}},
+    ]
+    repair = [{"action": "use_tool", "tool_name": "Fail", "arguments": {"text": "b"}}]
+    oracle = RepairingOracle(plan, repair)
+    director = make_director(plan, {"Fail": fail, "Echo": echo}, oracle)
+    director.cognitive_engine.max_replans = 2
+    executor = ActionExecutor(director)
+    history = []
+    run_to_end(executor, history)
+
+    repairs = oracle.repairs
+    assert len(repairs) == 2
+    assert repairs[0][1] == "cannot handle a"
+    assert repairs[0][2] == [plan[1]]
+    # The repaired plan failed as well; after the cap the last repair is kept.
+    assert [event["action"]["arguments"]["text"] for event in history] == [
+        "a",
+        "b",
+        "b",
+    ]
+
+
+def test_invalid_step_is_repaired_instead_of_rejecting_the_plan():
+    plan = [
+        {"action": "use_tool", "tool_name": "Echo", "arguments": {"text": "kept"}},
+        {"action": "use_tool", "tool_name": "Missing", "arguments": {}},
+    ]
+    repair = [{"action": "use_tool", "tool_name": "Echo", "arguments": {"text": "fix"}}]
+    oracle = RepairingOracle(plan, repair)
+    director = make_director(plan, {"Echo": echo}, oracle)
+    executor = ActionExecutor(director)
+    history = []
+
+    assert run_to_end(executor, history)["action"] == "finish"
+    assert [event["result"]["content"] for event in history] == ["kept", "fix"]
+    assert "Missing" in oracle.repairs[0][1]
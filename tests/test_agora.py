@@ -79,3 +79,102 @@ def test_post_and_get_reply(agora_instance):
     assert final_reply is not None
     assert final_reply["result"] == reply_content
     assert final_reply["from_agent"] == "Researcher_B"
+
+
+def test_replied_messages_are_archived_and_still_retrievable(tmp_path):
+    """
+    Tests that a replied message leaves the in-memory board but its reply can
+    still be fetched, even from a fresh Agora reading the same archive.
+    """
+    archive_path = str(tmp_path / "agora_archive.jsonl")
+    agora = Agora(archive_path=archive_path)
+    message_id = agora.post_message(
+        from_agent="Manager_1", to_agent_role="Researcher", content={"task": "x"}
+    )
+    agora.claim_message(message_id, by_agent="Researcher_A")
+    agora.post_reply(message_id, from_agent="Researcher_A", result={"answer": 42})
+
+    assert agora.message_board == [], "Replied messages should not stay resident."
+    assert agora.get_reply_for_message(message_id)["result"] == {"answer": 42}
+    agora.close()
+
+    reopened = Agora(archive_path=archive_path)
+    assert reopened.get_reply_for_message(message_id)["from_agent"] == "Researcher_A"
+    reopened.close()
+
+
+def test_expired_messages_are_archived(tmp_path):
+    """
+    Tests that unanswered messages older than the TTL are swept into the archive.
+    """
+    agora = Agora(archive_path=str(tmp_path / "archive.jsonl"), message_ttl=0)
+    stale_id = agora.post_message(
+        from_agent="Manager_1", to_agent_role="Researcher", content={"task": "old"}
+    )
+
+    assert agora.compact() == 1
+    assert agora.message_board == []
+    assert agora.get_reply_for_message(stale_id) is None
+    agora.close()
+
+
+def test_claimed_messages_do_not_expire(tmp_path):
+    """
+    Tests that a task taking longer than the TTL can still be answered.
+    """
+    agora = Agora(archive_path=str(tmp_path / "archive.jsonl"), message_ttl=0)
+    claimed_id = agora.post_message("Manager_1", "Researcher", {"task": "long"})
+    agora.claim_message(claimed_id, by_agent="Researcher_A")
+    stale_id = agora.post_message("Manager_1", "Researcher", {"task": "stale"})
+
+    agora.post_message("Manager_1", "Researcher", {"task": "new"})
+    assert stale_id not in [msg.id for msg in agora.message_board]
+    assert agora.compact() == 1
+
+    agora.post_reply(claimed_id, from_agent="Researcher_A", result={"done": True})
+    assert agora.get_reply_for_message(claimed_id)["result"] == {"done": True}
+    agora.close()
+
+
+def test_topic_fan_out_to_multiple_subscribers(agora_instance):
+    """
+    Tests that every subscriber reads the same published events through its own cursor.
+    """
+    cursor_a = agora_instance.subscribe("memory.updated", "Agent_A")
+    cursor_b = agora_instance.subscribe("memory.updated", "Agent_B")
+    for i in range(5):
+        agora_instance.publish("memory.updated", "Librarian", {"doc": i})
+
+    batch_a, cursor_a = agora_instance.poll("memory.updated", cursor_a, max_n=3)
+    batch_b, cursor_b = agora_instance.poll("memory.updated", cursor_b, max_n=10)
+
+    assert [e["payload"]["doc"] for e in batch_a] == [0, 1, 2]
+    assert [e["payload"]["doc"] for e in batch_b] == [0, 1, 2, 3, 4]
+    assert batch_a[0] is batch_b[0], "Fan-out should share events, not copy them."
+
+    rest_a, cursor_a = agora_instance.poll("memory.updated", cursor_a)
+    assert [e["payload"]["doc"] for e in rest_a] == [3, 4]
+    assert cursor_a == cursor_b == 5
+
+
+def test_listen_yields_published_events(agora_instance):
+    """
+    Tests that the async iterator delivers events published after it starts waiting.
+    """
+    import asyncio
+
+    async def consume():
+        received = []
+        async for event in agora_instance.listen("tool.learned", "Agent_A"):
+            received.append(event["payload"]["tool"])
+            if len(received) == 2:
+                return received
+
+    async def scenario():
+        consumer = asyncio.create_task(consume())
+        await asyncio.sleep(0)
+        agora_instance.publish("tool.learned", "Forge", {"tool": "Grep"})
+        agora_instance.publish("tool.learned", "Forge", {"tool": "Lint"})
+        return await asyncio.wait_for(consumer, timeout=1)
+
+    assert asyncio.run(scenario()) == ["Grep", "Lint"]
@@ -0,0 +1,134 @@
+import json
+
+import pytest
+
+from free_ai.action_executor import ActionExecutor
+from free_ai.agent import Director
+from free_ai.checkpoint import CheckpointError, CheckpointLog
+from free_ai.personality import PhilosophicalPersonality
+
+
+class CountingOracle:
+    """An offline Oracle that counts how often it is asked for a plan."""
+
+    def __init__(self, plan):
+        self.plan = plan
+        self.calls = 0
+
+    def generate_plan(self, goal, history, context=""):
+        self.calls += 1
+        return [dict(step) for step in self.plan]
+
+    def generate_code(self, prompt, context):
+        return ""
+
+
+class NullMemory:
+    def query(self, query_text, n_results=3):
+        return []
+
+
+def echo(text):
+    return {"status": "success", "content": text}
+
+
+def make_director(oracle, path):
+    return Director(
+        name="Agent",
+        role="Worker",
+        personality=PhilosophicalPersonality(),
+        external_tools={"Echo": echo},
+        shared_memory=NullMemory(),
+        oracle=oracle,
+        checkpoint_path=path,
+    )
+
+
+PLAN = [
+    {"action": "use_tool", "tool_name": "Echo", "arguments": {"text": str(i)}}
+    for i in range(4)
+]
+
+
+def test_restore_resumes_at_the_next_action_without_planning(tmp_path):
+    """
+    Tests that a new Director continues an interrupted goal from its checkpoint.
+    """
+    path = str(tmp_path / "agent.ckpt")
+    director = make_director(CountingOracle(PLAN), path)
+    executor = ActionExecutor(director)
+    history = [{"role": "system", "content": "The goal is: echo"}]
+    executor.step("echo", history)
+    executor.step("echo", history)
+
+    oracle = CountingOracle(PLAN)
+    resumed = make_director(oracle, path)
+    goal, restored_history = resumed.restore()
+    assert goal == "echo"
+    assert restored_history == history
+
+    executor = ActionExecutor(resumed)
+    while executor.step(goal, restored_history)["action"] != "finish":
+        pass
+    assert oracle.calls == 0
+    contents = [event["result"]["content"] for event in restored_history[1:]]
+    assert contents == ["0", "1", "2", "3"]
+
+
+def test_checkpoints_append_only_the_changes(tmp_path):
+    """
+    Tests that each step appends a small delta instead of rewriting the file.
+    """
+    path = tmp_path / "agent.ckpt"
+    director = make_director(CountingOracle(PLAN), str(path))
+    executor = ActionExecutor(director)
+    history = []
+    for _ in range(3):
+        executor.step("echo", history)
+
+    records = [json.loads(line) for line in path.read_text().splitlines()]
+    assert len(records) == 3
+    assert records[0]["v"] == 1 and len(records[0]["plan"]) == 3
+    for record in records[1:]:
+        assert "goal" not in record and "plan" not in record
+        assert record["pop"] == 1 and len(record["history"]) == 1
+
+
+def test_log_replays_requeued_steps_and_ignores_a_torn_record(tmp_path):
+    """
+    Tests plan deltas with re-queued steps and recovery from a partial write.
+    """
+    path = tmp_path / "log.ckpt"
+    log = CheckpointLog(str(path))
+    a, b, c = {"action": "a"}, {"action": "b"}, {"action": "c"}
+    log.write("goal", [a, b, c], True, [], [])
+    log.write("goal", [b, c, dict(a, retry=1)], True, [{"event": 1}], ["Skill"])
+    log.close()
+    with open(path, "a") as f:
+        f.write('{"history":[{"ev')
+
+    state = CheckpointLog(str(path)).read()
+    assert state["plan"] == [b, c, dict(a, retry=1)]
+    assert state["history"] == [{"event": 1}]
+    assert state["tools"] == ["Skill"]
+
+
+def test_unknown_checkpoint_version_is_rejected(tmp_path):
+    path = tmp_path / "old.ckpt"
+    path.write_text('{"v":0,"goal":"g","plan":[],"history":[]}\n')
+    with pytest.raises(CheckpointError):
+        CheckpointLog(str(path)).read()
+
+
+def test_finished_goals_are_not_resumed(tmp_path):
+    """
+    Tests that the checkpoint is deleted once the goal ends.
+    """
+    path = tmp_path / "agent.ckpt"
+    executor = ActionExecutor(make_director(CountingOracle(PLAN), str(path)))
+    history = []
+    while executor.step("echo", history)["action"] != "finish":
+        assert path.exists()
+
+    assert not path.exists()
+    assert make_director(CountingOracle(PLAN), str(path)).restore() is None
@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+from free_ai.embedders import (
+    HashingEmbedder,
+    SentenceTransformerEmbedder,
+    embedder_identity,
+    get_embedder,
+)
+
+
+def test_hashing_embedder_is_deterministic_and_normalized():
+    embedder = HashingEmbedder(dimensions=256)
+    first = embedder.encode("Agents share a collective memory.")
+    second = HashingEmbedder(dimensions=256).encode("Agents share a collective memory.")
+
+    assert first.shape == (256,)
+    assert np.array_equal(first, second)
+    assert np.isclose(np.linalg.norm(first), 1.0)
+    assert not embedder.encode("").any()
+
+
+def test_hashing_embedder_ranks_shared_words_higher():
+    """
+    Tests that texts sharing words (or word forms) are closer than unrelated ones.
+    """
+    embedder = HashingEmbedder()
+    query = embedder.encode("parsing configuration files")
+    related = embedder.encode("A parser for configuration file formats.")
+    unrelated = embedder.encode("The weather is sunny today.")
+
+    assert query @ related > query @ unrelated
+
+
+def test_embedders_are_selected_by_name():
+    assert isinstance(get_embedder("hashing"), HashingEmbedder)
+    assert isinstance(get_embedder(), SentenceTransformerEmbedder)
+    assert embedder_identity(get_embedder()) == "sentence-transformers:all-MiniLM-L6-v2"
+    with pytest.raises(ValueError):
+        get_embedder("word2vec")
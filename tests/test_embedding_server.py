@@ -0,0 +1,141 @@
+import socket
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from free_ai.embedders import HashingEmbedder
+from free_ai.embedding_server import (
+    EmbeddingServer,
+    EmbeddingServerError,
+    RemoteEmbedder,
+    _recv_frame,
+    _send_frame,
+    start_server_process,
+)
+from free_ai.memory import VectorMemory
+
+
+def _start(server: EmbeddingServer) -> threading.Thread:
+    thread = threading.Thread(target=server.serve, daemon=True)
+    thread.start()
+    remote = RemoteEmbedder(server.socket_path)
+    for _ in range(100):
+        try:
+            remote.identity
+            break
+        except EmbeddingServerError:
+            time.sleep(0.01)
+    remote.close()
+    return thread
+
+
+@pytest.fixture
+def server(tmp_path):
+    server = EmbeddingServer(str(tmp_path / "embed.sock"), "hashing", max_wait=0.05)
+    thread = _start(server)
+    yield server
+    server.stop()
+    thread.join(timeout=5)
+
+
+def test_remote_vectors_match_the_local_model(server):
+    remote = RemoteEmbedder(server.socket_path)
+    local = HashingEmbedder()
+
+    assert remote.identity == local.identity
+    assert np.array_equal(
+        remote.encode("a shared model"), local.encode("a shared model")
+    )
+    batch = remote.encode_batch(["one", "two"])
+    assert batch.shape == (2, local.dimensions)
+
+
+def test_concurrent_requests_are_batched(server):
+    """
+    Tests that requests arriving within the deadline share one batch.
+    """
+    remote = RemoteEmbedder(server.socket_path)
+    barrier = threading.Barrier(8)
+    results = {}
+
+    def client(i):
+        barrier.wait()
+        results[i] = remote.encode(f"text {i}")
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    local = HashingEmbedder()
+    assert all(np.array_equal(results[i], local.encode(f"text {i}")) for i in range(8))
+    stats = remote.stats()
+    assert stats["texts"] == 8
+    assert stats["batches"] < 8
+
+
+def test_a_lone_client_does_not_wait_for_the_deadline(tmp_path):
+    """
+    Tests that a batch is sent once every connected client has a request in it.
+    """
+    server = EmbeddingServer(str(tmp_path / "lone.sock"), "hashing", max_wait=10.0)
+    thread = _start(server)
+    try:
+        remote = RemoteEmbedder(server.socket_path)
+        start = time.monotonic()
+        remote.encode("no one else is coming")
+        assert time.monotonic() - start < 5.0
+        remote.close()
+    finally:
+        server.stop()
+        thread.join(timeout=5)
+
+
+def test_memory_can_use_the_server_for_an_existing_collection(server, tmp_path):
+    """
+    Tests that a collection built in-process can be served remotely.
+    """
+    path = str(tmp_path / "db")
+    VectorMemory(path=path, embedding_model="hashing").add("Vectors are shared.")
+
+    memory = VectorMemory(path=path, embedding_model=f"unix:{server.socket_path}")
+    assert memory.query("shared vectors", n_results=1) == ["Vectors are shared."]
+
+
+@pytest.mark.parametrize(
+    "header",
+    [{"op": "encode", "id": 7}, {"id": 7, "texts": "one"}, {"id": 7, "texts": [1]}],
+)
+def test_malformed_encode_requests_get_an_error_reply(server, header):
+    """
+    Tests that a bad encode request is answered with an error and the
+    connection stays usable.
+    """
+    connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    connection.settimeout(5)
+    connection.connect(server.socket_path)
+
+    _send_frame(connection, header)
+    reply, _ = _recv_frame(connection)
+    assert reply["id"] == 7
+    assert "texts" in reply["error"]
+
+    _send_frame(connection, {"op": "identity", "id": 8})
+    assert _recv_frame(connection)[0]["identity"] == server.embedder.identity
+    connection.close()
+
+
+def test_server_process_lifecycle(tmp_path):
+    socket_path = str(tmp_path / "process.sock")
+    process = start_server_process(socket_path, "hashing")
+    try:
+        assert RemoteEmbedder(socket_path).encode("hello").shape == (1024,)
+    finally:
+        process.terminate()
+        process.join(timeout=5)
+
+    with pytest.raises(EmbeddingServerError):
+        RemoteEmbedder(socket_path, timeout=1).encode("hello")
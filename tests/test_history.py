@@ -0,0 +1,74 @@
+import os
+
+from free_ai.history import HistoryEvent, HistoryStore
+
+
+def body(i, content):
+    return {
+        "role": "body",
+        "action": {"action": "use_tool", "tool_name": "Echo", "arguments": {"n": i}},
+        "result": {"status": "success", "content": content},
+    }
+
+
+def test_old_events_spill_to_disk_and_stay_readable(tmp_path):
+    """
+    Tests that the store behaves like the list it replaces beyond its capacity.
+    """
+    path = str(tmp_path / "history.jsonl")
+    history = HistoryStore(path=path, capacity=3)
+    events = [{"role": "system", "content": "The goal is: echo"}]
+    events += [body(i, str(i)) for i in range(10)]
+    for event in events:
+        history.append(event)
+
+    assert len(history._events) == 3
+    assert len(history) == 11
+    assert list(history) == events
+    assert history[0] == events[0]
+    assert history[-1] == events[-1]
+    assert history[4:6] == events[4:6]
+    assert history.last(5) == events[-5:]
+    history.close()
+    assert os.path.exists(path)
+
+
+def test_large_results_are_replaced_by_previews():
+    """
+    Tests that large payloads are kept on disk and previewed in memory.
+    """
+    history = HistoryStore(max_payload_bytes=100, preview_chars=10)
+    history.append(body(0, "x" * 1000))
+    history.append({"role": "system", "content": "note"})
+
+    preview = history.last(2)[0]["result"]
+    assert preview == {"status": "success", "content": "x" * 10, "truncated": True}
+    assert history.last_tool_result()["content"] == "x" * 1000
+    assert history[0]["result"]["content"] == "x" * 1000
+
+    path = history.path
+    history.close()
+    assert not os.path.exists(path)
+
+
+def test_appended_event_objects_are_not_changed():
+    """
+    Tests that previewing a large result does not truncate the caller's event.
+    """
+    history = HistoryStore(max_payload_bytes=100, preview_chars=10)
+    event = HistoryEvent.from_dict(body(0, "x" * 1000))
+
+    history.append(event)
+    event.result["status"] = "changed later"
+
+    assert event.result["content"] == "x" * 1000
+    assert history[0]["result"] == {"status": "success", "content": "x" * 1000}
+    history.close()
+
+
+def test_small_histories_do_not_touch_the_disk():
+    history = HistoryStore()
+    history.append(body(0, "small"))
+    assert history.last_tool_result() == {"status": "success", "content": "small"}
+    assert history.path is None
+    history.close()
@@ -0,0 +1,39 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+# Backends, plus standard-library modules that are costly at startup and
+# only needed on some paths (event loops, archives, profiling).
+HEAVY_MODULES = [
+    "chromadb",
+    "sentence_transformers",
+    "torch",
+    "openai",
+    "asyncio",
+    "sqlite3",
+    "cProfile",
+]
+
+
+@pytest.mark.parametrize(
+    "module", ["free_ai.agora", "free_ai.tools", "free_ai.agent", "free_ai.runtime"]
+)
+def test_heavy_dependencies_are_not_imported_eagerly(module):
+    """
+    Tests that importing the package does not load the memory or LLM backends.
+    """
+    code = (
+        f"import sys, json, {module}; "
+        f"print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+        env=dict(os.environ, PYTHONPATH=os.pathsep.join(p for p in sys.path if p)),
+    ).stdout
+    assert json.loads(output) == []
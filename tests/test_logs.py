@@ -0,0 +1,92 @@
+import io
+import json
+import logging
+
+import pytest
+
+from free_ai import logs
+
+
+@pytest.fixture
+def root_logger():
+    root = logging.getLogger()
+    handlers, level = list(root.handlers), root.level
+    yield root
+    logs.shutdown()
+    for handler in handlers:
+        root.addHandler(handler)
+    root.setLevel(level)
+
+
+def test_records_are_written_as_json_lines_by_the_listener(root_logger):
+    stream = io.StringIO()
+    logs.configure(stream=stream, json_lines=True)
+    logger = logging.getLogger("free_ai.test")
+
+    logs.log_event(logger, logging.INFO, "Stored %s.", "a note", doc_id="42")
+    logs.shutdown()
+
+    (line,) = stream.getvalue().splitlines()
+    entry = json.loads(line)
+    assert entry["msg"] == "Stored a note."
+    assert entry["logger"] == "free_ai.test"
+    assert entry["level"] == "INFO"
+    assert entry["doc_id"] == "42"
+
+
+def test_disabled_events_do_not_format_their_arguments(root_logger):
+    """
+    Tests that arguments are only formatted when a record is written.
+    """
+
+    class Expensive:
+        formatted = 0
+
+        def __str__(self):
+            Expensive.formatted += 1
+            return "expensive"
+
+    stream = io.StringIO()
+    logs.configure(level=logging.WARNING, stream=stream)
+    logger = logging.getLogger("free_ai.test")
+
+    logs.log_event(logger, logging.INFO, "Value %s", Expensive(), size=3)
+    logs.log_event(logger, logging.WARNING, "Value %s", Expensive(), size=3)
+    logs.shutdown()
+
+    assert Expensive.formatted == 1
+    assert stream.getvalue().rstrip().endswith("Value expensive size=3")
+
+
+def test_sampling_and_rate_limits_spare_warnings():
+    record_filter = logs.SamplingFilter(
+        sample_rates={"free_ai.memory": 0.0}, rate_limits={"free_ai.agora": 5}
+    )
+
+    def passes(name, level=logging.INFO):
+        record = logging.LogRecord(name, level, __file__, 1, "event", None, None)
+        return record_filter.filter(record)
+
+    assert not passes("free_ai.memory")
+    assert passes("free_ai.memory", logging.WARNING)
+    assert passes("free_ai.oracle")
+    kept = sum(passes("free_ai.agora") for _ in range(100))
+    assert 5 <= kept <= 6
+    assert record_filter.dropped["free_ai.agora"] == 100 - kept
+
+
+def test_unknown_log_levels_from_the_environment_are_rejected(root_logger, monkeypatch):
+    """
+    Tests that FREE_AI_LOG_LEVEL accepts names and numbers and names a bad value.
+    """
+    monkeypatch.setenv("FREE_AI_LOG_LEVEL", "debug")
+    logs.configure_from_env()
+    assert root_logger.level == logging.DEBUG
+    monkeypatch.setenv("FREE_AI_LOG_LEVEL", "25")
+    logs.configure_from_env()
+    assert root_logger.level == 25
+
+    for bad in ("verbose", "BASIC_FORMAT"):
+        monkeypatch.setenv("FREE_AI_LOG_LEVEL", bad)
+        with pytest.raises(ValueError, match=bad):
+            logs.configure_from_env()
@@ -1,7 +1,10 @@
 import os
+import numpy as np
 import pytest
 import shutil
+import time
 
+from free_ai.embedders import EmbedderMismatchError
 from free_ai.memory import VectorMemory
 
 # Define a temporary path for the test database that persists across fixtures
@@ -79,3 +82,184 @@ def test_query_empty_memory(tmp_path):
     results = memory.query(query)
 
     assert results == [], "Querying an empty memory should return an empty list."
+
+
+class CountingEmbedder:
+    """A deterministic stand-in for the sentence-transformer model."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def encode(self, text):
+        self.calls += 1
+        return np.array([len(text), text.count(" "), 1.0], dtype=np.float32)
+
+
+def test_injected_embedding_model_is_used(tmp_path):
+    """
+    Tests that a provided embedding model replaces the default one.
+    """
+    embedder = CountingEmbedder()
+    memory = VectorMemory(path=str(tmp_path / "db"), embedding_model=embedder)
+    memory.add("A short note.", metadata={"source": "test"})
+
+    assert memory.query("A short note.", n_results=1) == ["A short note."]
+    assert embedder.calls == 2
+
+
+def test_hashing_embedder_needs_no_model(tmp_path):
+    """
+    Tests that a memory can be backed by the built-in hashing embedder.
+    """
+    memory = VectorMemory(path=str(tmp_path / "db"), embedding_model="hashing")
+    memory.add("The Liskov Substitution Principle is the L in SOLID.")
+    memory.add("Docker images are built from a Dockerfile.")
+
+    results = memory.query("What does SOLID's Liskov principle say?", n_results=1)
+    assert results == ["The Liskov Substitution Principle is the L in SOLID."]
+    assert memory.collection.metadata["embedder"] == "hashing-v1:1024:char"
+
+
+def test_collection_rejects_a_different_embedder(tmp_path):
+    """
+    Tests that vectors from different embedders cannot be mixed.
+    """
+    path = str(tmp_path / "db")
+    VectorMemory(path=path, embedding_model="hashing").add("A fact.")
+
+    with pytest.raises(EmbedderMismatchError):
+        VectorMemory(path=path, embedding_model=CountingEmbedder())
+    assert VectorMemory(path=path, embedding_model="hashing").query("fact") == [
+        "A fact."
+    ]
+
+
+def test_namespaces_are_separate_shards_merged_by_distance(tmp_path):
+    """
+    Tests that namespaces are isolated and fan-out queries merge their results.
+    """
+    memory = VectorMemory(path=str(tmp_path / "db"), embedding_model="hashing")
+    memory.add("Shared note about deployment pipelines.")
+    memory.add("Researcher note about deployment pipelines.", namespace="Researcher")
+    memory.add("Researcher note about gardening.", namespace="Researcher")
+    memory.add("Programmer note about deployment pipelines.", namespace="Programmer")
+
+    assert memory.query("deployment pipelines", n_results=5) == [
+        "Shared note about deployment pipelines."
+    ]
+    results = memory.query(
+        "Researcher deployment pipelines",
+        n_results=2,
+        namespaces=[None, "Researcher", "Programmer"],
+    )
+    assert results[0] == "Researcher note about deployment pipelines."
+    assert "Researcher note about gardening." not in results
+    assert memory.namespaces() == [None, "Programmer", "Researcher"]
+    memory.close()
+
+
+def test_cold_shards_are_unloaded(tmp_path):
+    """
+    Tests that only the most recently used shards stay loaded.
+    """
+    memory = VectorMemory(
+        path=str(tmp_path / "db"), embedding_model="hashing", max_loaded_shards=2
+    )
+    for namespace in ("a1", "b2", "c3"):
+        memory.add(f"fact in {namespace}", namespace=namespace)
+
+    assert memory.loaded_namespaces() == [None, "c3"]
+    assert memory.query("fact", namespaces=["a1"]) == ["fact in a1"]
+    memory.unload("a1")
+    assert memory.loaded_namespaces() == [None]
+
+
+def test_queries_filter_by_source_time_and_tag(tmp_path):
+    """
+    Tests that the metadata index selects the documents that are ranked.
+    """
+    memory = VectorMemory(path=str(tmp_path / "db"), embedding_model="hashing")
+    memory.add("Release notes for version one.", {"source": "Docs", "timestamp": 100})
+    memory.add("Release notes for version two.", {"source": "Docs", "timestamp": 200})
+    memory.add("Release checklist.", {"source": "Ops"}, tags=["release", "todo"])
+
+    assert memory.query("release notes", n_results=5, source="Ops") == [
+        "Release checklist."
+    ]
+    assert memory.query("release notes", n_results=5, source="Docs", since=150) == [
+        "Release notes for version two."
+    ]
+    assert memory.query("release", n_results=5, until=100) == [
+        "Release notes for version one."
+    ]
+    assert memory.query("release", n_results=5, tags=["todo"]) == ["Release checklist."]
+    assert memory.query("release", tags=["missing"]) == []
+    stored = memory.collection.get(where={"source": "Ops"})["metadatas"][0]
+    assert isinstance(stored["timestamp"], float)
+
+
+def test_recency_weighting_prefers_newer_documents(tmp_path):
+    memory = VectorMemory(path=str(tmp_path / "db"), embedding_model="hashing")
+    now = time.time()
+    memory.add("The build server runs on port 8080.", {"timestamp": now - 86400})
+    memory.add("The build server now runs on port 9090.", {"timestamp": now})
+
+    query = "The build server runs on port 8080."
+    assert memory.query(query, n_results=1) == ["The build server runs on port 8080."]
+    assert memory.query(query, n_results=1, recency_half_life=3600) == [
+        "The build server now runs on port 9090."
+    ]
+
+
+def test_selective_filters_find_matches_far_from_the_query(tmp_path):
+    """
+    Tests that a match outside the nearest documents is still found.
+    """
+    memory = VectorMemory(path=str(tmp_path / "db"), embedding_model="hashing")
+    for i in range(150):
+        memory.add(f"Deployment log entry {i}.", {"source": "bulk"})
+    memory.add("Unrelated gardening advice.", {"source": "rare"})
+
+    assert memory.query("deployment log", n_results=2, source="rare") == [
+        "Unrelated gardening advice."
+    ]
+    assert len(memory.query("deployment log", n_results=2, source="bulk")) == 2
+    assert memory.query(
+        "deployment log", where={"$or": [{"source": "rare"}, {"source": "none"}]}
+    ) == ["Unrelated gardening advice."]
+
+
+def test_metadata_index_picks_up_documents_added_elsewhere(tmp_path):
+    """
+    Tests that the index is rebuilt when documents were added by someone else.
+    """
+    memory = VectorMemory(path=str(tmp_path / "db"), embedding_model="hashing")
+    memory.add("Indexed note.", {"source": "notes", "timestamp": 10})
+    assert memory.query("note", source="notes") == ["Indexed note."]
+
+    embedding = memory.embedding_model.encode("Outside note.").tolist()
+    memory.collection.add(
+        ids=["outside"],
+        documents=["Outside note."],
+        embeddings=[embedding],
+        metadatas=[{"source": "notes", "timestamp": 20.0}],
+    )
+    assert sorted(memory.query("note", source="notes", since=0)) == [
+        "Indexed note.",
+        "Outside note.",
+    ]
+    assert memory.query("note", since=15, until=25) == ["Outside note."]
+
+
+def test_querying_unknown_namespaces_creates_nothing(tmp_path):
+    """
+    Tests that reads neither create shards nor hide invalid namespace names.
+    """
+    memory = VectorMemory(path=str(tmp_path / "db"), embedding_model="hashing")
+    memory.add("A shared fact.")
+
+    assert memory.query("fact", namespaces=["Nobody"]) == []
+    assert memory.query("fact", namespaces=[None, "Nobody"]) == ["A shared fact."]
+    assert memory.namespaces() == [None]
+    with pytest.raises(ValueError):
+        memory.query("fact", namespaces=["../escape"])
@@ -0,0 +1,65 @@
+import pytest
+
+from free_ai.models import Action, Message, ModelError, dumps, loads, parse_plan
+
+
+def test_parse_plan_validates_every_step_and_reports_its_index():
+    tools = {"FileSystemTool": object()}
+    plan = parse_plan(
+        '{"plan": [{"action": "use_tool", "tool_name": "FileSystemTool",'
+        ' "arguments": {"operation": "list"}}, {"action": "final_answer"}]}',
+        tools,
+    )
+
+    assert [type(step) for step in plan] == [Action, Action]
+    assert plan[0].tool_name == "FileSystemTool"
+    assert plan[1]["action"] == "final_answer"
+
+    with pytest.raises(ModelError) as error:
+        parse_plan(
+            [{"action": "final_answer"}, {"action": "use_tool", "tool_name": "Nope"}],
+            tools,
+        )
+    assert error.value.index == 1
+    assert "Nope" in str(error.value)
+
+    with pytest.raises(ModelError) as error:
+        parse_plan([{"action": "dance"}])
+    assert error.value.index == 0
+
+
+def test_models_behave_like_the_dicts_they_replace():
+    step = Action("use_tool", "FileSystemTool", {"operation": "read"})
+
+    assert step == {
+        "action": "use_tool",
+        "tool_name": "FileSystemTool",
+        "arguments": {"operation": "read"},
+    }
+    assert step.get("message") is None
+    assert "tool_name" in step and "message" not in step
+
+    error_step = Action.from_dict({"action": "error", "message": "no plan"})
+    assert error_step["message"] == "no plan"
+    assert dict(error_step, message="replaced") == {
+        "action": "error",
+        "message": "replaced",
+    }
+
+    message = Message("id-1", "Boss", "Worker", {"task": 1}, 1.0)
+    assert message["claimed_by"] is None
+    message["claimed_by"] = "Worker-1"
+    assert message.claimed_by == "Worker-1"
+    assert len(message) == 7
+
+
+def test_dumps_writes_minified_json_that_round_trips():
+    message = Message("id-1", "Boss", "Worker", {"task": [1, 2]}, 1.5)
+    message.reply = {"from_agent": "Worker-1", "result": Action("final_answer")}
+
+    encoded = dumps(message)
+
+    assert " " not in encoded
+    decoded = Message.from_dict(loads(encoded))
+    assert decoded == message
+    assert decoded.reply["result"] == {"action": "final_answer"}
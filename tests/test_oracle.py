@@ -0,0 +1,35 @@
+import pytest
+
+from free_ai.oracle import summarize_step
+
+
+@pytest.mark.parametrize(
+    "event, expected",
+    [
+        (
+            {
+                "action": {
+                    "action": "use_tool",
+                    "tool_name": "FileSystemTool",
+                    "arguments": {"operation": "read_file"},
+                },
+                "result": {"status": "success"},
+            },
+            "- use_tool FileSystemTool.read_file: success",
+        ),
+        (
+            {"action": {"action": "use_tool", "tool_name": "Echo", "arguments": "hi"}},
+            "- use_tool Echo: done",
+        ),
+        (
+            {"action": {"action": "use_tool", "arguments": ["read_file"]}},
+            "- use_tool: done",
+        ),
+        ({"action": {"action": None}, "result": "ok"}, "- None: done"),
+    ],
+)
+def test_summarize_step_tolerates_malformed_actions(event, expected):
+    """
+    Tests that history steps with non-mapping arguments are still summarized.
+    """
+    assert summarize_step(event) == expected
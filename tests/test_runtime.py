@@ -0,0 +1,331 @@
+import asyncio
+import threading
+import time
+
+from free_ai import runtime as runtime_module
+from free_ai.action_executor import ActionExecutor
+from free_ai.agora import Agora
+from free_ai.personality import PhilosophicalPersonality
+from free_ai.runtime import AgentRuntime, FairSemaphore
+
+
+class ScriptedOracle:
+    """An offline Oracle that plans `steps` calls of the Echo tool."""
+
+    def __init__(self, steps=2, latency=0.0):
+        self.steps = steps
+        self.latency = latency
+        self.active = 0
+        self.peak = 0
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def generate_plan(self, goal, history, context=""):
+        with self._lock:
+            self.calls += 1
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(self.latency)
+        with self._lock:
+            self.active -= 1
+        return [
+            {"action": "use_tool", "tool_name": "Echo", "arguments": {"text": goal}}
+        ] * self.steps
+
+    def generate_code(self, prompt, context):
+        return ""
+
+
+class NullMemory:
+    def query(self, query_text, n_results=3):
+        return []
+
+
+def make_runtime(oracle, **kwargs):
+    return AgentRuntime(memory=NullMemory(), oracle=oracle, **kwargs)
+
+
+def echo(text):
+    return {"status": "success", "content": str(text)}
+
+
+def slow_echo(text):
+    time.sleep(0.01)
+    return echo(text)
+
+
+def test_agents_complete_goals_within_oracle_limit():
+    """
+    Tests that many agents finish their goals while Oracle calls stay capped.
+    """
+    oracle = ScriptedOracle(latency=0.02)
+    runtime = make_runtime(oracle, max_workers=8, max_oracle_calls=2)
+    for i in range(6):
+        runtime.create_agent(
+            f"Agent-{i}",
+            "Worker",
+            PhilosophicalPersonality(),
+            goals=[f"goal {i}.{n}" for n in range(2)],
+            external_tools={"Echo": echo},
+        )
+
+    results = runtime.run_sync()
+
+    assert len(results) == 12
+    assert all(r["status"] == "finished" for r in results)
+    # Two tool steps plus the closing "finish" per goal.
+    assert all(r["steps"] == 3 for r in results)
+    assert oracle.peak <= 2
+
+
+def test_agents_run_without_a_memory():
+    """
+    Tests that the runtime's default of no memory plans without context.
+    """
+    runtime = AgentRuntime(oracle=ScriptedOracle())
+    runtime.create_agent(
+        "Agent",
+        "Worker",
+        PhilosophicalPersonality(),
+        goals=["goal"],
+        external_tools={"Echo": echo},
+    )
+
+    (result,) = runtime.run_sync()
+
+    assert result["status"] == "finished"
+
+
+def test_step_budget_abandons_long_goals():
+    """
+    Tests that a goal whose plan exceeds the step budget is cut off.
+    """
+    runtime = make_runtime(ScriptedOracle(steps=10), step_budget=4)
+    runtime.create_agent(
+        "Agent",
+        "Worker",
+        PhilosophicalPersonality(),
+        goals=["long"],
+        external_tools={"Echo": echo},
+    )
+
+    (record,) = runtime.run_sync()
+    assert record["status"] == "budget_exhausted"
+    assert record["steps"] == 4
+
+
+def test_interrupted_tasks_resume_from_their_checkpoint(tmp_path):
+    """
+    Tests that a task left by a crashed run is finished and answered without replanning.
+    """
+    agora = Agora()
+    message_id = agora.post_message("Boss", "Worker", "resume")
+    agora.claim_message(message_id, "Agent")
+    # A first run works on the task and dies after two steps.
+    crashed = make_runtime(
+        ScriptedOracle(steps=5), agora=agora, checkpoint_dir=str(tmp_path)
+    )
+    director = crashed.create_agent(
+        "Agent", "Worker", PhilosophicalPersonality(), external_tools={"Echo": echo}
+    )
+    director.start_goal(message_id=message_id)
+    history = [{"role": "system", "content": "The goal is: resume"}]
+    executor = ActionExecutor(director)
+    executor.step("resume", history)
+    executor.step("resume", history)
+
+    oracle = ScriptedOracle()
+    runtime = make_runtime(oracle, agora=agora, checkpoint_dir=str(tmp_path))
+    runtime.create_agent(
+        "Agent", "Worker", PhilosophicalPersonality(), external_tools={"Echo": echo}
+    )
+    (record,) = runtime.run_sync()
+
+    assert oracle.calls == 0
+    assert record["goal"] == "resume"
+    assert record["status"] == "finished"
+    assert record["steps"] == 4
+    assert record["message_id"] == message_id
+    assert agora.get_reply_for_message(message_id)["result"]["status"] == "finished"
+    assert not (tmp_path / "Agent.ckpt").exists()
+
+
+def test_abandoned_goals_are_not_resumed(tmp_path):
+    """
+    Tests that goals cut off by the step budget or by stop() leave no checkpoint.
+    """
+    runtime = make_runtime(
+        ScriptedOracle(steps=5), step_budget=2, checkpoint_dir=str(tmp_path)
+    )
+    runtime.create_agent(
+        "Agent",
+        "Worker",
+        PhilosophicalPersonality(),
+        goals=["abandoned"],
+        external_tools={"Echo": echo},
+    )
+
+    (record,) = runtime.run_sync()
+
+    assert record["status"] == "budget_exhausted"
+    assert not (tmp_path / "Agent.ckpt").exists()
+
+
+def test_agora_tasks_are_claimed_exactly_once():
+    """
+    Tests that agents serving the Agora split its tasks without duplicates.
+    """
+    agora = Agora()
+    ids = [agora.post_message("Boss", "Worker", f"task {i}") for i in range(10)]
+    runtime = make_runtime(ScriptedOracle(steps=1), agora=agora, max_workers=4)
+    for i in range(4):
+        runtime.create_agent(
+            f"Agent-{i}",
+            "Worker",
+            PhilosophicalPersonality(),
+            serve_agora=True,
+            external_tools={"Echo": echo},
+        )
+
+    results = runtime.run_sync()
+
+    assert sorted(r["message_id"] for r in results) == sorted(ids)
+    for message_id in ids:
+        assert agora.get_reply_for_message(message_id)["result"]["status"] == "finished"
+
+
+def test_prefetched_plans_are_used_when_tasks_are_claimed():
+    """
+    Tests that an agent prepares its next Agora task while working on one.
+    """
+    agora = Agora()
+    for i in range(5):
+        agora.post_message("Boss", "Worker", f"task {i}")
+    oracle = ScriptedOracle(steps=3)
+    runtime = make_runtime(oracle, agora=agora, prefetch_depth=1, prefetch_plans=True)
+    runtime.create_agent(
+        "Agent",
+        "Worker",
+        PhilosophicalPersonality(),
+        serve_agora=True,
+        external_tools={"Echo": slow_echo},
+    )
+
+    results = runtime.run_sync()
+
+    assert [r["status"] for r in results] == ["finished"] * 5
+    # Only the first task is planned at claim time; the rest were prefetched.
+    assert runtime.stats["prefetch"] == {
+        "started": 4,
+        "used": 4,
+        "wasted": 0,
+        "failed": 0,
+    }
+    assert oracle.calls == 5
+
+
+def test_prefetches_of_tasks_claimed_by_others_are_wasted():
+    agora = Agora()
+    for i in range(8):
+        agora.post_message("Boss", "Worker", f"task {i}")
+    runtime = make_runtime(ScriptedOracle(steps=2), agora=agora, prefetch_depth=3)
+    for i in range(2):
+        runtime.create_agent(
+            f"Agent-{i}",
+            "Worker",
+            PhilosophicalPersonality(),
+            serve_agora=True,
+            external_tools={"Echo": slow_echo},
+        )
+
+    results = runtime.run_sync()
+
+    assert len(results) == 8
+    counts = runtime.stats["prefetch"]
+    assert counts["started"] == counts["used"] + counts["wasted"] + counts["failed"]
+    assert counts["wasted"] > 0
+
+
+def test_stop_lets_agents_finish_their_current_step():
+    """
+    Tests that stop() ends the run gracefully with goals marked as stopped.
+    """
+    runtime = make_runtime(ScriptedOracle(steps=1000), step_budget=1000)
+    runtime.create_agent(
+        "Agent",
+        "Worker",
+        PhilosophicalPersonality(),
+        goals=["forever"],
+        external_tools={"Echo": slow_echo},
+    )
+    threading.Timer(0.2, runtime.stop).start()
+
+    (record,) = runtime.run_sync()
+    assert record["status"] == "stopped"
+    assert 0 < record["steps"] < 1000
+
+
+def test_cancelled_runs_close_their_histories(monkeypatch):
+    """
+    Tests that a goal's history is closed when the run is cancelled mid-step.
+    """
+    histories = []
+
+    class TrackedHistory(runtime_module.HistoryStore):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.closed = False
+            histories.append(self)
+
+        def close(self):
+            self.closed = True
+            super().close()
+
+    monkeypatch.setattr(runtime_module, "HistoryStore", TrackedHistory)
+    runtime = make_runtime(ScriptedOracle(steps=1000), step_budget=1000)
+    runtime.create_agent(
+        "Agent",
+        "Worker",
+        PhilosophicalPersonality(),
+        goals=["forever"],
+        external_tools={"Echo": slow_echo},
+    )
+
+    async def cancel_soon():
+        task = asyncio.ensure_future(runtime.run())
+        await asyncio.sleep(0.1)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    asyncio.run(cancel_soon())
+
+    assert len(histories) == 1
+    assert histories[0].closed
+
+
+def test_fair_semaphore_admits_waiters_in_order():
+    """
+    Tests that released permits go to the longest-waiting thread.
+    """
+    semaphore = FairSemaphore(1)
+    semaphore.acquire()
+    order = []
+
+    def waiter(i):
+        with semaphore:
+            order.append(i)
+
+    threads = []
+    for i in range(5):
+        thread = threading.Thread(target=waiter, args=(i,))
+        thread.start()
+        threads.append(thread)
+        while len(semaphore._waiters) <= i:
+            time.sleep(0.001)
+    semaphore.release()
+    for thread in threads:
+        thread.join()
+    assert order == [0, 1, 2, 3, 4]
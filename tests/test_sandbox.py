@@ -0,0 +1,157 @@
+import threading
+import time
+
+import pytest
+
+from free_ai.learning_annex import LearningAnnex
+from free_ai.sandbox import SandboxError, SkillSandbox
+from free_ai.skill_registry import SkillRegistry
+from free_ai.tools import FileSystemTool
+
+GREETER_CODE = """
+import json
+
+class Greeter(Tool):
+    def use(self, who):
+        return {"status": "success", "greeting": f"Hello, {who}!"}
+
+new_tool = Greeter("Greeter", "Greets people.")
+"""
+
+SPINNER_CODE = """
+class Spinner(Tool):
+    def use(self, forever=False):
+        while forever:
+            pass
+        return {"status": "success"}
+
+new_tool = Spinner("Spinner", "Spins.")
+"""
+
+READER_CODE = """
+class Reader(Tool):
+    def use(self, filepath):
+        return tools.call("FileSystemTool", operation="read_file", filepath=filepath)
+
+new_tool = Reader("Reader", "Reads a file through the agent.")
+"""
+
+
+@pytest.fixture
+def sandbox():
+    with SkillSandbox(pool_size=1, timeout=5.0) as sandbox:
+        yield sandbox
+
+
+def test_learned_skill_runs_in_the_sandbox(sandbox):
+    """
+    Tests that a skill learned through the sandbox runs there and keeps its metadata.
+    """
+    learned = LearningAnnex(sandbox=sandbox).learn_new_skill(GREETER_CODE)
+    assert learned["status"] == "success"
+    tool = learned["new_tool"]
+    assert (tool.name, tool.description) == ("Greeter", "Greets people.")
+    assert tool.use(who="Ada") == {"status": "success", "greeting": "Hello, Ada!"}
+
+
+def test_runaway_skill_times_out_and_pool_recovers(sandbox):
+    """
+    Tests that a looping skill is killed and that the sandbox keeps working.
+    """
+    spinner = sandbox.load(SPINNER_CODE)
+    result = sandbox.call(
+        spinner.skill_code, spinner.skill_hash, {"forever": True}, 0.5
+    )
+    assert result["status"] == "error"
+    assert "Timed out" in result["message"]
+    # The replacement worker loads the skill again transparently.
+    assert spinner.use() == {"status": "success"}
+
+
+def test_disallowed_imports_and_builtins_are_blocked(sandbox):
+    """
+    Tests that skills cannot import arbitrary modules or open files directly.
+    """
+    with pytest.raises(SandboxError, match="not allowed"):
+        sandbox.load("import os\nnew_tool = None\n")
+    with pytest.raises(SandboxError, match="NameError"):
+        sandbox.load("open('/etc/passwd')\n")
+
+    learned = LearningAnnex(sandbox=sandbox).learn_new_skill("import subprocess\n")
+    assert learned["status"] == "error"
+
+
+@pytest.mark.parametrize(
+    "code",
+    [
+        "Tool.__init__.__globals__['os']",
+        "getattr(Tool.__init__, '__glob' + 'als__')",
+        "tools.call.__globals__",
+        "import typing\ntyping.sys.modules['os']",
+        "from dataclasses import sys",
+        "'{0.__init__.__globals__}'.format(Tool)",
+        "def gen():\n    yield\ngen().gi_frame.f_back",
+    ],
+)
+def test_skills_cannot_reach_modules_outside_the_allowlist(sandbox, code):
+    """
+    Tests that skills cannot follow object references to `os` or `sys`.
+    """
+    with pytest.raises(SandboxError, match="not allowed|ImportError|AttributeError"):
+        sandbox.load(code + "\nnew_tool = None\n")
+
+
+def test_skill_calls_agent_tools_through_the_proxy(sandbox, tmp_path):
+    """
+    Tests that a sandboxed skill can use the parent's tools over IPC.
+    """
+    path = tmp_path / "note.txt"
+    path.write_text("sandboxed")
+    sandbox.tools = {"FileSystemTool": FileSystemTool()}
+
+    reader = sandbox.load(READER_CODE)
+    result = reader.use(filepath=str(path))
+    assert result["status"] == "success"
+    assert "sandboxed" in result["content"]
+
+
+def test_skills_cannot_call_lazily_loaded_sandboxed_skills(sandbox, tmp_path):
+    """
+    Tests that a nested call to a registry skill backed by the sandbox is
+    refused instead of waiting forever for the only worker.
+    """
+    registry = SkillRegistry(str(tmp_path / "skills"))
+    registry.register("Greeter", GREETER_CODE, "Greets people.")
+    sandbox.tools = registry.lazy_tools(sandbox=sandbox)
+    caller = sandbox.load(
+        "class Caller(Tool):\n"
+        "    def use(self):\n"
+        "        return tools.call('Greeter', who='Ada')\n"
+        "new_tool = Caller('Caller', 'Calls another skill.')\n"
+    )
+
+    result = caller.use()
+
+    assert result["status"] == "error"
+    assert "cannot call other sandboxed skills" in result["message"]
+
+
+def test_waiting_for_a_busy_pool_counts_against_the_timeout(sandbox):
+    """
+    Tests that a call gives up when no worker becomes free within its timeout.
+    """
+    spinner = sandbox.load(SPINNER_CODE)
+    busy = threading.Thread(
+        target=sandbox.call,
+        args=(spinner.skill_code, spinner.skill_hash, {"forever": True}, 2.0),
+    )
+    busy.start()
+    while not sandbox._idle.empty():
+        time.sleep(0.01)
+    try:
+        result = sandbox.call(spinner.skill_code, spinner.skill_hash, {}, 0.3)
+    finally:
+        busy.join()
+
+    assert result["status"] == "error"
+    assert "No sandbox worker became free" in result["message"]
@@ -0,0 +1,50 @@
+from free_ai.learning_annex import LearningAnnex
+from free_ai.skill_registry import SkillRegistry
+
+SKILL_CODE = """
+class Greeter:
+    name = "Greeter"
+    description = "Greets people."
+
+    def use(self, who):
+        return {"status": "success", "greeting": f"Hello, {who}!"}
+
+new_tool = Greeter()
+"""
+
+
+def test_learned_skill_survives_restart_and_loads_lazily(tmp_path):
+    """
+    Tests that a learned skill is persisted and re-exposed without being executed up front.
+    """
+    registry_path = str(tmp_path / "skills")
+    annex = LearningAnnex(registry=SkillRegistry(registry_path))
+
+    learned = annex.learn_new_skill(SKILL_CODE)
+    assert learned["status"] == "success"
+    assert learned["skill_hash"]
+
+    # A fresh process only reads the index.
+    tools = SkillRegistry(registry_path).lazy_tools()
+    greeter = tools["Greeter"]
+    assert greeter.description == "Greets people."
+    assert not greeter.loaded
+
+    assert greeter.use(who="Ada")["greeting"] == "Hello, Ada!"
+    assert greeter.loaded
+
+
+def test_compiled_code_is_cached_on_disk(tmp_path):
+    """
+    Tests that compilation is skipped for a skill whose marshalled code is cached.
+    """
+    registry_path = str(tmp_path / "skills")
+    SkillRegistry(registry_path).register("Greeter", SKILL_CODE, "Greets people.")
+
+    marshalled = list((tmp_path / "skills" / "skills").glob("*.marshal"))
+    assert len(marshalled) == 1
+
+    reopened = SkillRegistry(registry_path)
+    code = reopened.compile(SKILL_CODE)
+    assert code.co_filename.startswith("<skill ")
+    assert reopened.instantiate("Greeter").use(who="Bob")["status"] == "success"
@@ -0,0 +1,135 @@
+import threading
+import time
+
+import pytest
+from free_ai.tool_executor import ToolExecutor
+from free_ai.tools import FileSystemTool, Tool
+
+
+class SleepyTool(Tool):
+    """A tool that sleeps for a requested number of seconds."""
+
+    def __init__(self):
+        super().__init__("SleepyTool", "Sleeps.")
+
+    def use(self, seconds: float) -> dict:
+        time.sleep(seconds)
+        return {"status": "success", "slept": seconds}
+
+
+class EchoTool(Tool):
+    """A tool that returns its arguments."""
+
+    def __init__(self):
+        super().__init__("EchoTool", "Echoes its arguments.")
+
+    def use(self, **kwargs) -> dict:
+        return {"status": "success", "arguments": kwargs}
+
+
+class BigResultTool(Tool):
+    """A tool that returns a payload of a requested size."""
+
+    def __init__(self):
+        super().__init__("BigResultTool", "Returns large payloads.")
+
+    def use(self, size: int) -> dict:
+        return {"status": "success", "content": "x" * size}
+
+
+@pytest.fixture
+def executor():
+    """A pytest fixture providing a small executor that is shut down afterwards."""
+    tools = {
+        "FileSystemTool": FileSystemTool(),
+        "SleepyTool": SleepyTool(),
+        "BigResultTool": BigResultTool(),
+        "EchoTool": EchoTool(),
+    }
+    with ToolExecutor(tools, max_workers=2, timeout=5, max_result_bytes=10_000) as ex:
+        yield ex
+
+
+def test_executor_runs_tool_in_worker(executor, tmp_path):
+    """
+    Tests that a tool call in a worker returns the tool's usual result dictionary.
+    """
+    file_path = tmp_path / "hello.txt"
+    file_path.write_text("Hello from a worker")
+
+    result = executor.execute(
+        "FileSystemTool", {"operation": "read_file", "filepath": str(file_path)}
+    )
+
+    assert result["status"] == "success"
+    assert "Hello from a worker" in result["content"]
+
+
+def test_executor_timeout_recycles_worker(executor):
+    """
+    Tests that a timed-out call is reported and the pool keeps serving calls.
+    """
+    result = executor.execute("SleepyTool", {"seconds": 10}, timeout=0.2)
+    assert result["status"] == "error"
+    assert "timed out" in result["message"]
+
+    assert executor.execute("SleepyTool", {"seconds": 0})["status"] == "success"
+
+
+def test_executor_caps_result_size_and_rejects_unknown_tools(executor):
+    """
+    Tests that oversized results and unknown tools produce error dictionaries.
+    """
+    result = executor.execute("BigResultTool", {"size": 50_000})
+    assert result["status"] == "error"
+    assert "exceeding" in result["message"]
+
+    assert executor.execute("NoSuchTool")["status"] == "error"
+
+
+def test_executor_passes_any_argument_names_and_checks_them_first(executor):
+    """
+    Tests that a tool argument named timeout reaches the tool, and that
+    unpicklable arguments are rejected without recycling a worker.
+    """
+    result = executor.execute("EchoTool", {"timeout": 3, "tool_name": "x"})
+    assert result["arguments"] == {"timeout": 3, "tool_name": "x"}
+
+    pids = sorted(worker.process.pid for worker in executor._workers)
+    result = executor.execute("EchoTool", {"callback": lambda: None})
+    assert result["status"] == "error"
+    assert "cannot be sent" in result["message"]
+    assert sorted(worker.process.pid for worker in executor._workers) == pids
+
+
+def test_executor_shutdown_releases_waiting_calls():
+    """
+    Tests that calls waiting for a worker return an error once the executor
+    is shut down, instead of blocking forever.
+    """
+    executor = ToolExecutor(
+        {"SleepyTool": SleepyTool(), "EchoTool": EchoTool()}, max_workers=1
+    )
+    results = {}
+    busy = threading.Thread(
+        target=lambda: results.update(
+            busy=executor.execute("SleepyTool", {"seconds": 2})
+        )
+    )
+    busy.start()
+    time.sleep(0.5)
+    waiting = threading.Thread(
+        target=lambda: results.update(waiting=executor.execute("EchoTool"))
+    )
+    waiting.start()
+    time.sleep(0.2)
+
+    executor.shutdown()
+    waiting.join(timeout=5)
+    busy.join(timeout=5)
+
+    assert not waiting.is_alive()
+    assert results["waiting"] == {
+        "status": "error",
+        "message": "ToolExecutor has been shut down.",
+    }
@@ -1,5 +1,13 @@
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
 import pytest
-from free_ai.tools import FileSystemTool
+from free_ai.file_io import AppendBuffer
+from free_ai.tools import FileSystemTool, SearchTool
 
 
 @pytest.fixture
@@ -34,3 +42,383 @@ def test_filesystemtool_read_file_not_found():
 
     assert result["status"] == "error"
     assert "File not found" in result["message"]
+
+
+@pytest.fixture
+def numbered_file(tmp_path):
+    """A pytest fixture to create a file of numbered lines."""
+    file_path = tmp_path / "numbered.log"
+    file_path.write_text("".join(f"line {i}\n" for i in range(1, 2001)))
+    return file_path
+
+
+@pytest.mark.parametrize("mmap_threshold", [0, 1 << 30])
+def test_filesystemtool_read_range_by_lines(numbered_file, mmap_threshold):
+    """
+    Tests that a line range is returned, via both the memory-mapped and buffered paths.
+    """
+    tool = FileSystemTool(mmap_threshold=mmap_threshold)
+
+    result = tool.use(
+        operation="read_range",
+        filepath=str(numbered_file),
+        start_line=1000,
+        end_line=1002,
+    )
+
+    assert result["status"] == "success"
+    assert result["content"] == "line 1000\nline 1001\nline 1002\n"
+    assert result["size"] == numbered_file.stat().st_size
+    assert result["encoding"] == "utf-8"
+
+
+def test_filesystemtool_reads_are_capped(numbered_file):
+    """
+    Tests that byte ranges and tails respect the configured result size cap.
+    """
+    tool = FileSystemTool(max_result_bytes=10)
+
+    result = tool.use(operation="read_range", filepath=str(numbered_file), start=0)
+    assert result["content"] == "line 1\nlin"
+    assert result["truncated"] is True
+
+    tail = FileSystemTool().use(operation="tail", filepath=str(numbered_file), lines=2)
+    assert tail["content"] == "line 1999\nline 2000\n"
+
+
+def test_filesystemtool_read_range_rejects_reversed_lines(numbered_file):
+    """
+    Tests that a line range ending before it starts is an error.
+    """
+    tool = FileSystemTool()
+
+    result = tool.use(
+        operation="read_range", filepath=str(numbered_file), start_line=5, end_line=4
+    )
+
+    assert result["status"] == "error"
+    assert "end_line 4" in result["message"]
+
+
+@pytest.mark.parametrize("lines", [0, 1, 3, 2000, 5000])
+def test_filesystemtool_tail_spans_many_blocks(tmp_path, lines):
+    """
+    Tests that tails reaching back over several blocks match the file's last lines.
+    """
+    file_path = tmp_path / "blocks.log"
+    text = "".join(f"entry {i} " + "z" * (i % 50) + "\n" for i in range(3000))
+    file_path.write_text(text)
+
+    result = FileSystemTool().use(
+        operation="tail", filepath=str(file_path), lines=lines
+    )
+
+    expected = "".join(text.splitlines(keepends=True)[-lines:]) if lines else ""
+    assert result["content"] == expected
+    assert result["start"] == len(text) - len(expected)
+
+
+def test_filesystemtool_read_chunks(numbered_file):
+    """
+    Tests that chunked reads reassemble to the original file content.
+    """
+    tool = FileSystemTool()
+
+    result = tool.use(
+        operation="read_chunks", filepath=str(numbered_file), chunk_size=4096
+    )
+    chunks = result["chunks"]
+
+    assert len(chunks) > 1
+    assert result["next_offset"] is None
+    assert "".join(c["content"] for c in chunks) == numbered_file.read_text()
+
+
+def test_filesystemtool_read_chunks_pages_by_offset(tmp_path):
+    """
+    Tests that chunk pages respect the byte cap, never split a character,
+    and resume from `next_offset`.
+    """
+    file_path = tmp_path / "text.txt"
+    text = "añb€c" * 50
+    file_path.write_text(text, encoding="utf-8")
+    tool = FileSystemTool(max_result_bytes=7)
+
+    pages, offset = [], 0
+    while offset is not None:
+        result = tool.use(
+            operation="read_chunks", filepath=str(file_path), offset=offset
+        )
+        assert sum(c["size"] for c in result["chunks"]) <= 7
+        pages.append("".join(c["content"] for c in result["chunks"]))
+        offset = result["next_offset"]
+
+    assert "".join(pages) == text
+    assert json.loads(json.dumps(result)) == result
+
+
+def test_filesystemtool_read_limits_count_bytes(tmp_path):
+    """
+    Tests that the read cap counts bytes and that empty files can be read
+    through the memory-mapped path.
+    """
+    file_path = tmp_path / "wide.txt"
+    file_path.write_text("€" * 10, encoding="utf-8")
+    empty = tmp_path / "empty.txt"
+    empty.write_text("")
+    tool = FileSystemTool(max_result_bytes=10, mmap_threshold=0)
+
+    result = tool.use(operation="read_file", filepath=str(file_path))
+    assert result["truncated"]
+    assert "€" * 3 + "\n---" in result["content"]
+    assert "€" * 4 not in result["content"]
+
+    result = tool.use(operation="read_range", filepath=str(empty), start_line=1)
+    assert result["status"] == "success"
+    assert result["content"] == ""
+
+
+def test_filesystemtool_list_recursive_paginates_and_honours_gitignore(tmp_path):
+    """
+    Tests that recursive listing skips gitignored paths and resumes across pages.
+    """
+    (tmp_path / "src" / "pkg").mkdir(parents=True)
+    (tmp_path / "build").mkdir()
+    (tmp_path / ".gitignore").write_text("build/\n*.log\n")
+    for name in ["src/a.py", "src/pkg/b.py", "src/pkg/c.py", "build/out.py", "x.log"]:
+        (tmp_path / name).write_text("data")
+    tool = FileSystemTool()
+
+    result = tool.use(
+        operation="list_recursive", path=str(tmp_path), include=["*.py"], page_size=2
+    )
+    paths = [entry["path"] for entry in result["entries"]]
+    assert result["next_cursor"] is not None
+    while result["next_cursor"]:
+        result = tool.use(operation="list_recursive", cursor=result["next_cursor"])
+        paths += [entry["path"] for entry in result["entries"]]
+
+    assert sorted(paths) == ["src/a.py", "src/pkg/b.py", "src/pkg/c.py"]
+    assert all(entry["size"] == 4 for entry in result["entries"])
+
+
+def test_filesystemtool_open_listings_share_one_thread_pool(tmp_path):
+    """
+    Tests that abandoned listing cursors do not each keep their own threads.
+    """
+    for i in range(4):
+        (tmp_path / f"d{i}").mkdir()
+        (tmp_path / f"d{i}" / "f.txt").write_text("data")
+    tool = FileSystemTool(max_workers=2)
+    before = threading.active_count()
+
+    for _ in range(10):
+        result = tool.use(operation="list_recursive", path=str(tmp_path), page_size=1)
+        assert result["next_cursor"] is not None
+
+    assert threading.active_count() - before <= 2
+    tool.close()
+
+
+def test_searchtool_finds_definitions_and_refreshes_changes(tmp_path):
+    """
+    Tests that the SearchTool answers substring and regex queries and picks up edits.
+    """
+    (tmp_path / "agent.py").write_text("class Director:\n    def think(self):\n")
+    (tmp_path / "notes.txt").write_text("The Director plans.\n")
+    tool = SearchTool(root=str(tmp_path), refresh_interval=0)
+
+    result = tool.use(operation="search", query=r"class\s+Director", regex=True)
+    assert result["status"] == "success"
+    assert result["hits"] == [
+        {"path": "agent.py", "line": 1, "text": "class Director:"}
+    ]
+
+    (tmp_path / "notes.txt").write_text("Nothing here.\nclass Director: pass\n")
+    result = tool.use(operation="search", query="class Director")
+    assert sorted((hit["path"], hit["line"]) for hit in result["hits"]) == [
+        ("agent.py", 1),
+        ("notes.txt", 2),
+    ]
+
+
+@pytest.mark.parametrize("query", ["(abc)?def", "x(abc){0,1}yz", "(abc)*def"])
+def test_searchtool_regex_with_optional_groups_has_no_false_negatives(tmp_path, query):
+    """
+    Tests that literals inside optional groups are not required by the index.
+    """
+    (tmp_path / "plain.txt").write_text("just def\nand xyz\n")
+    tool = SearchTool(root=str(tmp_path), refresh_interval=0)
+
+    result = tool.use(operation="search", query=query, regex=True)
+
+    assert [hit["line"] for hit in result["hits"]] == [1 if "def" in query else 2]
+
+
+def test_filesystemtool_cache_tracks_writes_and_external_changes(tmp_path):
+    """
+    Tests that cached reads stay correct across tool writes, appends and outside edits.
+    """
+    file_path = tmp_path / "cached.txt"
+    tool = FileSystemTool()
+
+    tool.use(operation="write_file", filepath=str(file_path), content="v1")
+    first = tool.use(operation="read_file", filepath=str(file_path))
+    assert tool.use(operation="read_file", filepath=str(file_path)) == first
+
+    tool.use(operation="modify_file", filepath=str(file_path), content_to_append="+a")
+    assert "v1+a" in tool.use(operation="read_file", filepath=str(file_path))["content"]
+
+    file_path.write_text("changed outside the tool")
+    result = tool.use(operation="read_file", filepath=str(file_path))
+    assert "changed outside the tool" in result["content"]
+
+
+def test_filesystemtool_cache_counts_bytes_and_remembers_truncation(tmp_path):
+    """
+    Tests that cache hits report truncation like the read they replay, and
+    that the cache limit is measured in bytes.
+    """
+    long_file = tmp_path / "long.txt"
+    long_file.write_text("x" * 20)
+    wide_file = tmp_path / "wide.txt"
+    wide_file.write_text("€" * 5, encoding="utf-8")
+    tool = FileSystemTool(max_result_bytes=10, cache_bytes=20)
+
+    first = tool.use(operation="read_file", filepath=str(long_file))
+    assert first["truncated"] is True
+    assert tool.use(operation="read_file", filepath=str(long_file)) == first
+
+    tool.use(operation="read_file", filepath=str(wide_file))
+    assert tool._cache.total_bytes == 20
+
+
+def test_filesystemtool_read_many_and_write_many(tmp_path):
+    """
+    Tests that batched operations report a result per file.
+    """
+    tool = FileSystemTool()
+    files = {str(tmp_path / f"f{i}.txt"): f"content {i}" for i in range(5)}
+
+    written = tool.use(operation="write_many", files=files)
+    assert written["status"] == "success"
+    assert set(written["results"]) == set(files)
+
+    missing = str(tmp_path / "missing.txt")
+    read = tool.use(operation="read_many", filepaths=list(files) + [missing])
+    assert read["status"] == "error"
+    assert read["results"][missing]["status"] == "error"
+    for path, content in files.items():
+        assert content in read["results"][path]["content"]
+
+
+def test_filesystemtool_write_is_atomic_and_preserves_mode(tmp_path):
+    """
+    Tests that an overwrite replaces the file without leaving temporary files behind.
+    """
+    file_path = tmp_path / "config.txt"
+    file_path.write_text("old")
+    file_path.chmod(0o640)
+    tool = FileSystemTool()
+
+    result = tool.use(operation="write_file", filepath=str(file_path), content="new")
+
+    assert result["status"] == "success"
+    assert file_path.read_text() == "new"
+    assert file_path.stat().st_mode & 0o777 == 0o640
+    assert [p.name for p in tmp_path.iterdir()] == ["config.txt"]
+
+
+def test_filesystemtool_buffered_appends_flush_on_demand(tmp_path):
+    """
+    Tests that buffered appends are coalesced and become visible on flush or read.
+    """
+    file_path = tmp_path / "events.log"
+    tool = FileSystemTool(append_buffer_bytes=1 << 20, append_flush_interval=60)
+
+    for i in range(3):
+        tool.use(
+            operation="modify_file",
+            filepath=str(file_path),
+            content_to_append=f"event {i}\n",
+            buffered=True,
+        )
+    assert file_path.read_text() == "", "Small appends should still be buffered."
+
+    tool.use(operation="flush", filepath=str(file_path))
+    assert file_path.read_text() == "event 0\nevent 1\nevent 2\n"
+
+    tool.use(
+        operation="modify_file",
+        filepath=str(file_path),
+        content_to_append="event 3\n",
+        buffered=True,
+    )
+    tail = tool.use(operation="tail", filepath=str(file_path), lines=1)
+    assert tail["content"] == "event 3\n", "Reads through the tool should flush first."
+    tool.close()
+
+
+def test_filesystemtool_buffered_appends_are_flushed_at_exit(tmp_path):
+    """
+    Tests that appends still buffered when the interpreter exits are written.
+    """
+    file_path = tmp_path / "events.log"
+    script = (
+        "from free_ai.tools import FileSystemTool\n"
+        "tool = FileSystemTool(append_flush_interval=60)\n"
+        f"tool.use(operation='modify_file', filepath={str(file_path)!r},"
+        " content_to_append='last words\\n', buffered=True)\n"
+    )
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    subprocess.run([sys.executable, "-c", script], check=True, env=env)
+
+    assert file_path.read_text() == "last words\n"
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requires os.fork")
+def test_append_buffer_resets_its_flusher_in_forked_children(tmp_path):
+    """
+    Tests that a forked child does not inherit the parent's flusher or pending data.
+    """
+    buffer = AppendBuffer(max_delay=60)
+    buffer.append(str(tmp_path / "log"), b"parent\n")
+    assert buffer._flusher is not None
+
+    pid = os.fork()
+    if pid == 0:
+        clean = buffer._flusher is None and not buffer.pending(str(tmp_path / "log"))
+        os._exit(0 if clean else 1)
+    _, status = os.waitpid(pid, 0)
+
+    assert os.waitstatus_to_exitcode(status) == 0
+    buffer.close()
+    assert (tmp_path / "log").read_bytes() == b"parent\n"
+
+
+def test_append_buffer_flusher_survives_write_errors(tmp_path, caplog):
+    """
+    Tests that a failed background write is logged, kept pending and raised
+    by the next flush, and that the next append restarts the flusher.
+    """
+    path = str(tmp_path / "log")
+    buffer = AppendBuffer(max_delay=0.05)
+    buffer.append(path, b"a")
+    buffer._files[path][0].close()  # Every write now fails.
+
+    deadline = time.monotonic() + 5
+    while buffer._flusher is not None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert buffer._flusher is None
+    assert "Failed to flush appends" in caplog.text
+    assert buffer.pending(path)
+    with pytest.raises(ValueError):
+        buffer.flush(path)
+
+    buffer._files[path][0] = open(path, "ab")
+    buffer.append(path, b"b")
+    assert buffer._flusher is not None
+    while buffer.pending(path) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert (tmp_path / "log").read_bytes() == b"ab"
+    buffer.close()
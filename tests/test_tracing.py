@@ -0,0 +1,70 @@
+import json
+
+from free_ai import tracing
+from free_ai.agora import Agora
+
+
+def test_disabled_tracing_records_nothing():
+    """
+    Tests that spans are no-ops while tracing is disabled.
+    """
+    tracing.disable()
+    assert tracing.span("anything") is tracing._NULL_SPAN
+
+    agora = Agora()
+    message_id = agora.post_message("Boss", "Worker", {"task": 1})
+    assert agora.claim_message(message_id, "Worker-1")
+    assert tracing.get_tracer() is None
+
+
+def test_spans_are_summarized_and_exported(tmp_path):
+    """
+    Tests that traced calls are recorded and exported as Chrome trace events.
+    """
+    tracer = tracing.enable()
+    try:
+        agora = Agora()
+        for i in range(3):
+            agora.post_message("Boss", "Worker", {"task": i})
+        with tracing.span("custom", size=2) as span:
+            span.set(result="ok")
+    finally:
+        tracing.disable()
+
+    summary = tracer.summary()
+    assert summary["agora.post_message"]["count"] == 3
+    assert summary["custom"]["count"] == 1
+
+    path = tmp_path / "trace.json"
+    tracer.export_chrome_trace(str(path))
+    events = json.loads(path.read_text())["traceEvents"]
+    assert len(events) == 4
+    assert all(event["ph"] == "X" and event["dur"] >= 0 for event in events)
+    assert events[-1]["args"] == {"size": 2, "result": "ok"}
+
+
+def test_failed_spans_are_marked_and_profiles_sampled(tmp_path):
+    """
+    Tests that exceptions are recorded on the span and sampled spans are profiled.
+    """
+    tracer = tracing.enable(profile_rate=1.0, profile_spans={"work"})
+
+    @tracing.traced("work")
+    def work(fail):
+        if fail:
+            raise ValueError("boom")
+        return sum(range(1000))
+
+    try:
+        work(False)
+        try:
+            work(True)
+        except ValueError:
+            pass
+    finally:
+        tracing.disable()
+
+    spans = tracer.spans()
+    assert [span["attributes"].get("error") for span in spans] == [None, "ValueError"]
+    assert tracer.dump_profile(str(tmp_path / "work.prof"))
+    assert (tmp_path / "work.prof").stat().st_size > 0